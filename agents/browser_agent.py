@@ -20,13 +20,16 @@ console = Console()
 
 
 class BrowserAgent:
-    def __init__(self, headless: bool = True, user_data_dir: str = None):
+    def __init__(self, headless: bool = True, user_data_dir: str = None,
+                 captcha_solver: Optional[CaptchaSolverAgent] = None):
         """
         初始化浏览器代理
         
         Args:
             headless: 是否无头模式
             user_data_dir: 用户数据目录，用于持久化 cookies
+            captcha_solver: 共享的验证码识别代理（如Web服务中带识别进程池的实例），
+                未提供时按环境变量 CAPTCHA_MODE 创建
         """
         self.headless = headless
         self.user_data_dir = user_data_dir
@@ -37,14 +40,23 @@ class BrowserAgent:
         self.login_url = f"{self.base_url}/jsxsd/"
         self.cookies_file = "cookies.json"
         self.retry_count = 3
+        # 最近一次登录失败时登录页的错误提示
+        self.last_login_error: Optional[str] = None
         
         # 初始化验证码识别器（避免重复加载模型）
-        captcha_mode = os.getenv('CAPTCHA_MODE', 'ai')  # 默认使用AI识别
-        self.captcha_solver = CaptchaSolverAgent(mode=captcha_mode)
-        console.print(f"🔍 验证码识别器已初始化（模式：{captcha_mode}）", style="green")
+        if captcha_solver is None:
+            captcha_mode = os.getenv('CAPTCHA_MODE', 'ai')  # 默认使用AI识别
+            captcha_solver = CaptchaSolverAgent(mode=captcha_mode)
+            console.print(f"🔍 验证码识别器已初始化（模式：{captcha_mode}）", style="green")
+        self.captcha_solver = captcha_solver
+        # 识别置信度不足时本地刷新验证码的最大次数
+        self.captcha_max_retries = int(os.getenv('CAPTCHA_MAX_RETRIES', '3'))
 
     async def start(self):
         """启动浏览器"""
+        # 浏览器启动期间在后台预热验证码模型，首个验证码无需等待模型加载
+        self.captcha_solver.warm_up()
+        
         playwright = await async_playwright().start()
         
         launch_options = {
@@ -116,6 +128,85 @@ class BrowserAgent:
         await self.page.goto(self.login_url)
         await asyncio.sleep(2)
 
+    async def _refresh_captcha(self, working_page: Page) -> bool:
+        """
+        点击验证码图片刷新验证码
+        
+        Args:
+            working_page: 验证码所在页面
+            
+        Returns:
+            是否成功刷新
+        """
+        console.print("🔄 刷新验证码图片...", style="blue")
+        try:
+            # 尝试多种可能的验证码图片选择器
+            captcha_img_selectors = [
+                '#kaptchaImage',
+                '#verifyCodeDiv img',
+                'img[src*="kaptcha"]',
+                'img[src*="captcha"]',
+                'img[src*="verify"]',
+                'img[onclick*="refresh"]',
+                'img[onclick*="change"]',
+                'img[alt*="验证码"]',
+                'img[title*="验证码"]'
+            ]
+            
+            for selector in captcha_img_selectors:
+                try:
+                    captcha_img = await working_page.query_selector(selector)
+                    if captcha_img and await captcha_img.is_visible():
+                        console.print(f"🎯 点击刷新验证码：{selector}", style="blue")
+                        await captcha_img.click()
+                        # 等待验证码刷新完成
+                        await working_page.wait_for_timeout(1500)
+                        console.print("✅ 验证码已刷新", style="green")
+                        return True
+                except:
+                    continue
+            
+            console.print("⚠️ 未找到可刷新的验证码图片，使用当前验证码", style="yellow")
+            
+        except Exception as e:
+            console.print(f"⚠️ 刷新验证码失败：{e}，使用当前验证码", style="yellow")
+        return False
+
+    async def _capture_captcha(self, working_page: Page) -> Optional[bytes]:
+        """
+        截取验证码图片，主页面找不到时从工作页面获取
+        
+        Args:
+            working_page: 验证码所在页面
+            
+        Returns:
+            验证码图片数据
+        """
+        captcha_image = await self.get_captcha_image()
+        if captcha_image or working_page == self.page:
+            return captcha_image
+        
+        try:
+            captcha_selectors = [
+                'img[src*="kaptcha"]',
+                'img[src*="captcha"]',
+                'img[src*="verify"]',
+                'img[alt*="验证码"]'
+            ]
+            
+            for selector in captcha_selectors:
+                try:
+                    captcha_element = await working_page.query_selector(selector)
+                    if captcha_element and await captcha_element.is_visible():
+                        captcha_image = await captcha_element.screenshot()
+                        console.print(f"📸 从工作页面获取验证码图片：{selector}", style="blue")
+                        return captcha_image
+                except:
+                    continue
+        except Exception as img_error:
+            console.print(f"❌ 从工作页面获取验证码图片失败：{img_error}", style="red")
+        return None
+
     async def get_captcha_image(self) -> Optional[bytes]:
         """获取验证码图片"""
         try:
@@ -217,6 +308,28 @@ class BrowserAgent:
             console.print(f"❌ 获取验证码图片失败：{e}", style="red")
             return None
 
+    async def _page_error_message(self, page: Optional[Page] = None) -> Optional[str]:
+        """
+        提取页面上可见的简短错误提示（如"验证码错误"、"用户名或密码错误"）
+        
+        只读取页面可见文本中的短行，不匹配整页HTML（选课页面的表单中总会出现"验证码"等字样）。
+        
+        Args:
+            page: 页面，默认为主页面
+            
+        Returns:
+            错误提示，找不到时返回None
+        """
+        try:
+            text = await (page or self.page).inner_text("body")
+        except Exception:
+            return None
+        for line in text.splitlines():
+            line = line.strip()
+            if line and len(line) <= 50 and any(keyword in line for keyword in ["错误", "不正确", "失败", "过期"]):
+                return line
+        return None
+
     async def login(self, username: str, password: str, captcha_code: str = None) -> bool:
         """
         登录系统
@@ -227,8 +340,9 @@ class BrowserAgent:
             captcha_code: 验证码（如果需要）
             
         Returns:
-            登录是否成功
+            登录是否成功；失败时登录页的错误提示记录在 last_login_error 中
         """
+        self.last_login_error = None
         try:
             # 使用 HTTP 协议进行登录
             login_url_http = self.login_url.replace('https://', 'http://')
@@ -266,7 +380,8 @@ class BrowserAgent:
                 console.print("✅ 登录成功", style="green")
                 return True
             else:
-                console.print("❌ 登录失败", style="red")
+                self.last_login_error = await self._page_error_message()
+                console.print(f"❌ 登录失败{f'：{self.last_login_error}' if self.last_login_error else ''}", style="red")
                 console.print(f"   URL检查: 包含jsxsd={('jsxsd' in current_url)}, 不包含login={('login' not in current_url.lower())}", style="red")
                 return False
 
@@ -995,75 +1110,27 @@ class BrowserAgent:
                         if not 'working_page' in locals():
                             working_page = self.page
                         
-                        # 先刷新验证码图片，确保获取最新的验证码
-                        console.print("🔄 刷新验证码图片...", style="blue")
-                        try:
-                            # 尝试多种可能的验证码图片选择器
-                            captcha_img_selectors = [
-                                '#kaptchaImage',
-                                '#verifyCodeDiv img',
-                                'img[src*="kaptcha"]',
-                                'img[src*="captcha"]',
-                                'img[src*="verify"]',
-                                'img[onclick*="refresh"]',
-                                'img[onclick*="change"]',
-                                'img[alt*="验证码"]',
-                                'img[title*="验证码"]'
-                            ]
+                        # 刷新并识别验证码；置信度不足时在本地刷新重试，避免提交错误验证码后重新进入选课流程
+                        max_refreshes = self.captcha_max_retries if self.captcha_solver.mode == "ai" else 0
+                        captcha_code = ""
+                        for attempt in range(max_refreshes + 1):
+                            await self._refresh_captcha(working_page)
                             
-                            captcha_refreshed = False
-                            for selector in captcha_img_selectors:
-                                try:
-                                    captcha_img = await working_page.query_selector(selector)
-                                    if captcha_img and await captcha_img.is_visible():
-                                        console.print(f"🎯 点击刷新验证码：{selector}", style="blue")
-                                        await captcha_img.click()
-                                        captcha_refreshed = True
-                                        break
-                                except:
-                                    continue
+                            captcha_image = await self._capture_captcha(working_page)
+                            if not captcha_image:
+                                console.print("❌ 无法获取验证码图片", style="red")
+                                return False
                             
-                            if captcha_refreshed:
-                                # 等待验证码刷新完成
-                                await working_page.wait_for_timeout(1500)
-                                console.print("✅ 验证码已刷新", style="green")
-                            else:
-                                console.print("⚠️ 未找到可刷新的验证码图片，使用当前验证码", style="yellow")
-                                
-                        except Exception as e:
-                            console.print(f"⚠️ 刷新验证码失败：{e}，使用当前验证码", style="yellow")
-                        
-                        # 获取验证码图片
-                        captcha_image = await self.get_captcha_image()
-                        if not captcha_image:
-                            # 如果主页面没有验证码图片，尝试从工作页面获取
-                            if working_page != self.page:
-                                try:
-                                    captcha_selectors = [
-                                        'img[src*="kaptcha"]',
-                                        'img[src*="captcha"]',
-                                        'img[src*="verify"]',
-                                        'img[alt*="验证码"]'
-                                    ]
-                                    
-                                    for selector in captcha_selectors:
-                                        try:
-                                            captcha_element = await working_page.query_selector(selector)
-                                            if captcha_element and await captcha_element.is_visible():
-                                                captcha_image = await captcha_element.screenshot()
-                                                console.print(f"📸 从工作页面获取验证码图片：{selector}", style="blue")
-                                                break
-                                        except:
-                                            continue
-                                except Exception as img_error:
-                                    console.print(f"❌ 从工作页面获取验证码图片失败：{img_error}", style="red")
-                        
-                        if not captcha_image:
-                            console.print("❌ 无法获取验证码图片", style="red")
-                            return False
-                        
-                        # 使用验证码识别服务
-                        captcha_code = self.captcha_solver.solve_captcha(captcha_image, manual_fallback=True)
+                            # 最后一次尝试才允许手动输入
+                            is_last_attempt = attempt == max_refreshes
+                            captcha_code = await self.captcha_solver.solve_captcha_async(
+                                captcha_image, manual_fallback=is_last_attempt, retry_count=attempt,
+                                source="select"
+                            )
+                            if captcha_code:
+                                break
+                            if not is_last_attempt:
+                                console.print(f"🔄 验证码识别置信度不足，刷新后重试（{attempt + 1}/{max_refreshes}）", style="yellow")
                         
                         if not captcha_code:
                             console.print("❌ 验证码识别失败", style="red")
@@ -1264,9 +1331,11 @@ class BrowserAgent:
                                 # 检查alert消息中的成功指示
                                 if any(keyword in msg for keyword in ["成功", "已选", "选课成功"]):
                                     console.print("🎉 从alert消息确认选课成功！", style="green")
+                                    self.captcha_solver.report_result(True)
                                     return True
                                 elif any(keyword in msg for keyword in ["失败", "错误", "验证码", "已满"]):
                                     console.print("❌ 从alert消息确认选课失败", style="red")
+                                    self.captcha_solver.report_failure(msg)
                                     return False
                         
                         # 如果没有alert消息，分析页面内容
@@ -1279,6 +1348,7 @@ class BrowserAgent:
                         # 先检查明显的成功指示
                         if any(keyword in final_content for keyword in success_keywords):
                             console.print("🎉 从页面内容确认选课成功！", style="green")
+                            self.captcha_solver.report_result(True)
                             return True
                         
                         # 检查明显的失败指示
@@ -1286,6 +1356,7 @@ class BrowserAgent:
                             console.print("❌ 从页面内容确认选课失败", style="red")
                             
                             # 尝试提取具体错误信息
+                            error_msg = None
                             try:
                                 from bs4 import BeautifulSoup
                                 soup = BeautifulSoup(final_content, 'html.parser')
@@ -1310,11 +1381,15 @@ class BrowserAgent:
                                 for elem in error_elements:
                                     if elem.get_text().strip():
                                         console.print(f"📝 页面错误元素：{elem.get_text().strip()[:100]}", style="yellow")
+                                        error_msg = error_msg or elem.get_text().strip()
                                         break
                                         
                             except Exception as parse_error:
                                 console.print(f"⚠️ 解析错误信息失败：{parse_error}", style="yellow")
                             
+                            # 没有提取到具体错误信息时不回填判定，不用整页HTML猜测
+                            if error_msg:
+                                self.captcha_solver.report_failure(error_msg)
                             return False
                         
                         # 如果没有明确的成功或失败指示，进行更深入的检查
@@ -1332,9 +1407,11 @@ class BrowserAgent:
                                 
                                 if any(keyword in title_text for keyword in success_keywords):
                                     console.print("🎉 从页面标题确认选课成功！", style="green")
+                                    self.captcha_solver.report_result(True)
                                     return True
                                 elif any(keyword in title_text for keyword in error_keywords):
                                     console.print("❌ 从页面标题确认选课失败", style="red")
+                                    self.captcha_solver.report_failure(title_text)
                                     return False
                             
                             # 检查是否返回到选课主页面
@@ -1350,6 +1427,7 @@ class BrowserAgent:
                                         selected_course_ids = [course.get('kcid') for course in updated_courses['selected_courses']]
                                         if course_id in selected_course_ids:
                                             console.print("🎉 确认课程已在已选课程列表中！", style="green")
+                                            self.captcha_solver.report_result(True)
                                             return True
                                         else:
                                             console.print("❌ 课程未在已选课程列表中", style="red")
@@ -1377,9 +1455,13 @@ class BrowserAgent:
                                         # 再次检查成功/失败关键词
                                         if any(keyword in redirected_content for keyword in success_keywords):
                                             console.print("🎉 重定向后确认选课成功！", style="green")
+                                            self.captcha_solver.report_result(True)
                                             return True
                                         elif any(keyword in redirected_content for keyword in error_keywords):
                                             console.print("❌ 重定向后确认选课失败", style="red")
+                                            redirected_error = await self._page_error_message(working_page)
+                                            if redirected_error:
+                                                self.captcha_solver.report_failure(redirected_error)
                                             return False
                             
                         except Exception as deep_check_error:
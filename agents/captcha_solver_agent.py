@@ -7,91 +7,540 @@ CaptchaSolverAgent - 验证码识别代理
 
 模型选型：
 基础方案：图像预处理 + 手动输入
-AI方案：DdddOcr 自动识别（已集成）
+AI方案：DdddOcr 自动识别（已集成，多个预处理/模型变体并行识别并按置信度投票）
 备选方案：手动输入
 
 输出：{ "code": "7a9cB" }
 """
 
 
-import cv2
+import asyncio
 import numpy as np
 import base64
 import io
 import sys
 import os
-from PIL import Image, ImageEnhance
-from typing import Dict, Optional, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PIL import Image, ImageFilter
+from typing import Dict, List, Optional, Any, Tuple, Union
 from rich.console import Console
 
+from utils.captcha_harvester import CaptchaHarvester
+from utils.captcha_profile import CaptchaProfile, load_profile, parse_expected_length
+from utils.ocr_worker_pool import PRIORITY_SELECT, SOURCE_PRIORITIES
+from utils.recognition_cache import DEFAULT_CACHE_SIZE, RecognitionCache, pixel_hash
+from utils.remote_ocr import DEFAULT_REMOTE_TIMEOUT, RemoteOCRClient, RemoteOCRError
+from utils.startup_profile import startup_profile
+
 console = Console()
 
-# 动态导入ddddocr模块
+# 红色竖线干扰颜色（#EF0009）及容差
+RED_LINE_COLOR = (239, 0, 9)
+RED_LINE_TOLERANCE = 20
+# 对比度增强倍数
+CONTRAST_FACTOR = 2.0
+# 默认预处理参数（可由验证码格式中的 preprocess 覆盖，python main.py tune-captcha 搜索最优值）
+# red_line_tolerance 为None时不移除红线；median_blur 为中值滤波核大小（0不滤波）；
+# binarize 为二值化阈值（None不二值化，"otsu"自动阈值）；color_filter 为先保留的ColorFilter预设颜色
+DEFAULT_PREPROCESS_PARAMS: Dict[str, Any] = {
+    'red_line_color': list(RED_LINE_COLOR),
+    'red_line_tolerance': RED_LINE_TOLERANCE,
+    'contrast': CONTRAST_FACTOR,
+    'median_blur': 0,
+    'binarize': None,
+    'color_filter': None,
+}
+# 默认置信度阈值（最低单字符概率低于该值时不提交）
+DEFAULT_CONFIDENCE_THRESHOLD = 0.5
+# 任一识别变体达到该置信度时立即采用，不再等待其他变体
+DEFAULT_EARLY_EXIT_CONFIDENCE = 0.9
+
+# 识别变体 "预处理方式:模型版本"，按优先级排列。默认只运行一个变体：多变体投票每个验证码
+# 多做一次完整推理，多用户部署时CPU开销翻倍；需要投票时通过 CAPTCHA_VARIANTS 配置多个变体，
+# 各变体同时开始，任一变体达到提前采用置信度即返回
+# 预处理方式：processed（移除红线+灰度+对比度增强）、original（原图）
+# 模型版本：old（common_old.onnx）、beta（common.onnx）
+DEFAULT_VARIANTS = "processed:old"
+VARIANT_PREPROCESSINGS = ("processed", "original")
+MODEL_VERSIONS = ("old", "beta")
+
+# 异步识别线程数（同时进行识别的验证码数量上限）
+DEFAULT_SOLVE_WORKERS = 2
+# 异步自动识别超时（秒）
+DEFAULT_SOLVE_TIMEOUT = 15.0
+# 验证码样本库默认容量（MB）
+DEFAULT_HARVEST_MAX_MB = 200
+
+
+def parse_variants(value: Union[str, List[str]]) -> List[Tuple[str, str]]:
+    """
+    解析识别变体配置
+    
+    Args:
+        value: 逗号分隔的字符串（如 "processed:old,original:beta"）或字符串列表
+        
+    Returns:
+        (预处理方式, 模型版本) 列表，保持配置顺序并去重
+        
+    Raises:
+        ValueError: 当变体格式或取值无效时
+    """
+    items = value.split(',') if isinstance(value, str) else list(value)
+    variants: List[Tuple[str, str]] = []
+    for item in items:
+        item = item.strip()
+        if not item:
+            continue
+        preprocessing, _, version = item.partition(':')
+        version = version or "old"
+        if preprocessing not in VARIANT_PREPROCESSINGS or version not in MODEL_VERSIONS:
+            raise ValueError(f"无效的识别变体：{item}（格式：{'|'.join(VARIANT_PREPROCESSINGS)}:{'|'.join(MODEL_VERSIONS)}）")
+        if (preprocessing, version) not in variants:
+            variants.append((preprocessing, version))
+    if not variants:
+        raise ValueError("至少需要一个识别变体")
+    return variants
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """
+    用Otsu方法计算灰度图的二值化阈值（类间方差最大）
+    
+    Args:
+        gray: uint8灰度数组
+        
+    Returns:
+        阈值（大于等于阈值的像素为前景）
+    """
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    weight_low = np.cumsum(histogram)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(histogram * levels)
+    mean_low = sum_low / np.maximum(weight_low, 1)
+    mean_high = (sum_low[-1] - sum_low) / np.maximum(weight_high, 1)
+    variance = weight_low * weight_high * (mean_low - mean_high) ** 2
+    # 阈值取使方差最大的分割点的下一级
+    return int(np.argmax(variance)) + 1
+
+
+# 识别线程池在进程内共享（按用途与线程数），所有识别代理共同受线程数限制，
+# 每个用户会话创建的识别代理不再各自持有线程
+_executor_lock = threading.Lock()
+_shared_executors: Dict[Tuple[str, int], ThreadPoolExecutor] = {}
+
+
+def _get_shared_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """
+    获取进程内共享的线程池（首次使用时创建）
+    
+    Args:
+        name: 用途（variant 识别变体、solve 异步识别）
+        max_workers: 线程数
+        
+    Returns:
+        线程池
+    """
+    with _executor_lock:
+        executor = _shared_executors.get((name, max_workers))
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"captcha-{name}")
+            _shared_executors[(name, max_workers)] = executor
+        return executor
+
+
+# ddddocr 模块按需导入：导入会加载 onnxruntime、OpenCV 和大型字符集，
+# 只在首次需要识别验证码时执行，status/clean/list 等命令无需承担这部分开销
+_ddddocr_lock = threading.Lock()
+_ddddocr_module = None
+_ddddocr_import_failed = False
+
+
 def _import_ddddocr():
-    """动态导入ddddocr模块"""
-    try:
-        import importlib.util
-        # 添加ddddocr模块路径
-        ddddocr_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'vision_model', 'ddddocr')
-        if ddddocr_path not in sys.path:
-            sys.path.insert(0, ddddocr_path)
-        
-        # 使用importlib动态导入
-        spec = importlib.util.find_spec('ddddocr')
-        if spec is None:
-            raise ImportError("找不到ddddocr模块")
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        return module.DdddOcr, True
-    except Exception as e:
-        console.print(f"⚠️ DdddOcr模块导入失败：{e}", style="yellow")
-        return None, False
-
-DdddOcr, DDDDOCR_AVAILABLE = _import_ddddocr()
+    """
+    导入ddddocr模块（线程安全，只执行一次）
+    
+    Returns:
+        ddddocr模块，导入失败时返回None
+    """
+    global _ddddocr_module, _ddddocr_import_failed
+    
+    with _ddddocr_lock:
+        if _ddddocr_module is not None or _ddddocr_import_failed:
+            return _ddddocr_module
+        
+        try:
+            import importlib
+            # 添加ddddocr所在目录（vision_model）到模块搜索路径
+            vision_model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'vision_model')
+            if vision_model_path not in sys.path:
+                sys.path.insert(0, vision_model_path)
+            
+            with startup_profile.measure("导入ddddocr"):
+                _ddddocr_module = importlib.import_module('ddddocr')
+        except Exception as e:
+            console.print(f"⚠️ DdddOcr模块导入失败：{e}", style="yellow")
+            _ddddocr_import_failed = True
+        
+        return _ddddocr_module
 
 
 class CaptchaSolverAgent:
-    def __init__(self, mode: str = "manual", model_path: str = None):
+    def __init__(self, mode: str = "manual", model_path: str = None, debug: Optional[bool] = None,
+                 confidence_threshold: Optional[float] = None,
+                 expected_length: Optional[Union[int, str, Tuple[int, int]]] = None,
+                 profile: Optional[Union[str, CaptchaProfile]] = None,
+                 variants: Optional[Union[str, List[str]]] = None,
+                 early_exit_confidence: Optional[float] = None,
+                 solve_workers: Optional[int] = None,
+                 solve_timeout: Optional[float] = None,
+                 harvest_dir: Optional[str] = None,
+                 ocr_pool=None,
+                 remote_ocr_url: Optional[str] = None,
+                 cache_size: Optional[int] = None):
         """
         初始化验证码识别代理
         
+        AI模式下模型在首次识别时才加载，也可以调用 warm_up() 在后台线程提前加载。
+        
         Args:
             mode: 识别模式 ('manual', 'ai')
             model_path: AI模型路径（用于ai模式）
+            debug: 是否保存验证码调试图片，默认读取环境变量 DEBUG
+            confidence_threshold: 自动提交所需的最低置信度，默认读取环境变量 CAPTCHA_CONFIDENCE_THRESHOLD
+            expected_length: 验证码期望长度（如 4 或 "4-5"），默认读取环境变量 CAPTCHA_EXPECTED_LENGTH，
+                未设置时使用验证码格式中的长度
+            profile: 验证码格式（内置名称如 "ybu"、JSON文件路径或 CaptchaProfile），
+                设置后解码限制在格式的字符集与长度内，不符合格式的结果不提交；默认读取环境变量 CAPTCHA_PROFILE
+            variants: 识别变体（如 "processed:old,original:beta"），默认读取环境变量 CAPTCHA_VARIANTS
+            early_exit_confidence: 提前采用单个变体结果的置信度，默认读取环境变量 CAPTCHA_EARLY_EXIT_CONFIDENCE
+            solve_workers: 异步识别线程数，默认读取环境变量 CAPTCHA_SOLVE_WORKERS（线程数相同的识别代理共用进程内的同一个线程池）
+            solve_timeout: 异步自动识别超时（秒，0表示不限），默认读取环境变量 CAPTCHA_SOLVE_TIMEOUT
+            harvest_dir: 验证码样本库目录（为空时不采集），默认读取环境变量 CAPTCHA_HARVEST_DIR
+            ocr_pool: 验证码识别进程池（OCRWorkerPool），设置后异步识别交给工作进程执行
+            remote_ocr_url: ddddocr API 服务地址，设置后优先远程识别、失败时回退本地模型，
+                默认读取环境变量 CAPTCHA_REMOTE_OCR_URL
+            cache_size: 识别结果缓存容量（0表示不缓存），默认读取环境变量 CAPTCHA_CACHE_SIZE
         """
         self.mode = mode
         self.model_path = model_path
-        self.model = None
+        self.debug = debug if debug is not None else os.getenv('DEBUG', 'false').lower() == 'true'
+        
+        if confidence_threshold is None:
+            confidence_threshold = float(os.getenv('CAPTCHA_CONFIDENCE_THRESHOLD') or DEFAULT_CONFIDENCE_THRESHOLD)
+        self.confidence_threshold = confidence_threshold
+        self.profile = load_profile(profile if profile is not None else os.getenv('CAPTCHA_PROFILE'))
+        if expected_length is None:
+            expected_length = os.getenv('CAPTCHA_EXPECTED_LENGTH')
+        self.expected_length = parse_expected_length(expected_length)
+        if self.expected_length is None and self.profile is not None:
+            self.expected_length = self.profile.length
+        # 预处理参数（验证码格式中通过 tune-captcha 搜索得到的参数，未设置时使用默认参数）
+        self.preprocess_params: Optional[Dict[str, Any]] = (
+            dict(self.profile.preprocess) if self.profile is not None and self.profile.preprocess else None)
+        
+        self.variants = parse_variants(variants or os.getenv('CAPTCHA_VARIANTS') or DEFAULT_VARIANTS)
+        # 并行识别线程数（不超过CPU核数，单线程时按顺序执行）
+        self.variant_workers = max(1, min(len(self.variants), os.cpu_count() or 1))
+        if early_exit_confidence is None:
+            early_exit_confidence = float(os.getenv('CAPTCHA_EARLY_EXIT_CONFIDENCE') or DEFAULT_EARLY_EXIT_CONFIDENCE)
+        self.early_exit_confidence = early_exit_confidence
+        
+        if solve_workers is None:
+            solve_workers = int(os.getenv('CAPTCHA_SOLVE_WORKERS') or DEFAULT_SOLVE_WORKERS)
+        self.solve_workers = max(1, solve_workers)
+        if solve_timeout is None:
+            solve_timeout = float(os.getenv('CAPTCHA_SOLVE_TIMEOUT') or DEFAULT_SOLVE_TIMEOUT)
+        self.solve_timeout = solve_timeout if solve_timeout > 0 else None
+        # 最近一次异步识别的耗时：queue_wait（排队等待）与 solve_time（实际识别）
+        self.last_timing: Dict[str, float] = {}
+        # 多用户部署时共享的识别进程池（模型在工作进程中加载）
+        self.ocr_pool = ocr_pool
+        # 远程识别服务（多个进程共享一个已预热的模型服务）
+        remote_ocr_url = remote_ocr_url or os.getenv('CAPTCHA_REMOTE_OCR_URL')
+        self.remote_ocr: Optional[RemoteOCRClient] = None
+        if remote_ocr_url:
+            remote_timeout = float(os.getenv('CAPTCHA_REMOTE_OCR_TIMEOUT') or DEFAULT_REMOTE_TIMEOUT)
+            # 新启动的服务尚未加载模型时，按本地默认模型的配置初始化
+            self.remote_ocr = RemoteOCRClient(remote_ocr_url, timeout=remote_timeout,
+                                              pool_size=self.solve_workers * len(self.variants),
+                                              init_options={'ocr': True, 'det': False})
+        
+        # 验证码样本采集：记录识别结果，提交后由调用方通过 report_result 回填服务器判定
+        harvest_dir = harvest_dir or os.getenv('CAPTCHA_HARVEST_DIR')
+        self.harvester: Optional[CaptchaHarvester] = None
+        if harvest_dir:
+            max_mb = float(os.getenv('CAPTCHA_HARVEST_MAX_MB') or DEFAULT_HARVEST_MAX_MB)
+            self.harvester = CaptchaHarvester(harvest_dir, max_bytes=int(max_mb * 1024 * 1024))
+        # 最近一次提交的验证码对应的样本ID
+        self.last_sample_id: Optional[int] = None
+        
+        # 识别结果缓存：相同验证码不重复识别，被服务器拒绝的结果不再使用
+        if cache_size is None:
+            cache_size = int(os.getenv('CAPTCHA_CACHE_SIZE') or DEFAULT_CACHE_SIZE)
+        self.recognition_cache: Optional[RecognitionCache] = RecognitionCache(cache_size) if cache_size > 0 else None
+        # 最近一次提交的 (图片哈希, 验证码)，用于回填缓存判定
+        self.last_submission: Optional[Tuple[str, str]] = None
+        
+        # 预热的验证码尺寸（如 "100x40,120x40"），为空时使用ddddocr的默认尺寸
+        self.warmup_sizes = os.getenv('CAPTCHA_WARMUP_SHAPES') or None
+        # 是否优先加载经过正确率校验的INT8量化模型
+        self.quantized = os.getenv('CAPTCHA_QUANTIZED_MODEL', 'false').lower() == 'true'
+        
+        self._model = None
+        self._model_failed = False
+        self._model_lock = threading.Lock()
+        self._beta_model = None
+        self._beta_model_failed = False
+        self._beta_model_lock = threading.Lock()
+        self._warm_up_thread: Optional[threading.Thread] = None
         self._init_model()
 
     def _init_model(self):
-        """初始化识别模型"""
-        if self.mode == "ai":
-            if DDDDOCR_AVAILABLE:
-                try:
-                    # 初始化DdddOcr模型
-                    self.model = DdddOcr(show_ad=False)
-                    console.print("🔍 DdddOcr识别模型已初始化", style="green")
-                except Exception as e:
-                    console.print(f"❌ DdddOcr模型初始化失败：{e}，回退到手动模式", style="red")
-                    self.mode = "manual"
-                    self.model = None
-            else:
-                console.print("⚠️ DdddOcr模块不可用，回退到手动模式", style="yellow")
-                self.mode = "manual"
-                self.model = None
-        elif self.mode == "manual":
-            # 手动输入模式，不需要初始化任何模型
-            self.model = None
-        else:
+        """校验识别模式（AI模型延迟到首次使用时加载）"""
+        if self.mode not in ("ai", "manual"):
             console.print("⚠️ 未知识别模式，使用手动输入", style="yellow")
             self.mode = "manual"
-            self.model = None
+
+    @property
+    def model(self):
+        """识别模型，AI模式下首次访问时加载"""
+        if self._model is None and self.mode == "ai":
+            self._load_model()
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+        # 更换模型后之前的识别结果不再适用
+        if self.recognition_cache is not None:
+            self.recognition_cache.clear()
+
+    def _load_model(self):
+        """加载DdddOcr模型（线程安全，失败时回退到手动模式；配置了远程识别时只使用远程识别）"""
+        with self._model_lock:
+            if self._model is not None or self._model_failed or self.mode != "ai":
+                return
+            
+            ddddocr = _import_ddddocr()
+            if ddddocr is None:
+                console.print(f"⚠️ DdddOcr模块不可用，{self._model_unavailable()}", style="yellow")
+                return
+            
+            try:
+                with startup_profile.measure("加载DdddOcr模型"):
+                    self._model = self._create_model(ddddocr)
+                console.print("🔍 DdddOcr识别模型已初始化", style="green")
+            except Exception as e:
+                console.print(f"❌ DdddOcr模型初始化失败：{e}，{self._model_unavailable()}", style="red")
+                self._model = None
+
+    def _model_unavailable(self) -> str:
+        """
+        标记本地模型不可用：配置了远程识别时保持AI模式，否则回退到手动模式
+        
+        Returns:
+            回退方式说明
+        """
+        self._model_failed = True
+        if self.remote_ocr is not None:
+            return "只使用远程识别"
+        self.mode = "manual"
+        return "回退到手动模式"
+
+    def _create_model(self, ddddocr, beta: bool = False):
+        """
+        创建DdddOcr实例，启用量化模型但量化模型不可用时回退到FP32模型
+        
+        Args:
+            ddddocr: ddddocr模块
+            beta: 是否使用beta模型
+            
+        Returns:
+            DdddOcr实例
+        """
+        if self.quantized:
+            try:
+                return ddddocr.DdddOcr(beta=beta, show_ad=False, quantized=True)
+            except Exception as e:
+                console.print(f"⚠️ INT8量化模型不可用：{e}，使用FP32模型", style="yellow")
+        return ddddocr.DdddOcr(beta=beta, show_ad=False)
+
+    def get_model(self, version: str = "old"):
+        """
+        获取指定版本的识别模型，首次访问时加载
+        
+        Args:
+            version: 模型版本（'old' 或 'beta'）
+            
+        Returns:
+            DdddOcr实例，不可用时返回None
+        """
+        if version == "old":
+            return self.model
+        
+        with self._beta_model_lock:
+            if self._beta_model is None and not self._beta_model_failed and self.mode == "ai":
+                ddddocr = _import_ddddocr()
+                try:
+                    if ddddocr is None:
+                        raise RuntimeError("DdddOcr模块不可用")
+                    with startup_profile.measure("加载DdddOcr beta模型"):
+                        self._beta_model = self._create_model(ddddocr, beta=True)
+                    console.print("🔍 DdddOcr beta识别模型已初始化", style="green")
+                except Exception as e:
+                    # beta模型只是额外的识别变体，加载失败时跳过，不影响主模型
+                    console.print(f"⚠️ DdddOcr beta模型初始化失败：{e}，跳过beta变体", style="yellow")
+                    self._beta_model_failed = True
+            return self._beta_model
+
+    def _load_variant_models(self):
+        """
+        加载识别变体用到的全部模型，并在预期验证码尺寸上预热
+        
+        远程识别服务可用时只做健康检查，本地模型在远程识别失败时才加载。
+        """
+        if self.remote_ocr is not None:
+            if self.remote_ocr.is_available():
+                console.print(f"🌐 远程识别服务可用：{self.remote_ocr.base_url}", style="green")
+                return
+            console.print(f"⚠️ 远程识别服务不可用：{self.remote_ocr.base_url}，加载本地模型", style="yellow")
+        
+        for version in dict.fromkeys(version for _, version in self.variants):
+            model = self.get_model(version)
+            if model is None or not hasattr(model, "warm_up"):
+                continue
+            try:
+                model.warm_up(self.warmup_sizes)
+                stats = model.get_warmup_stats()
+                if stats.get("status") == "failed":
+                    console.print(f"⚠️ {version} 模型预热失败：{stats['error']}", style="yellow")
+                elif stats["total_ms"] is not None:
+                    console.print(f"🔥 {version} 模型预热完成，耗时 {stats['total_ms']:.0f}ms", style="dim")
+            except Exception as e:
+                console.print(f"⚠️ {version} 模型预热失败：{e}", style="yellow")
+
+    def warm_up(self, background: bool = True) -> None:
+        """
+        预先加载识别模型并在预期验证码尺寸上预热，使首个验证码以稳定速度识别
+        
+        Args:
+            background: 是否在后台线程中加载
+        """
+        if self.mode != "ai" or self._model is not None or self.ocr_pool is not None:
+            return
+        
+        if not background:
+            self._load_variant_models()
+            return
+        
+        if self._warm_up_thread is None or not self._warm_up_thread.is_alive():
+            self._warm_up_thread = threading.Thread(target=self._load_variant_models, name="captcha-warm-up", daemon=True)
+            self._warm_up_thread.start()
+
+    def _get_variant_executor(self) -> ThreadPoolExecutor:
+        """获取识别变体线程池（进程内共享）"""
+        return _get_shared_executor("variant", self.variant_workers)
+
+    def _get_solve_executor(self) -> ThreadPoolExecutor:
+        """
+        获取异步识别专用线程池（进程内共享）
+        
+        使用线程而不是进程：模型在进程内共享加载，ONNX推理期间释放GIL，
+        线程数限制了整个进程同时占用CPU的验证码数量，其余请求在队列中等待。
+        """
+        return _get_shared_executor("solve", self.solve_workers)
+
+    def close(self) -> None:
+        """关闭远程识别连接池与样本库（识别线程池在进程内共享，不随代理关闭）"""
+        if self.remote_ocr is not None:
+            self.remote_ocr.close()
+        if self.harvester is not None:
+            self.harvester.close()
+            self.harvester = None
+
+    @staticmethod
+    def decode_image(image_data: bytes) -> np.ndarray:
+        """
+        解码验证码图片为RGB数组（整个识别流程只解码这一次）
+        
+        Args:
+            image_data: 图片字节数据
+            
+        Returns:
+            形状为 (H, W, 3) 的uint8数组
+        """
+        with Image.open(io.BytesIO(image_data)) as img:
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            return np.asarray(img)
+
+    @staticmethod
+    def preprocess_array(rgb: np.ndarray, params: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        在数组上完成预处理：移除红色竖线干扰（#EF0009）、灰度化、对比度增强 (2.0倍)
+        
+        灰度与对比度计算与PIL的 convert('L') 和 ImageEnhance.Contrast 逐像素一致，
+        输入数组不会被修改。params 可覆盖 DEFAULT_PREPROCESS_PARAMS 中的参数，
+        并可选地增加颜色过滤（灰度化之前）、中值滤波与二值化（对比度增强之后）。
+        
+        Args:
+            rgb: 形状为 (H, W, 3) 的uint8数组
+            params: 预处理参数，未给出的参数使用默认值
+            
+        Returns:
+            形状为 (H, W) 的uint8灰度数组
+        """
+        params = DEFAULT_PREPROCESS_PARAMS if params is None else {**DEFAULT_PREPROCESS_PARAMS, **params}
+        
+        if params['color_filter']:
+            ddddocr = _import_ddddocr()
+            if ddddocr is None:
+                raise RuntimeError("颜色过滤需要DdddOcr模块")
+            rgb = np.asarray(ddddocr.ColorFilter.compiled(colors=list(params['color_filter'])).filter_image(Image.fromarray(rgb)))
+        
+        channels = rgb.astype(np.int32)
+        
+        # ITU-R 601-2 灰度（与PIL相同的定点运算）
+        gray = ((channels[..., 0] * 19595 + channels[..., 1] * 38470
+                 + channels[..., 2] * 7471 + 0x8000) >> 16).astype(np.uint8)
+        
+        tolerance = params['red_line_tolerance']
+        if tolerance is not None:
+            # 红色竖线掩码（#EF0009及其相近颜色），红色区域替换为白色
+            red, green, blue = params['red_line_color']
+            red_mask = ((np.abs(channels[..., 0] - red) <= tolerance)
+                        & (np.abs(channels[..., 1] - green) <= tolerance)
+                        & (np.abs(channels[..., 2] - blue) <= tolerance))
+            gray[red_mask] = 255
+        
+        # 以灰度均值为中心增强对比度
+        mean = np.float32(int(gray.mean() + 0.5))
+        contrast = gray.astype(np.float32)
+        contrast -= mean
+        contrast *= np.float32(params['contrast'])
+        contrast += mean
+        np.clip(contrast, 0, 255, out=contrast)
+        result = contrast.astype(np.uint8)
+        
+        if params['median_blur']:
+            result = np.asarray(Image.fromarray(result, 'L').filter(ImageFilter.MedianFilter(int(params['median_blur']))))
+        
+        threshold = params['binarize']
+        if threshold is not None:
+            if threshold == 'otsu':
+                threshold = otsu_threshold(result)
+            result = np.where(result >= int(threshold), 255, 0).astype(np.uint8)
+        return result
 
     def preprocess_image(self, image_data: bytes) -> bytes:
         """
         预处理验证码图片 - 移除红色竖线干扰并进行对比度增强
         
+        识别流程直接使用 preprocess_array 的结果，此方法仅为需要图片字节的调用方保留。
+        
         Args:
             image_data: 图片字节数据
             
@@ -99,95 +548,285 @@ class CaptchaSolverAgent:
             预处理后的图片字节数据
         """
         try:
-            import numpy as np
-            
-            # 使用PIL处理图片
-            # 1. 从字节数据创建PIL图像
-            img = Image.open(io.BytesIO(image_data))
-            
-            # 2. 移除红色竖线干扰（#EF0009）
-            # 转换为RGB模式以确保颜色处理正确
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
+            processed = self.preprocess_array(self.decode_image(image_data), self.preprocess_params)
             
-            # 转换为numpy数组进行像素操作
-            img_array = np.array(img)
+            output_buffer = io.BytesIO()
+            Image.fromarray(processed, 'L').save(output_buffer, format='PNG')
             
-            # 定义红色目标颜色范围（#EF0009及其相近颜色）
-            target_red = np.array([239, 0, 9])  # #EF0009
-            tolerance = 20  # 颜色容差
+            console.print("🖼️ 图片预处理完成（移除红线+灰度+对比度增强2.0倍）", style="blue")
+            return output_buffer.getvalue()
             
-            # 计算颜色差距
-            diff = np.abs(img_array - target_red)
-            red_mask = np.all(diff <= tolerance, axis=2)
+        except Exception as e:
+            console.print(f"❌ 图片预处理失败：{e}", style="red")
+            return None
+
+    def score_prediction(self, code: str, char_probabilities: List[float]) -> float:
+        """
+        计算识别结果的校准置信度
+        
+        取各字符概率的最小值：任意一个字符不确定，整条验证码就可能被服务器拒绝。
+        长度不符合期望或不符合验证码格式时置信度为0。
+        
+        Args:
+            code: 识别文本
+            char_probabilities: 逐字符概率
             
-            # 将红色区域替换为白色
-            img_array[red_mask] = [255, 255, 255]
+        Returns:
+            置信度（0~1）
+        """
+        if not code or not char_probabilities:
+            return 0.0
+        if self.expected_length is not None:
+            low, high = self.expected_length
+            if not low <= len(code) <= high:
+                return 0.0
+        if self.profile is not None and not self.profile.matches(code):
+            return 0.0
+        return float(min(char_probabilities))
+
+    def is_confident(self, result: Dict[str, Any]) -> bool:
+        """
+        判断识别结果是否达到自动提交的置信度阈值
+        
+        Args:
+            result: recognize_text 的返回结果
             
-            # 转换回PIL图像
-            img = Image.fromarray(img_array, 'RGB')
+        Returns:
+            是否可以直接提交
+        """
+        return bool(result.get("code")) and result.get("confidence", 0.0) >= self.confidence_threshold
+
+    def _classify(self, image: np.ndarray, model=None) -> Dict[str, Any]:
+        """
+        识别单张图像并计算校准置信度
+        
+        设置了验证码格式时，解码限制在格式字符集内并搜索满足期望长度的最优路径，
+        识别文本按格式的大小写规则规范化。
+        
+        Args:
+            image: 图像数组
+            model: 识别模型，默认使用主模型
             
-            console.print("🔴 已移除红色竖线干扰（#EF0009）", style="green")
+        Returns:
+            识别结果字典
+        """
+        options: Dict[str, Any] = {}
+        if self.profile is not None:
+            if self.profile.decode_charset:
+                options["charset_range"] = self.profile.decode_charset
+            if self.expected_length is not None:
+                options["expected_length"] = self.expected_length
+        output = (model or self.model).classification(image, confidence=True, **options)
+        code = output["text"].strip()
+        if self.profile is not None:
+            code = self.profile.normalize(code)
+        char_probabilities = output["char_probabilities"]
+        return {
+            "code": code,
+            "confidence": self.score_prediction(code, char_probabilities),
+            "char_probabilities": char_probabilities
+        }
+
+    def _run_variant(self, variant: Tuple[str, str], images: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """
+        运行单个识别变体
+        
+        配置了远程识别服务时优先使用服务端加载的模型（不区分模型版本），请求失败时回退到本地模型。
+        
+        Args:
+            variant: (预处理方式, 模型版本)
+            images: 预处理方式到图像数组的映射
             
-            # 3. 转换为灰度图
-            gray_img = img.convert('L')
+        Returns:
+            识别结果字典（附带变体名称）
+        """
+        preprocessing, version = variant
+        result = None
+        if self.remote_ocr is not None and self.remote_ocr.is_available():
+            try:
+                result = self._classify(images[preprocessing], self.remote_ocr)
+                version = "remote"
+            except RemoteOCRError as e:
+                console.print(f"⚠️ {e}，使用本地模型", style="yellow")
+        
+        if result is None:
+            model = self.get_model(version)
+            if model is None:
+                raise RuntimeError(f"{version}模型不可用")
+            result = self._classify(images[preprocessing], model)
+        result["variant"] = f"{preprocessing}:{version}"
+        console.print(f"🤖 DdddOcr识别结果（{result['variant']}）：{result['code']}"
+                      f"（置信度 {result['confidence']:.2f}）", style="green")
+        return result
+
+    def _run_variants(self, images: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        运行全部识别变体，任一变体达到提前采用置信度时立即返回
+        
+        多核机器上各变体同时在线程池中执行（ONNX推理期间释放GIL），不等待其余变体；
+        单核或只有一个变体时按优先级顺序执行。
+        
+        Args:
+            images: 预处理方式到图像数组的映射
             
-            # 4. 增强对比度 (2.0倍)
-            enhancer = ImageEnhance.Contrast(gray_img)
-            contrast_img = enhancer.enhance(2.0)
+        Returns:
+            已完成变体的识别结果列表
+        """
+        results: List[Dict[str, Any]] = []
+        
+        def collect(variant_name: str, run) -> bool:
+            try:
+                result = run()
+            except Exception as e:
+                console.print(f"⚠️ 识别变体 {variant_name} 失败：{e}", style="yellow")
+                return False
+            results.append(result)
+            return bool(result["code"]) and result["confidence"] >= self.early_exit_confidence
+        
+        if self.variant_workers == 1:
+            for variant in self.variants:
+                if collect(':'.join(variant), lambda: self._run_variant(variant, images)):
+                    break
+            return results
+        
+        executor = self._get_variant_executor()
+        futures = {executor.submit(self._run_variant, variant, images): ':'.join(variant)
+                   for variant in self.variants}
+        try:
+            for future in as_completed(futures):
+                if collect(futures[future], future.result):
+                    break
+        finally:
+            # 提前采用时取消尚未开始的变体，已开始的变体在后台完成，结果不再使用
+            for future in futures:
+                future.cancel()
+        return results
+
+    @staticmethod
+    def vote(results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        按置信度加权投票合并各变体的识别结果
+        
+        Args:
+            results: 各变体的识别结果
             
-            # 5. 转换回字节数据
-            output_buffer = io.BytesIO()
-            contrast_img.save(output_buffer, format='PNG')
-            processed_bytes = output_buffer.getvalue()
+        Returns:
+            得票最高的识别结果（取支持者中置信度最高的一条，附带 votes 和 agreement），
+            没有任何非空结果时返回None
+        """
+        candidates = [result for result in results if result.get("code")]
+        if not candidates:
+            return None
+        
+        votes: Dict[str, float] = {}
+        for result in candidates:
+            votes[result["code"]] = votes.get(result["code"], 0.0) + result["confidence"]
+        
+        winner = max(votes, key=votes.get)
+        supporters = [result for result in candidates if result["code"] == winner]
+        best = dict(max(supporters, key=lambda result: result["confidence"]))
+        best["votes"] = votes
+        best["agreement"] = len(supporters) / len(results)
+        return best
+
+    def _cache_key(self, rgb: np.ndarray) -> Optional[str]:
+        """
+        计算识别结果缓存键（像素哈希，预处理参数不同时不共享结果）
+        
+        Args:
+            rgb: 解码后的验证码数组
             
-            console.print("🖼️ 图片预处理完成（移除红线+灰度+对比度增强2.0倍）", style="blue")
-            return processed_bytes
+        Returns:
+            缓存键，未启用缓存时返回None
+        """
+        if self.recognition_cache is None:
+            return None
+        return pixel_hash(rgb, salt=repr(self.preprocess_params))
+
+    def _cached_result(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        从缓存中查找识别结果
+        
+        Args:
+            cache_key: 缓存键
             
-        except Exception as e:
-            console.print(f"❌ 图片预处理失败：{e}", style="red")
+        Returns:
+            缓存的识别结果，未命中时返回None
+        """
+        if cache_key is None:
             return None
+        cached = self.recognition_cache.get(cache_key)
+        if cached is not None:
+            cached["cache_key"] = cache_key
+            console.print(f"♻️ 命中识别缓存：{cached['code']}", style="dim")
+        return cached
 
+    def _cache_result(self, cache_key: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        缓存识别结果；服务器曾拒绝过的验证码置信度置零，不再自动提交
+        
+        Args:
+            cache_key: 缓存键
+            result: 识别结果
+            
+        Returns:
+            附带 cache_key 的识别结果
+        """
+        if cache_key is None:
+            return result
+        result["cache_key"] = cache_key
+        if result.get("code") and self.recognition_cache.was_rejected(cache_key, result["code"]):
+            console.print(f"⚠️ 识别结果 {result['code']} 已被服务器拒绝过，不自动提交", style="yellow")
+            result["confidence"] = 0.0
+            result["previously_rejected"] = True
+            return result
+        self.recognition_cache.put(cache_key, result)
+        return result
 
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        获取识别结果缓存统计（命中率等）
+        
+        Returns:
+            统计信息，未启用缓存时返回None
+        """
+        return self.recognition_cache.stats() if self.recognition_cache is not None else None
 
     def recognize_text(self, image_data: bytes) -> Dict[str, Any]:
         """
         识别验证码文本
         
+        图片只解码一次，预处理结果以数组形式直接交给模型，不经过中间PNG编码。
+        置信度由模型softmax概率计算（最低单字符概率 + 长度校验），而不是固定值。
+        相同像素的验证码直接返回缓存的结果。
+        
         Args:
             image_data: 验证码图片字节数据
             
         Returns:
-            识别结果字典 {"code": "认识的文本", "confidence": 置信度}
+            识别结果字典 {"code": "认识的文本", "confidence": 置信度, "char_probabilities": 逐字符概率}
         """
         try:
             # 使用 DdddOcr 模型识别
-            if self.mode == "ai" and self.model is not None:
+            if self.mode == "ai" and (self.remote_ocr is not None or self.model is not None):
                 try:
-                    # 预处理图片（灰度+对比度增强）
-                    processed_bytes = self.preprocess_image(image_data)
-                    if processed_bytes is None:
-                        return {"code": "", "confidence": 0.0, "error": "预处理失败"}
-                    
-                    # 先尝试预处理后的图像
+                    # 解码并预处理（移除红线+灰度+对比度增强）
                     try:
-                        result_processed = self.model.classification(processed_bytes)
-                        console.print(f"🤖 DdddOcr识别结果（预处理图像）：{result_processed}", style="green")
-                        
-                        if result_processed and len(result_processed.strip()) > 0:
-                            return {"code": result_processed.strip(), "confidence": 0.95}
-                    except Exception as e1:
-                        console.print(f"⚠️ 预处理图像识别失败：{e1}", style="yellow")
+                        original = self.decode_image(image_data)
+                        cache_key = self._cache_key(original)
+                        cached = self._cached_result(cache_key)
+                        if cached is not None:
+                            return cached
+                        processed = self.preprocess_array(original, self.preprocess_params)
+                    except Exception as e:
+                        console.print(f"❌ 图片预处理失败：{e}", style="red")
+                        return {"code": "", "confidence": 0.0, "error": "预处理失败"}
                     
-                    # 如果预处理失败，再尝试原始图像
-                    try:
-                        result_original = self.model.classification(image_data)
-                        console.print(f"🤖 DdddOcr识别结果（原始图像）：{result_original}", style="green")
-                        
-                        if result_original and len(result_original.strip()) > 0:
-                            return {"code": result_original.strip(), "confidence": 0.8}
-                    except Exception as e2:
-                        console.print(f"⚠️ 原始图像识别失败：{e2}", style="yellow")
+                    # 并行运行各识别变体，按置信度加权投票
+                    results = self._run_variants({"processed": processed, "original": original})
+                    best = self.vote(results)
+                    if best is not None:
+                        return self._cache_result(cache_key, best)
                     
                     # 如果两种方法都失败，返回需要手动输入
                     console.print("⚠️ DdddOcr自动识别失败，需要手动输入", style="yellow")
@@ -214,43 +853,8 @@ class CaptchaSolverAgent:
             save_path: 保存路径
         """
         try:
-            import numpy as np
-            
-            # 使用PIL处理图片（与preprocess_image方法保持一致）
-            # 1. 从字节数据创建PIL图像
-            img = Image.open(io.BytesIO(image_data))
-            
-            # 2. 移除红色竖线干扰（#EF0009）
-            # 转换为RGB模式以确保颜色处理正确
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # 转换为numpy数组进行像素操作
-            img_array = np.array(img)
-            
-            # 定义红色目标颜色范围（#EF0009及其相近颜色）
-            target_red = np.array([239, 0, 9])  # #EF0009
-            tolerance = 20  # 颜色容差
-            
-            # 计算颜色差距
-            diff = np.abs(img_array - target_red)
-            red_mask = np.all(diff <= tolerance, axis=2)
-            
-            # 将红色区域替换为白色
-            img_array[red_mask] = [255, 255, 255]
-            
-            # 转换回PIL图像
-            img = Image.fromarray(img_array, 'RGB')
-            
-            # 3. 转换为灰度图
-            gray_img = img.convert('L')
-            
-            # 4. 增强对比度 (2.0倍)
-            enhancer = ImageEnhance.Contrast(gray_img)
-            contrast_img = enhancer.enhance(2.0)
-            
-            # 5. 保存处理后的图片
-            contrast_img.save(save_path)
+            processed = self.preprocess_array(self.decode_image(image_data), self.preprocess_params)
+            Image.fromarray(processed, 'L').save(save_path)
             
             console.print(f"💾 预处理图片已保存到：{save_path}（包含红线移除处理）", style="blue")
         except Exception as e:
@@ -315,24 +919,22 @@ class CaptchaSolverAgent:
             console.print(f"❌ 获取手动输入失败：{e}", style="red")
             return ""
 
-    def solve_captcha(self, image_data: bytes, manual_fallback: bool = True, retry_count: int = 0) -> str:
+    def _save_debug_images(self, image_data: bytes, retry_count: int = 0) -> None:
         """
-        解决验证码（主入口方法）
+        调试模式下保存原始与预处理后的验证码图片
         
         Args:
             image_data: 验证码图片数据
-            manual_fallback: 是否允许手动输入作为回退方案
             retry_count: 重试次数，用于文件命名
-            
-        Returns:
-            验证码文本
         """
+        if not self.debug:
+            return
+        
         # 根据重试次数生成文件名
         suffix = f"_retry{retry_count}" if retry_count > 0 else ""
         original_path = f"temp_captcha_original{suffix}.jpg"
         processed_path = f"temp_captcha{suffix}.jpg"
         
-        # 保存原始验证码图片
         try:
             with open(original_path, 'wb') as f:
                 f.write(image_data)
@@ -340,19 +942,251 @@ class CaptchaSolverAgent:
         except Exception as e:
             console.print(f"⚠️ 保存原始验证码失败：{e}", style="yellow")
         
-        # 保存预处理后的验证码图片
         self.save_processed_image(image_data, processed_path)
+
+    def _accept_result(self, result: Dict[str, Any]) -> Optional[str]:
+        """
+        判断识别结果能否直接提交
+        
+        Args:
+            result: 识别结果
+            
+        Returns:
+            可提交的验证码，置信度不足或不符合验证码格式时返回None
+        """
+        if result.get("code") and self.profile is not None:
+            violation = self.profile.violation(result["code"])
+            if violation:
+                console.print(f"⚠️ 识别结果 {result['code']} 不符合验证码格式 {self.profile.name}："
+                              f"{violation}，不自动提交", style="yellow")
+                return None
+        
+        if self.is_confident(result):
+            return result["code"]
+        
+        if result.get("code"):
+            console.print(f"⚠️ 识别置信度 {result.get('confidence', 0.0):.2f} 低于阈值 "
+                          f"{self.confidence_threshold:.2f}，不自动提交", style="yellow")
+        return None
+
+    def _harvest(self, image_data: bytes, result: Dict[str, Any], submitted: str, source: str) -> None:
+        """
+        将识别结果写入样本库（未启用采集时跳过，写入失败不影响识别流程）
+        
+        Args:
+            image_data: 验证码图片数据
+            result: 识别结果
+            submitted: 实际提交的验证码
+            source: 来源（如 login、select）
+        """
+        self.last_sample_id = None
+        if self.harvester is None:
+            return
+        try:
+            self.last_sample_id = self.harvester.record(image_data, result, submitted=submitted, source=source)
+        except Exception as e:
+            console.print(f"⚠️ 保存验证码样本失败：{e}", style="yellow")
+
+    def _remember_submission(self, result: Dict[str, Any], submitted: str) -> None:
+        """
+        记录最近一次提交的验证码，供 report_result 回填缓存判定
+        
+        Args:
+            result: 识别结果
+            submitted: 实际提交的验证码（可能来自手动输入）
+        """
+        cache_key = result.get("cache_key")
+        self.last_submission = (cache_key, submitted) if cache_key and submitted else None
+
+    def report_result(self, accepted: bool, sample_id: Optional[int] = None) -> None:
+        """
+        回填服务器对已提交验证码的判定结果
+        
+        被拒绝的识别结果移出缓存，之后不再自动提交。
+        
+        Args:
+            accepted: 服务器是否接受了验证码
+            sample_id: 样本ID，默认为最近一次提交的验证码
+        """
+        if self.recognition_cache is not None and self.last_submission is not None:
+            cache_key, submitted = self.last_submission
+            self.recognition_cache.report(cache_key, submitted, accepted)
+            self.last_submission = None
+        
+        sample_id = self.last_sample_id if sample_id is None else sample_id
+        if self.harvester is None or sample_id is None:
+            return
+        try:
+            self.harvester.report_verdict(sample_id, accepted)
+        except Exception as e:
+            console.print(f"⚠️ 记录验证码判定结果失败：{e}", style="yellow")
+
+    def report_failure(self, message: Optional[str] = None, sample_id: Optional[int] = None) -> None:
+        """
+        提交失败后根据失败提示回填判定
+        
+        提示中提到验证码时视为验证码被拒；其他失败原因（课程已满、时间冲突、密码错误等）
+        说明验证码已通过。没有可用的提示时无法判断，不回填判定，避免错误标注进入样本库。
+        
+        Args:
+            message: 服务器返回的简短失败提示（alert消息、页面错误信息等），不应传入整页HTML
+            sample_id: 样本ID，默认为最近一次提交的验证码
+        """
+        if not message:
+            return
+        self.report_result("验证码" not in message, sample_id=sample_id)
+
+    def solve_captcha(self, image_data: bytes, manual_fallback: bool = True, retry_count: int = 0,
+                      source: str = "captcha") -> str:
+        """
+        解决验证码（主入口方法）
+        
+        置信度低于阈值时不返回自动识别结果：允许手动输入时转为手动输入，
+        否则返回空字符串，调用方可以在本地刷新验证码后重试，而不是提交一个可能错误的验证码。
+        在异步代码中请使用 solve_captcha_async，避免阻塞事件循环。
+        
+        Args:
+            image_data: 验证码图片数据
+            manual_fallback: 是否允许手动输入作为回退方案
+            retry_count: 重试次数，用于文件命名
+            source: 验证码来源（如 login、select），用于样本采集
+            
+        Returns:
+            验证码文本
+        """
+        self._save_debug_images(image_data, retry_count)
         
         # 首先尝试自动识别
         result = self.recognize_text(image_data)
+        code = self._accept_result(result)
+        if not code:
+            # 如果自动识别失败且允许手动输入
+            if manual_fallback:
+                console.print("🤖 自动识别失败，切换到手动输入模式", style="yellow")
+                code = self.get_manual_input(image_data)
+            else:
+                console.print("❌ 验证码识别失败", style="red")
+                code = ""
         
-        if result.get("code") and result.get("confidence", 0) > 0.5:
-            return result["code"]
+        self._remember_submission(result, code)
+        self._harvest(image_data, result, code, source)
+        return code
+
+    async def recognize_text_async(self, image_data: bytes, retry_count: int = 0,
+                                   timeout: Optional[float] = None,
+                                   source: str = "captcha") -> Dict[str, Any]:
+        """
+        在专用线程池（或识别进程池）中识别验证码，不阻塞事件循环
         
-        # 如果自动识别失败且允许手动输入
-        if manual_fallback:
-            console.print("🤖 自动识别失败，切换到手动输入模式", style="yellow")
-            return self.get_manual_input(image_data)
+        超时或任务被取消时，尚未开始的识别不会执行；已开始的推理无法中断，其结果会被丢弃。
         
-        console.print("❌ 验证码识别失败", style="red")
-        return "" 
\ No newline at end of file
+        Args:
+            image_data: 验证码图片数据
+            retry_count: 重试次数，用于调试文件命名
+            timeout: 超时时间（秒），默认使用 solve_timeout
+            source: 验证码来源，使用进程池时决定优先级（login 优先于 select）
+            
+        Returns:
+            识别结果字典，附带 queue_wait（排队等待秒数）与 solve_time（识别秒数）
+        """
+        loop = asyncio.get_running_loop()
+        timing: Dict[str, float] = {}
+        submitted = time.perf_counter()
+        
+        def run() -> Dict[str, Any]:
+            started = time.perf_counter()
+            timing["queue_wait"] = started - submitted
+            try:
+                self._save_debug_images(image_data, retry_count)
+                return self.recognize_text(image_data)
+            finally:
+                timing["solve_time"] = time.perf_counter() - started
+        
+        timeout = self.solve_timeout if timeout is None else timeout
+        # 进程池不可用（工作进程无法重启）时在本进程识别
+        use_pool = self.ocr_pool is not None and self.mode == "ai" and not self.ocr_pool.is_broken()
+        cache_key = None
+        if use_pool and self.recognition_cache is not None:
+            # 识别结果在本进程缓存，命中时不再提交给工作进程
+            try:
+                cache_key = self._cache_key(self.decode_image(image_data))
+            except Exception:
+                cache_key = None
+            cached = self._cached_result(cache_key)
+            if cached is not None:
+                cached.update(queue_wait=0.0, solve_time=time.perf_counter() - submitted)
+                self.last_timing = {"queue_wait": 0.0, "solve_time": cached["solve_time"]}
+                return cached
+        if use_pool:
+            # 调试图片在本进程保存，工作进程只负责识别；超时取消会传递到尚未分派的请求
+            if self.debug:
+                await loop.run_in_executor(None, self._save_debug_images, image_data, retry_count)
+            priority = SOURCE_PRIORITIES.get(source, PRIORITY_SELECT)
+            try:
+                future = asyncio.wrap_future(self.ocr_pool.submit(image_data, priority))
+            except RuntimeError as e:
+                console.print(f"⚠️ {e}，在本进程识别", style="yellow")
+                use_pool = False
+        if not use_pool:
+            future = loop.run_in_executor(self._get_solve_executor(), run)
+        try:
+            result = dict(await asyncio.wait_for(future, timeout))
+            if use_pool:
+                result = self._cache_result(cache_key, result)
+        except asyncio.TimeoutError:
+            console.print(f"⏰ 验证码识别超时（{timeout:.1f}秒）", style="yellow")
+            result = {"code": "", "confidence": 0.0, "error": "识别超时", "timed_out": True}
+        except RuntimeError as e:
+            # 识别进程异常退出或进程池已关闭
+            console.print(f"❌ 验证码识别进程池错误：{e}", style="red")
+            result = {"code": "", "confidence": 0.0, "error": str(e)}
+        
+        elapsed = time.perf_counter() - submitted
+        if use_pool and "solve_time" in result:
+            # 工作进程只报告识别耗时，其余时间视为排队与进程间传输
+            timing["solve_time"] = result["solve_time"]
+            timing["queue_wait"] = max(0.0, elapsed - result["solve_time"])
+        # 超时时可能仍在排队（未开始）或仍在识别（未结束）
+        queue_wait = timing.get("queue_wait", elapsed)
+        result["queue_wait"] = queue_wait
+        result["solve_time"] = timing.get("solve_time", elapsed - queue_wait)
+        self.last_timing = {"queue_wait": result["queue_wait"], "solve_time": result["solve_time"]}
+        console.print(f"⏱️ 验证码排队 {result['queue_wait'] * 1000:.0f}ms，"
+                      f"识别 {result['solve_time'] * 1000:.0f}ms", style="dim")
+        return result
+
+    async def solve_captcha_async(self, image_data: bytes, manual_fallback: bool = True,
+                                  retry_count: int = 0, timeout: Optional[float] = None,
+                                  source: str = "captcha") -> str:
+        """
+        异步解决验证码（供asyncio代码调用，不阻塞事件循环）
+        
+        自动识别在专用有界线程池中执行并受timeout限制；手动输入等待用户，不受超时限制。
+        
+        Args:
+            image_data: 验证码图片数据
+            manual_fallback: 是否允许手动输入作为回退方案
+            retry_count: 重试次数，用于文件命名
+            timeout: 自动识别超时时间（秒），默认使用 solve_timeout
+            source: 验证码来源（如 login、select），用于样本采集
+            
+        Returns:
+            验证码文本
+        """
+        loop = asyncio.get_running_loop()
+        result = await self.recognize_text_async(image_data, retry_count, timeout, source)
+        code = self._accept_result(result)
+        if not code:
+            if manual_fallback:
+                console.print("🤖 自动识别失败，切换到手动输入模式", style="yellow")
+                code = await loop.run_in_executor(None, self.get_manual_input, image_data)
+            else:
+                console.print("❌ 验证码识别失败", style="red")
+                code = ""
+        
+        self._remember_submission(result, code)
+        if self.harvester is not None:
+            await loop.run_in_executor(None, self._harvest, image_data, result, code, source)
+        else:
+            self.last_sample_id = None
+        return code
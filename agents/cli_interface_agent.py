@@ -12,6 +12,7 @@ python main.py grab CJ000123    # 立即抢课
 
 import asyncio
 import argparse
+import functools
 import json
 import yaml
 import os
@@ -25,6 +26,8 @@ from rich.prompt import Prompt, Confirm
 from dotenv import load_dotenv, set_key
 import logging
 
+from utils.startup_profile import startup_profile
+
 # 配置 JSON Lines 日志
 def setup_json_logger():
     """设置 JSON Lines 格式的日志记录器"""
@@ -187,6 +190,23 @@ class CLIInterfaceAgent:
         clean_parser = subparsers.add_parser('clean', help='清理旧的cookies和数据库文件')
         clean_parser.add_argument('--all', action='store_true', help='清理所有数据文件（包括日志）')
         
+        # 验证码置信度校准命令
+        calibrate_parser = subparsers.add_parser('calibrate-captcha', help='在已标注样本上评估验证码识别置信度')
+        calibrate_parser.add_argument('corpus_dir', help='样本目录（文件名下划线前的部分为标注文本，如 a7kd_001.png）')
+        calibrate_parser.add_argument('--thresholds', type=float, nargs='+', help='需要评估的置信度阈值')
+        calibrate_parser.add_argument('--case-sensitive', action='store_true', help='区分大小写比较')
+        
+        # 验证码预处理参数搜索命令
+        tune_parser = subparsers.add_parser('tune-captcha', help='在已标注样本上搜索验证码预处理参数并写入格式文件')
+        tune_parser.add_argument('corpus_dir', help='样本目录（文件名下划线前的部分为标注文本，如 a7kd_001.png）')
+        tune_parser.add_argument('--output', default='data/captcha_profile.json', help='输出的验证码格式文件')
+        tune_parser.add_argument('--profile', help='基础验证码格式（内置名称或JSON文件，默认使用 CAPTCHA_PROFILE）')
+        tune_parser.add_argument('--search', choices=['grid', 'random'], default='grid', help='搜索方式')
+        tune_parser.add_argument('--trials', type=int, default=50, help='随机搜索的参数组合数')
+        tune_parser.add_argument('--workers', type=int, help='工作进程数（默认为CPU核数）')
+        tune_parser.add_argument('--seed', type=int, default=0, help='随机搜索的随机种子')
+        tune_parser.add_argument('--case-sensitive', action='store_true', help='区分大小写比较')
+        
         return parser
 
     async def run(self, args: List[str] = None) -> None:
@@ -214,6 +234,10 @@ class CLIInterfaceAgent:
                 await self._handle_test_select(parsed_args)
             elif parsed_args.command == 'clean':
                 await self._handle_clean(parsed_args)
+            elif parsed_args.command == 'calibrate-captcha':
+                await self._handle_calibrate_captcha(parsed_args)
+            elif parsed_args.command == 'tune-captcha':
+                await self._handle_tune_captcha(parsed_args)
             else:
                 await self._show_help()
                 
@@ -280,7 +304,8 @@ class CLIInterfaceAgent:
             
             if captcha_image:
                 console.print("🖼️ 正在处理验证码...", style="blue")
-                captcha_code = self.captcha_solver.solve_captcha(captcha_image, manual_fallback=True)
+                captcha_code = await self.captcha_solver.solve_captcha_async(captcha_image, manual_fallback=True,
+                                                                             source="login")
             
             # 尝试登录
             with Progress(
@@ -293,8 +318,12 @@ class CLIInterfaceAgent:
             
             if success:
                 console.print("✅ 登录成功！", style="green")
+                if captcha_code:
+                    self.captcha_solver.report_result(True)
                 logger.info("Login successful", extra={'action': 'login'})
             else:
+                if captcha_code:
+                    self.captcha_solver.report_failure(self.browser_agent.last_login_error)
                 console.print("❌ 登录失败，建议使用 --clean 参数重试", style="red")
                 console.print("💡 使用方法：python main.py login --clean", style="blue")
                 logger.warning("Login failed", extra={'action': 'login'})
@@ -554,14 +583,19 @@ class CLIInterfaceAgent:
             captcha_image = await self.browser_agent.get_captcha_image()
             captcha_code = ""
             if captcha_image:
-                captcha_code = self.captcha_solver.solve_captcha(captcha_image, manual_fallback=True)
+                captcha_code = await self.captcha_solver.solve_captcha_async(captcha_image, manual_fallback=True,
+                                                                             source="login")
             
             login_success = await self.browser_agent.login(username, password, captcha_code)
             if not login_success:
+                if captcha_code:
+                    self.captcha_solver.report_failure(self.browser_agent.last_login_error)
                 console.print("❌ 自动登录失败", style="red")
                 return
             
             console.print("✅ 登录成功", style="green")
+            if captcha_code:
+                self.captcha_solver.report_result(True)
             
             # 刷新课程数据（如果需要）
             if args.refresh_data:
@@ -771,6 +805,10 @@ class CLIInterfaceAgent:
         if 'captcha_mode' in self.config:
             mode_display = "手动输入" if self.config['captcha_mode'] == 'manual' else "AI识别（DdddOcr）"
             config_table.add_row("验证码识别", mode_display)
+            cache_stats = self.captcha_solver.cache_stats() if self.captcha_solver else None
+            if cache_stats and cache_stats['hits'] + cache_stats['misses']:
+                config_table.add_row("识别缓存命中率", f"{cache_stats['hit_rate']:.1%}"
+                                     f"（{cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}）")
         
         console.print(config_table)
         
@@ -786,6 +824,99 @@ class CLIInterfaceAgent:
         # 显示调度器状态
         if self.scheduler:
             self.scheduler.display_jobs_status()
+        
+        # 显示启动耗时
+        startup_profile.display()
+
+    async def _handle_calibrate_captcha(self, args: argparse.Namespace):
+        """处理验证码置信度校准命令"""
+        from utils.captcha_calibration import (
+            DEFAULT_THRESHOLDS, load_labelled_corpus, build_calibration_report, display_calibration_report
+        )
+        
+        console.print(Panel("🎯 验证码置信度校准", style="blue"))
+        
+        if not os.path.isdir(args.corpus_dir):
+            console.print(f"❌ 样本目录不存在：{args.corpus_dir}", style="red")
+            return
+        
+        if self.captcha_solver.mode != 'ai':
+            console.print("❌ 校准需要AI识别模式，请设置 CAPTCHA_MODE=ai", style="red")
+            return
+        
+        samples = load_labelled_corpus(args.corpus_dir)
+        if not samples:
+            console.print("⚠️ 样本目录中没有图片", style="yellow")
+            return
+        
+        predictions = []
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
+            task = progress.add_task(f"识别 {len(samples)} 个样本...", total=len(samples))
+            for label, image_data in samples:
+                result = self.captcha_solver.recognize_text(image_data)
+                predictions.append((label, result.get('code', ''), result.get('confidence', 0.0)))
+                progress.advance(task)
+        
+        report = build_calibration_report(predictions, args.thresholds or DEFAULT_THRESHOLDS,
+                                          case_sensitive=args.case_sensitive)
+        display_calibration_report(report)
+        console.print(f"💡 当前阈值：{self.captcha_solver.confidence_threshold:.2f}"
+                      f"（通过 CAPTCHA_CONFIDENCE_THRESHOLD 调整）", style="cyan")
+        
+        logger.info(f"Captcha calibration completed: {report['samples']} samples, accuracy {report['accuracy']:.3f}",
+                    extra={'action': 'calibrate_captcha', 'samples': report['samples'], 'accuracy': report['accuracy']})
+
+    async def _handle_tune_captcha(self, args: argparse.Namespace):
+        """处理验证码预处理参数搜索命令"""
+        from utils.captcha_calibration import load_labelled_corpus
+        from utils.captcha_profile import load_profile
+        from utils.preprocess_search import (
+            DEFAULT_SEARCH_SPACE, grid_candidates, random_candidates, search_preprocessing,
+            build_tuned_profile, display_search_report
+        )
+        
+        console.print(Panel("🔧 验证码预处理参数搜索", style="blue"))
+        
+        if not os.path.isdir(args.corpus_dir):
+            console.print(f"❌ 样本目录不存在：{args.corpus_dir}", style="red")
+            return
+        
+        samples = load_labelled_corpus(args.corpus_dir)
+        if not samples:
+            console.print("⚠️ 样本目录中没有图片", style="yellow")
+            return
+        
+        try:
+            profile = load_profile(args.profile) if args.profile else self.captcha_solver.profile
+        except ValueError as e:
+            console.print(f"❌ {e}", style="red")
+            return
+        
+        if args.search == 'random':
+            candidates = random_candidates(DEFAULT_SEARCH_SPACE, args.trials, seed=args.seed)
+        else:
+            candidates = grid_candidates(DEFAULT_SEARCH_SPACE)
+        
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
+            progress.add_task(f"在 {len(samples)} 个样本上评估 {len(candidates)} 组参数...", total=None)
+            loop = asyncio.get_running_loop()
+            report = await loop.run_in_executor(None, functools.partial(
+                search_preprocessing, samples, candidates, profile=profile, workers=args.workers,
+                confidence_threshold=self.captcha_solver.confidence_threshold,
+                case_sensitive=args.case_sensitive))
+        
+        display_search_report(report)
+        tuned = build_tuned_profile(report, profile)
+        tuned.save(args.output)
+        best, baseline = report['best'], report['baseline']
+        console.print(f"✅ 首次提交正确率：{baseline['first_try_rate']:.1%} → {best['first_try_rate']:.1%}，"
+                      f"已保存到 {args.output}", style="green")
+        console.print(f"💡 设置 CAPTCHA_PROFILE={args.output} 使用搜索得到的预处理参数", style="cyan")
+        
+        logger.info(f"Captcha preprocessing search completed: {report['candidates']} candidates, "
+                    f"first-try rate {best['first_try_rate']:.3f}",
+                    extra={'action': 'tune_captcha', 'samples': report['samples'],
+                           'first_try_rate': best['first_try_rate']})
 
     async def _handle_scheduler(self, args: argparse.Namespace):
         """处理调度器命令"""
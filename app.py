@@ -39,6 +39,35 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 user_sessions = {}
 active_users = {}
 executor = ThreadPoolExecutor(max_workers=10)
+# 验证码识别进程池（CAPTCHA_OCR_WORKERS>0 时首次使用时创建，所有用户共享）
+ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+_ocr_pool_created = False
+
+
+def get_ocr_pool():
+    """
+    获取验证码识别进程池，首次调用时按环境变量 CAPTCHA_OCR_WORKERS 创建
+    
+    python app.py 与 start_web.py 都在启动服务前调用一次，使工作进程在第一个用户登录前加载好模型。
+    识别进程以spawn方式启动，导入本模块时 __name__ 不是 __main__，不会重复创建。
+    
+    Returns:
+        进程池，未启用时返回None（在Web进程内识别）
+    """
+    global ocr_pool, _ocr_pool_created
+    with _ocr_pool_lock:
+        if not _ocr_pool_created:
+            _ocr_pool_created = True
+            from utils.ocr_worker_pool import OCRWorkerPool
+            try:
+                ocr_pool = OCRWorkerPool.from_env()
+            except RuntimeError as e:
+                print(f"⚠️ 验证码识别进程池启动失败，在Web进程内识别：{e}")
+            if ocr_pool is not None:
+                print(f"🔧 验证码识别进程：{ocr_pool.workers} 个")
+        return ocr_pool
+
 
 # 不再需要UserManager，直接使用YBU凭据
 
@@ -208,9 +237,10 @@ def login():
                                 'message': '正在初始化浏览器代理...'
                             }, room=user_id)
                             
-                            # 初始化代理
-                            browser_agent = BrowserAgent(headless=True)
-                            captcha_solver = CaptchaSolverAgent(mode='ai')
+                            # 初始化代理：登录与选课验证码共用同一个识别代理，都经过识别进程池
+                            captcha_solver = CaptchaSolverAgent(mode='ai', ocr_pool=get_ocr_pool())
+                            captcha_solver.warm_up()
+                            browser_agent = BrowserAgent(headless=True, captcha_solver=captcha_solver)
                             # 暂时跳过DataManagerAgent，专注于YBU登录测试
                             # data_manager = DataManagerAgent(db_path=f"{user_data_dir}/ybu_courses.db")
                             
@@ -256,10 +286,16 @@ def login():
                                 captcha_image = await browser_agent.get_captcha_image()
                                 if captcha_image:
                                     # 使用AI识别验证码
-                                    captcha_code = captcha_solver.solve_captcha(captcha_image, manual_fallback=False)
+                                    captcha_code = await captcha_solver.solve_captcha_async(
+                                        captcha_image, manual_fallback=False, source="login"
+                                    )
                                     if captcha_code:
                                         print(f"[{user_id}] 识别验证码: {captcha_code}")
                                         login_success = await browser_agent.login(ybu_user, ybu_pass, captcha_code)
+                                        if login_success:
+                                            captcha_solver.report_result(True)
+                                        else:
+                                            captcha_solver.report_failure(browser_agent.last_login_error)
                                     else:
                                         print(f"[{user_id}] 验证码识别失败")
                                 else:
@@ -333,7 +369,10 @@ def logout():
     """用户登出"""
     user_id = session.get('user_id')
     if user_id and user_id in user_sessions:
-        del user_sessions[user_id]
+        user_session = user_sessions.pop(user_id)
+        # 释放识别代理的远程连接与样本库（识别线程池在进程内共享）
+        if user_session.get('captcha_solver'):
+            user_session['captcha_solver'].close()
     
     if user_id and user_id in active_users:
         del active_users[user_id]
@@ -426,7 +465,7 @@ def api_grab_course():
             # 获取验证码并选课
             captcha_image = await browser_agent.get_captcha_image()
             if captcha_image:
-                captcha_code = captcha_solver.solve_captcha(captcha_image, manual_fallback=False)
+                captcha_code = await captcha_solver.solve_captcha_async(captcha_image, manual_fallback=False)
                 
                 if captcha_code:
                     success = await browser_agent.select_course(course_id, False)
@@ -568,4 +607,7 @@ if __name__ == '__main__':
     os.makedirs('static/css', exist_ok=True)
     os.makedirs('static/js', exist_ok=True)
     
+    # 启动服务前创建验证码识别进程池（CAPTCHA_OCR_WORKERS>0 时）
+    get_ocr_pool()
+    
     socketio.run(app, host=host, port=port, debug=debug) 
\ No newline at end of file
@@ -9,6 +9,7 @@ python main.py list                     # 查看课程列表
 python main.py plan rules.yml           # 根据规则规划选课
 python main.py grab CJ000123            # 抢课
 python main.py scheduler start          # 启动调度器
+python main.py calibrate-captcha ./captchas  # 在已标注验证码上评估识别置信度
 """
 
 import asyncio
@@ -62,13 +63,19 @@ if platform.system() == 'Windows':
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from agents import (
-    BrowserAgent,
-    CaptchaSolverAgent,
-    DataManagerAgent,
-    SchedulerAgent,
-    CLIInterfaceAgent
-)
+from utils.startup_profile import startup_profile
+
+with startup_profile.measure("导入代理模块"):
+    from agents import (
+        BrowserAgent,
+        CaptchaSolverAgent,
+        DataManagerAgent,
+        SchedulerAgent,
+        CLIInterfaceAgent
+    )
+
+# 需要识别验证码的命令，启动时在后台预热识别模型
+CAPTCHA_COMMANDS = {'login', 'grab', 'test-select', 'auto-select-all', 'scheduler', 'calibrate-captcha'}
 
 
 async def main():
@@ -105,6 +112,8 @@ async def main():
         # 根据配置初始化验证码识别代理
         captcha_mode = cli_agent.config.get('captcha_mode', 'manual')
         captcha_solver = CaptchaSolverAgent(mode=captcha_mode)
+        if args.command in CAPTCHA_COMMANDS:
+            captcha_solver.warm_up()
         
         # 创建数据管理代理
         data_manager = DataManagerAgent()
@@ -152,7 +161,7 @@ async def main():
                 # 获取验证码
                 captcha_image = await browser_agent.get_captcha_image()
                 if captcha_image:
-                    captcha_code = captcha_solver.solve_captcha(
+                    captcha_code = await captcha_solver.solve_captcha_async(
                         captcha_image, manual_fallback=False
                     )
                     
@@ -201,6 +210,10 @@ async def main():
     finally:
         # 清理资源
         cli_agent.close()
+        
+        # 输出启动耗时分析
+        if os.getenv('STARTUP_PROFILE', 'false').lower() == 'true':
+            startup_profile.display()
 
 
 if __name__ == "__main__":
@@ -67,7 +67,10 @@ def main():
     
     # 启动应用
     try:
-        from app import socketio, app
+        from app import socketio, app, get_ocr_pool
+        
+        # 启动服务前创建验证码识别进程池（CAPTCHA_OCR_WORKERS>0 时）
+        get_ocr_pool()
         
         # 从环境变量读取完整配置
         debug = os.getenv('WEB_DEBUG', 'false').lower() in ('true', '1', 'yes')
@@ -0,0 +1,140 @@
+"""
+测试公共夹具
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# 添加项目根目录和ddddocr所在目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'vision_model'))
+
+TINY_CHARSET = [""] + list("0123456789abcdefghijklmnopqrstuvwxyz")
+TINY_STRIDE = 8
+
+
+def build_tiny_ocr_model(path: str, num_classes: int = len(TINY_CHARSET), seed: int = 0,
+                         kernel_width: int = TINY_STRIDE, batch_first: bool = False,
+                         named_output_dims: bool = True) -> None:
+    """
+    构建一个微型CTC风格OCR模型：输入 (N, 1, 64, W)，输出 (W // 8, N, num_classes)；
+    batch_first 为True时输出 (N, W // 8, num_classes)，named_output_dims 为False时输出元数据不含维度名称
+
+    默认卷积核宽度等于步长，各时间步只依赖各自的8列像素，便于验证批量与填充逻辑；
+    kernel_width 大于步长时卷积核居中（左右补零），感受野跨越相邻列，
+    与真实模型一样，靠近右边缘的时间步会受分桶填充列影响。
+    """
+    import onnx
+    from onnx import helper, TensorProto, numpy_helper
+
+    rng = np.random.default_rng(seed)
+    weight = rng.standard_normal((num_classes, 1, 64, kernel_width)).astype(np.float32)
+    bias = rng.standard_normal(num_classes).astype(np.float32)
+
+    nodes = [
+        helper.make_node('Conv', ['input1', 'W', 'B'], ['conv'],
+                         kernel_shape=[64, kernel_width], strides=[64, TINY_STRIDE],
+                         pads=[0, (kernel_width - TINY_STRIDE) // 2, 0, (kernel_width - TINY_STRIDE) // 2]),
+        helper.make_node('Squeeze', ['conv', 'axes'], ['squeezed']),
+        helper.make_node('Transpose', ['squeezed'], ['output'], perm=[0, 2, 1] if batch_first else [2, 0, 1]),
+    ]
+    output_dims = ['batch', 'steps'] if batch_first else ['steps', 'batch']
+    if not named_output_dims:
+        output_dims = [None, None]
+    graph = helper.make_graph(
+        nodes, 'tiny_ocr',
+        [helper.make_tensor_value_info('input1', TensorProto.FLOAT, ['batch', 1, 64, 'width'])],
+        [helper.make_tensor_value_info('output', TensorProto.FLOAT, output_dims + [num_classes])],
+        initializer=[
+            numpy_helper.from_array(weight, 'W'),
+            numpy_helper.from_array(bias, 'B'),
+            numpy_helper.from_array(np.array([2], dtype=np.int64), 'axes'),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+def build_tiny_detection_model(path: str, num_classes: int = 1, seed: int = 0) -> None:
+    """
+    构建一个微型YOLOX风格检测模型：输入 (N, 3, 416, 416)，输出 (N, 3549, 5 + num_classes)
+
+    步长8/16/32的三个输出层各由一个卷积核等于步长的卷积得到，经过Sigmoid后展平拼接，
+    输出格式与 DetectionEngine 的后处理约定一致（未解码的网格偏移、宽高对数、目标与类别得分）。
+    """
+    import onnx
+    from onnx import helper, TensorProto, numpy_helper
+
+    rng = np.random.default_rng(seed)
+    channels = 5 + num_classes
+    nodes, initializer, heads = [], [], []
+    for stride in (8, 16, 32):
+        weight = (rng.standard_normal((channels, 3, stride, stride)) / (stride * 40.0)).astype(np.float32)
+        bias = rng.standard_normal(channels).astype(np.float32)
+        initializer += [numpy_helper.from_array(weight, f'W{stride}'), numpy_helper.from_array(bias, f'B{stride}')]
+        nodes += [
+            helper.make_node('Conv', ['images', f'W{stride}', f'B{stride}'], [f'conv{stride}'],
+                             kernel_shape=[stride, stride], strides=[stride, stride]),
+            helper.make_node('Sigmoid', [f'conv{stride}'], [f'act{stride}']),
+            helper.make_node('Reshape', [f'act{stride}', 'head_shape'], [f'head{stride}']),
+        ]
+        heads.append(f'head{stride}')
+    initializer.append(numpy_helper.from_array(np.array([0, channels, -1], dtype=np.int64), 'head_shape'))
+    nodes += [
+        helper.make_node('Concat', heads, ['heads'], axis=2),
+        helper.make_node('Transpose', ['heads'], ['output'], perm=[0, 2, 1]),
+    ]
+    graph = helper.make_graph(
+        nodes, 'tiny_det',
+        [helper.make_tensor_value_info('images', TensorProto.FLOAT, ['batch', 3, 416, 416])],
+        [helper.make_tensor_value_info('output', TensorProto.FLOAT, ['batch', 3549, channels])],
+        initializer=initializer,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+@pytest.fixture
+def tiny_detection_engine(tmp_path, monkeypatch):
+    """基于微型检测模型的检测引擎（内置检测模型文件不随仓库分发）"""
+    from ddddocr import DetectionEngine
+    from ddddocr.models.model_loader import ModelLoader
+
+    model_path = str(tmp_path / 'tiny_det.onnx')
+    build_tiny_detection_model(model_path)
+    monkeypatch.setattr(ModelLoader, 'load_detection_model', lambda self: self.load_model(model_path))
+    return DetectionEngine()
+
+
+@pytest.fixture
+def tiny_ocr_files(tmp_path):
+    """生成微型模型与字符集文件，返回 (模型路径, 字符集路径)"""
+    model_path = str(tmp_path / 'tiny.onnx')
+    charsets_path = str(tmp_path / 'charsets.json')
+    build_tiny_ocr_model(model_path)
+    with open(charsets_path, 'w', encoding='utf-8') as f:
+        json.dump({'charset': TINY_CHARSET, 'word': False, 'image': [-1, 64], 'channel': 1}, f)
+    return model_path, charsets_path
+
+
+@pytest.fixture
+def tiny_ocr_engine(tiny_ocr_files):
+    """基于微型模型的OCR引擎"""
+    from ddddocr import OCREngine
+
+    model_path, charsets_path = tiny_ocr_files
+    return OCREngine(import_onnx_path=model_path, charsets_path=charsets_path)
+
+
+def random_captcha(width: int, height: int = 32, seed: int = 0):
+    """生成随机灰度验证码图像"""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (height, width), dtype=np.uint8), 'L')
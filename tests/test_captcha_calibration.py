@@ -0,0 +1,51 @@
+"""
+验证码置信度校准测试
+"""
+
+import pytest
+
+from utils.captcha_calibration import build_calibration_report, label_from_filename, load_labelled_corpus
+
+
+class TestCaptchaCalibration:
+
+    def test_label_from_filename(self):
+        """文件名第一个下划线之前为标注文本"""
+        assert label_from_filename("a7kd_0001.png") == "a7kd"
+        assert label_from_filename("/tmp/3fx9.jpg") == "3fx9"
+
+    def test_load_labelled_corpus(self, tmp_path):
+        """只加载图片文件"""
+        (tmp_path / "ab12_1.png").write_bytes(b"png")
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        assert load_labelled_corpus(str(tmp_path)) == [("ab12", b"png")]
+
+    def test_corpus_loader_shared_with_benchmark(self):
+        """校准与ddddocr基准测试使用同一个样本加载实现"""
+        from ddddocr.utils.benchmark import load_corpus
+
+        assert load_labelled_corpus is load_corpus
+
+    def test_report(self):
+        """各阈值的提交率、提交正确率与误拦截数"""
+        predictions = [
+            ("ab12", "ab12", 0.95),
+            ("cd34", "cd34", 0.40),
+            ("ef56", "ef58", 0.30),
+            ("GH78", "gh78", 0.85),
+        ]
+
+        report = build_calibration_report(predictions, thresholds=[0.5])
+
+        assert report['samples'] == 4
+        assert report['accuracy'] == pytest.approx(0.75)
+        row = report['thresholds'][0]
+        assert row['submitted'] == 2
+        assert row['submit_accuracy'] == pytest.approx(1.0)
+        assert row['rejected_correct'] == 1
+        assert sum(item['count'] for item in report['bins']) == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,164 @@
+"""
+验证码样本库测试
+"""
+
+import io
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from agents.captcha_solver_agent import CaptchaSolverAgent
+from utils.captcha_calibration import load_labelled_corpus
+from utils.captcha_harvester import CaptchaHarvester, detect_image_extension
+
+
+def make_png(color: int, width: int = 100) -> bytes:
+    """生成纯色PNG图片"""
+    buffer = io.BytesIO()
+    Image.new('L', (width, 40), color=color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestCaptchaHarvester:
+
+    def test_dedup_and_verdict(self, tmp_path):
+        """相同图片只保存一份，判定结果按样本记录"""
+        harvester = CaptchaHarvester(str(tmp_path))
+        image = make_png(255)
+
+        first = harvester.record(image, {"code": "ab12", "confidence": 0.9}, submitted="ab12", source="login")
+        second = harvester.record(image, {"code": "ab13", "confidence": 0.4}, submitted="ab13", source="select")
+        harvester.report_verdict(first, accepted=True)
+        harvester.report_verdict(second, accepted=False)
+
+        stats = harvester.stats()
+        assert stats['images'] == 1
+        assert stats['samples'] == 2
+        assert stats['accepted'] == 1
+        assert stats['rejected'] == 1
+        assert detect_image_extension(image) == 'png'
+        harvester.close()
+
+    def test_size_cap_evicts_unlabelled_first(self, tmp_path):
+        """超出容量时优先淘汰未判定的图片"""
+        labelled, unlabelled, newest = make_png(0), make_png(128), make_png(255)
+        harvester = CaptchaHarvester(str(tmp_path), max_bytes=len(labelled) + len(newest))
+
+        sample_id = harvester.record(labelled, {"code": "ab12"}, submitted="ab12")
+        harvester.report_verdict(sample_id, accepted=True)
+        harvester.record(unlabelled, {"code": "cd34"}, submitted="cd34")
+        harvester.record(newest, {"code": "ef56"}, submitted="ef56")
+
+        stats = harvester.stats()
+        assert stats['images'] == 2
+        assert stats['accepted'] == 1
+        assert stats['bytes'] <= harvester.max_bytes
+        harvester.close()
+
+    def test_export_skips_unsafe_codes(self, tmp_path):
+        """含下划线、路径分隔符或不符合验证码格式的手动输入不导出，也不会写到导出目录之外"""
+        from utils.captcha_profile import load_profile
+
+        harvester = CaptchaHarvester(str(tmp_path / 'store'))
+        for color, code in [(0, "ab12c"), (40, "a_b12"), (80, "../x1"), (120, "ab/12"), (160, "ABCDEFG")]:
+            sample_id = harvester.record(make_png(color), {"code": code}, submitted=code)
+            harvester.report_verdict(sample_id, accepted=True)
+
+        export_dir = str(tmp_path / 'corpus')
+        assert harvester.export_labelled(export_dir, profile=load_profile('ybu')) == 1
+        assert [label for label, _ in load_labelled_corpus(export_dir)] == ["ab12c"]
+        assert sorted(os.listdir(tmp_path)) == ['corpus', 'store']
+        assert harvester.export_labelled(str(tmp_path / 'all')) == 2
+        harvester.close()
+
+    def test_export_labelled_corpus(self, tmp_path):
+        """导出的样本可直接作为校准样本目录"""
+        harvester = CaptchaHarvester(str(tmp_path / 'store'))
+        accepted = harvester.record(make_png(0), {"code": "ab12"}, submitted="ab12")
+        rejected = harvester.record(make_png(255), {"code": "cd34"}, submitted="cd34")
+        harvester.report_verdict(accepted, accepted=True)
+        harvester.report_verdict(rejected, accepted=False)
+
+        export_dir = str(tmp_path / 'corpus')
+        assert harvester.export_labelled(export_dir) == 1
+        assert [label for label, _ in load_labelled_corpus(export_dir)] == ["ab12"]
+        harvester.close()
+
+    def test_solver_records_and_reports(self, tmp_path):
+        """识别代理记录提交的验证码并回填服务器判定"""
+        class FakeModel:
+            def classification(self, image, confidence=False):
+                return {"text": "ab12", "char_probabilities": [0.99, 0.99, 0.99, 0.99]}
+
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old",
+                                   harvest_dir=str(tmp_path))
+        agent.model = FakeModel()
+
+        assert agent.solve_captcha(make_png(255), manual_fallback=False, source="select") == "ab12"
+        assert agent.last_sample_id is not None
+        agent.report_result(False)
+
+        stats = agent.harvester.stats()
+        assert stats['samples'] == 1
+        assert stats['rejected'] == 1
+        agent.close()
+
+
+    def test_solver_reports_failure_messages(self, tmp_path):
+        """失败提示提到验证码时记为被拒，其他失败原因说明验证码已通过，没有提示时不回填判定"""
+        class FakeModel:
+            def classification(self, image, confidence=False):
+                return {"text": "ab12", "char_probabilities": [0.99, 0.99, 0.99, 0.99]}
+
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old",
+                                   harvest_dir=str(tmp_path))
+        agent.model = FakeModel()
+
+        for color, message in [(255, "验证码错误!!"), (128, None), (0, "该课程已满")]:
+            agent.solve_captcha(make_png(color), manual_fallback=False, source="login")
+            agent.report_failure(message)
+
+        stats = agent.harvester.stats()
+        assert stats['samples'] == 3
+        assert stats['rejected'] == 1
+        assert stats['accepted'] == 1
+        agent.close()
+
+    def test_page_failure_verdict_ignores_form_text(self, tmp_path):
+        """选课失败页面只按提取出的错误提示回填判定，表单中的"验证码"字样不算被拒"""
+        import asyncio
+        from agents.browser_agent import BrowserAgent
+
+        class FakePage:
+            def __init__(self, text):
+                self.text = text
+
+            async def inner_text(self, selector):
+                return self.text
+
+        class FakeModel:
+            def classification(self, image, confidence=False):
+                return {"text": "ab12", "char_probabilities": [0.99, 0.99, 0.99, 0.99]}
+
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old",
+                                   harvest_dir=str(tmp_path))
+        agent.model = FakeModel()
+        browser = BrowserAgent(headless=True, captcha_solver=agent)
+
+        for color, text in [(255, "课程列表\n请输入验证码\n选课失败：该课程已满"), (0, "课程列表\n请输入验证码")]:
+            agent.solve_captcha(make_png(color), manual_fallback=False, source="select")
+            message = asyncio.run(browser._page_error_message(FakePage(text)))
+            agent.report_failure(message)
+
+        stats = agent.harvester.stats()
+        assert stats['accepted'] == 1
+        assert stats['rejected'] == 0
+        agent.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,98 @@
+"""
+验证码格式测试
+"""
+
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from agents.captcha_solver_agent import CaptchaSolverAgent
+from utils.captcha_profile import CaptchaProfile, load_profile, parse_expected_length
+
+
+def white_captcha() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (100, 40), color='white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestCaptchaProfile:
+
+    def test_parse_expected_length(self):
+        assert parse_expected_length("4-5") == (4, 5)
+        assert parse_expected_length(5) == (5, 5)
+        assert parse_expected_length([4, 6]) == (4, 6)
+        assert parse_expected_length("") is None
+
+    def test_builtin_profile(self):
+        profile = load_profile("ybu")
+
+        assert profile.length == (5, 5)
+        assert profile.normalize(" 3V3tH ") == "3v3th"
+        assert profile.matches("3v3th")
+        assert "长度" in profile.violation("3v3t")
+        assert "字符集外" in profile.violation("3v3t!")
+
+    def test_decode_charset_covers_both_cases(self):
+        profile = CaptchaProfile("lower", charset="ab1", case="lower")
+
+        assert set(profile.decode_charset) == set("ab1AB")
+        assert CaptchaProfile("exact", charset="ab1").decode_charset == "ab1"
+
+    def test_load_from_json(self, tmp_path):
+        path = tmp_path / "school.json"
+        path.write_text(json.dumps({"charset": "0123456789", "length": "4-5", "pattern": r"\d{4,5}"}),
+                        encoding="utf-8")
+
+        profile = load_profile(str(path))
+
+        assert profile.name == "school"
+        assert profile.matches("1234")
+        assert not profile.matches("123")
+        assert CaptchaProfile.from_dict(profile.to_dict()).length == (4, 5)
+
+    def test_invalid_profile(self):
+        with pytest.raises(ValueError):
+            load_profile("no-such-profile")
+        with pytest.raises(ValueError):
+            CaptchaProfile("bad", case="title")
+
+
+class TestSolverWithProfile:
+
+    def test_decoding_constrained_to_profile(self):
+        """识别时传入格式字符集与长度，结果按大小写规则规范化"""
+        calls = []
+
+        class FakeModel:
+            def classification(self, image, confidence=False, charset_range=None, expected_length=None):
+                calls.append((charset_range, expected_length))
+                return {"text": "3V3TH", "char_probabilities": [0.9] * 5}
+
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old", profile="ybu")
+        agent.model = FakeModel()
+
+        assert agent.solve_captcha(white_captcha(), manual_fallback=False) == "3v3th"
+        charset_range, expected_length = calls[0]
+        assert set(charset_range) >= set("0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        assert expected_length == (5, 5)
+
+    def test_invalid_prediction_not_submitted(self):
+        """不符合格式的高置信度结果也不提交"""
+        class FakeModel:
+            def classification(self, image, confidence=False, charset_range=None, expected_length=None):
+                return {"text": "3v3t_", "char_probabilities": [0.99] * 5}
+
+        profile = CaptchaProfile("strict", length=5, pattern="[0-9a-z]{5}")
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old", profile=profile)
+        agent.model = FakeModel()
+
+        result = agent.recognize_text(white_captcha())
+        assert result["confidence"] == 0.0
+        assert agent.solve_captcha(white_captcha(), manual_fallback=False) == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -8,11 +8,14 @@ from PIL import Image
 import io
 import sys
 import os
+import subprocess
+import asyncio
+import time
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from agents.captcha_solver_agent import CaptchaSolverAgent
+from agents.captcha_solver_agent import CaptchaSolverAgent, DEFAULT_VARIANTS, parse_variants
 
 
 class TestCaptchaSolverAgent:
@@ -49,6 +52,39 @@ class TestCaptchaSolverAgent:
         except Exception as e:
             pytest.fail(f"处理后的图片数据无效: {e}")
     
+    def test_preprocess_array_matches_pil(self):
+        """数组预处理与PIL流程（移除红线+灰度+对比度增强）逐像素一致"""
+        from PIL import ImageEnhance
+        
+        rng = np.random.default_rng(0)
+        rgb = rng.integers(0, 256, (40, 100, 3), dtype=np.uint8)
+        rgb[:, 10:12] = [239, 0, 9]
+        
+        expected_rgb = rgb.copy()
+        red_mask = np.all(np.abs(expected_rgb.astype(int) - [239, 0, 9]) <= 20, axis=2)
+        expected_rgb[red_mask] = [255, 255, 255]
+        gray = Image.fromarray(expected_rgb, 'RGB').convert('L')
+        expected = np.asarray(ImageEnhance.Contrast(gray).enhance(2.0))
+        
+        processed = self.agent.preprocess_array(rgb)
+        
+        assert processed.dtype == np.uint8
+        assert np.array_equal(processed, expected)
+        assert np.all(rgb[:, 10:12] == [239, 0, 9])
+    
+    def test_solve_captcha_without_debug_writes_no_files(self, tmp_path, monkeypatch):
+        """非调试模式下不写入临时验证码图片"""
+        monkeypatch.chdir(tmp_path)
+        agent = CaptchaSolverAgent(mode="manual", debug=False)
+        
+        test_image = Image.new('RGB', (100, 40), color='white')
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='PNG')
+        
+        agent.solve_captcha(img_bytes.getvalue(), manual_fallback=False)
+        
+        assert list(tmp_path.iterdir()) == []
+    
     def test_recognize_text_without_ai(self):
         """测试在手动模式下的文本识别"""
         # 创建手动模式的代理
@@ -80,6 +116,229 @@ class TestCaptchaSolverAgent:
         # 应该返回空字符串或自动识别结果
         assert isinstance(result, str)
 
+    def test_score_prediction(self):
+        """置信度取最低单字符概率，长度不符时为0"""
+        agent = CaptchaSolverAgent(mode="manual", expected_length="4-5")
+        
+        assert agent.score_prediction("ab12", [0.9, 0.7, 0.95, 0.8]) == pytest.approx(0.7)
+        assert agent.score_prediction("ab1", [0.9, 0.9, 0.9]) == 0.0
+        assert agent.score_prediction("", []) == 0.0
+    
+    def test_low_confidence_not_submitted(self):
+        """置信度低于阈值时不返回自动识别结果"""
+        class FakeModel:
+            def __init__(self, probability):
+                self.probability = probability
+            
+            def classification(self, image, confidence=False):
+                return {"text": "ab12", "char_probabilities": [0.99, self.probability, 0.99, 0.99]}
+        
+        test_image = Image.new('RGB', (100, 40), color='white')
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='PNG')
+        
+        agent = CaptchaSolverAgent(mode="ai", debug=False, confidence_threshold=0.6, expected_length=4)
+        agent.model = FakeModel(0.3)
+        assert agent.recognize_text(img_bytes.getvalue())["confidence"] == pytest.approx(0.3)
+        assert agent.solve_captcha(img_bytes.getvalue(), manual_fallback=False) == ""
+        
+        agent.model = FakeModel(0.9)
+        assert agent.solve_captcha(img_bytes.getvalue(), manual_fallback=False) == "ab12"
+    
+    def test_parse_variants(self):
+        """解析识别变体配置"""
+        from agents.captcha_solver_agent import parse_variants
+        
+        assert parse_variants("processed:old, original:beta,processed") == [
+            ("processed", "old"), ("original", "beta")
+        ]
+        with pytest.raises(ValueError):
+            parse_variants("sharpened:old")
+    
+    def test_vote_weighted_by_confidence(self):
+        """多个变体一致时累计置信度胜过单个高置信度结果"""
+        results = [
+            {"code": "ab12", "confidence": 0.6},
+            {"code": "ab12", "confidence": 0.5},
+            {"code": "ab13", "confidence": 0.8},
+        ]
+        
+        best = CaptchaSolverAgent.vote(results)
+        
+        assert best["code"] == "ab12"
+        assert best["confidence"] == pytest.approx(0.6)
+        assert best["agreement"] == pytest.approx(2 / 3)
+        assert CaptchaSolverAgent.vote([{"code": "", "confidence": 0.0}]) is None
+    
+    def test_variants_use_beta_model(self):
+        """beta变体使用beta模型识别并参与投票"""
+        class FakeModel:
+            def __init__(self, text, probability):
+                self.text = text
+                self.probability = probability
+            
+            def classification(self, image, confidence=False):
+                return {"text": self.text, "char_probabilities": [self.probability] * len(self.text)}
+        
+        test_image = Image.new('RGB', (100, 40), color='white')
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='PNG')
+        
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old,processed:beta",
+                                   early_exit_confidence=1.1)
+        agent.model = FakeModel("ab12", 0.4)
+        agent._beta_model = FakeModel("xy34", 0.7)
+        
+        result = agent.recognize_text(img_bytes.getvalue())
+        agent.close()
+        
+        assert result["code"] == "xy34"
+        assert result["variant"] == "processed:beta"
+        assert set(result["votes"]) == {"ab12", "xy34"}
+    
+    def test_variants_start_together(self):
+        """多个变体同时开始：达到提前采用置信度的变体不等待其余变体，低置信度时总耗时不叠加"""
+        class SlowModel:
+            def __init__(self, delay, probability):
+                self.delay = delay
+                self.probability = probability
+            
+            def classification(self, image, confidence=False):
+                time.sleep(self.delay)
+                return {"text": "ab12", "char_probabilities": [self.probability] * 4}
+        
+        test_image = Image.new('RGB', (100, 40), color='white')
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='PNG')
+        
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old,processed:beta",
+                                   early_exit_confidence=0.9, cache_size=0)
+        agent.variant_workers = 2
+        agent.model = SlowModel(0.4, 0.6)
+        agent._beta_model = SlowModel(0.05, 0.95)
+        
+        start = time.perf_counter()
+        result = agent.recognize_text(img_bytes.getvalue())
+        assert time.perf_counter() - start < 0.3
+        assert result["variant"] == "processed:beta"
+        
+        agent._beta_model = SlowModel(0.4, 0.6)
+        # 等待上一次未采用的变体在后台结束，释放线程池
+        time.sleep(0.4)
+        start = time.perf_counter()
+        result = agent.recognize_text(img_bytes.getvalue())
+        assert time.perf_counter() - start < 0.7
+        assert set(result["votes"]) == {"ab12"}
+        assert result["agreement"] == 1.0
+        agent.close()
+        
+        assert parse_variants(DEFAULT_VARIANTS) == [("processed", "old")]
+    
+    def test_solve_captcha_async_does_not_block_loop(self):
+        """异步识别在线程池中执行，事件循环保持响应并分别记录排队与识别耗时"""
+        class SlowModel:
+            def classification(self, image, confidence=False):
+                time.sleep(0.2)
+                return {"text": "ab12", "char_probabilities": [0.99] * 4}
+        
+        test_image = Image.new('RGB', (100, 40), color='white')
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='PNG')
+        
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old")
+        agent.model = SlowModel()
+        
+        async def run():
+            ticks = 0
+            
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            
+            ticker_task = asyncio.create_task(ticker())
+            code = await agent.solve_captcha_async(img_bytes.getvalue(), manual_fallback=False)
+            ticker_task.cancel()
+            return code, ticks
+        
+        code, ticks = asyncio.run(run())
+        agent.close()
+        
+        assert code == "ab12"
+        assert ticks >= 5
+        assert agent.last_timing["solve_time"] >= 0.2
+        assert agent.last_timing["queue_wait"] < agent.last_timing["solve_time"]
+    
+    def test_solve_captcha_async_timeout(self):
+        """自动识别超时返回空字符串"""
+        class SlowModel:
+            def classification(self, image, confidence=False):
+                time.sleep(0.3)
+                return {"text": "ab12", "char_probabilities": [0.99] * 4}
+        
+        test_image = Image.new('RGB', (100, 40), color='white')
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='PNG')
+        
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old", solve_timeout=0.05)
+        agent.model = SlowModel()
+        
+        async def run():
+            result = await agent.recognize_text_async(img_bytes.getvalue())
+            code = await agent.solve_captcha_async(img_bytes.getvalue(), manual_fallback=False)
+            return result, code
+        
+        result, code = asyncio.run(run())
+        agent.close()
+        
+        assert result["timed_out"] is True
+        assert code == ""
+    
+    def test_solve_executor_shared_across_agents(self):
+        """异步识别线程池在进程内共享，关闭一个识别代理不影响其他代理"""
+        first = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old", solve_workers=2)
+        second = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old", solve_workers=2)
+        
+        assert first._get_solve_executor() is second._get_solve_executor()
+        assert first._get_variant_executor() is second._get_variant_executor()
+        first.close()
+        assert second._get_solve_executor().submit(lambda: "ok").result(timeout=5) == "ok"
+    
+    def test_ai_mode_loads_model_lazily(self):
+        """AI模式初始化时不加载模型"""
+        agent_ai = CaptchaSolverAgent(mode="ai")
+        
+        assert agent_ai.mode == "ai"
+        assert agent_ai._model is None
+    
+    def test_warm_up_shapes_from_env(self, tiny_ocr_files, monkeypatch):
+        """CAPTCHA_WARMUP_SHAPES 按 宽x高 解析后预热每个尺寸"""
+        from ddddocr import DdddOcr
+        
+        model_path, charsets_path = tiny_ocr_files
+        monkeypatch.setenv('CAPTCHA_WARMUP_SHAPES', '100x40,120x40')
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old")
+        monkeypatch.setattr(agent, '_create_model', lambda ddddocr, beta=False: DdddOcr(
+            show_ad=False, import_onnx_path=model_path, charsets_path=charsets_path))
+        agent.warm_up(background=False)
+        
+        stats = agent.model.get_warmup_stats()
+        assert stats['status'] == 'warm'
+        assert list(stats['shapes']) == ['100x40', '120x40']
+    
+    def test_import_does_not_load_captcha_stack(self):
+        """导入代理模块时不导入ddddocr、onnxruntime和OpenCV"""
+        code = (
+            "import sys; import agents.captcha_solver_agent; "
+            "print(','.join(m for m in ('ddddocr', 'onnxruntime', 'cv2') if m in sys.modules))"
+        )
+        project_root = os.path.join(os.path.dirname(__file__), '..')
+        output = subprocess.run([sys.executable, "-c", code], cwd=project_root,
+                                capture_output=True, text=True, check=True).stdout
+        
+        assert output.strip() == ""
+
 
 if __name__ == "__main__":
     pytest.main([__file__]) 
\ No newline at end of file
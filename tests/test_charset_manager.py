@@ -0,0 +1,53 @@
+"""
+字符集管理器测试
+"""
+
+import pytest
+
+from ddddocr import CharsetManager
+
+
+class TestCharsetManager:
+
+    def test_char_to_index_first_occurrence(self):
+        """重复字符以首次出现位置为准"""
+        manager = CharsetManager(["", "a", "b", "a"])
+
+        assert manager.char_to_index("a") == 1
+        assert manager.char_to_index("z") == -1
+        assert manager.is_valid_char("b")
+
+    def test_ranges_build_mask(self):
+        """设置范围后生成有效索引掩码，清除后取消限制"""
+        manager = CharsetManager(["", "a", "b", "c"])
+
+        assert manager.get_valid_index_mask() is None
+
+        manager.set_ranges("ab")
+        assert manager.get_valid_index_mask().tolist() == [True, True, True, False]
+
+        manager.clear_ranges()
+        assert manager.get_valid_index_mask() is None
+
+    def test_range_mask_cached(self):
+        """相同范围参数复用同一掩码，且不修改默认范围"""
+        manager = CharsetManager(["", "a", "b", "c"])
+
+        mask = manager.get_range_mask("ca")
+
+        assert mask.tolist() == [True, True, False, True]
+        assert manager.get_range_mask("ca") is mask
+        assert manager.get_range_mask(["c", "a"]).tolist() == mask.tolist()
+        assert manager.get_valid_index_mask() is None
+
+    def test_replacing_charset_rebuilds_index(self):
+        """替换字符集后索引表同步更新"""
+        manager = CharsetManager(["", "a"])
+        manager.charset = ["", "x", "a"]
+
+        assert manager.char_to_index("a") == 2
+        assert manager.get_valid_indices() == [0, 1, 2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
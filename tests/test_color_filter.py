@@ -0,0 +1,146 @@
+"""
+颜色过滤测试
+"""
+
+import threading
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from ddddocr import ColorFilter
+from ddddocr.preprocessing.color_filter import compile_hsv_luts
+
+
+def legacy_filter(hsv_ranges, image: Image.Image) -> np.ndarray:
+    """优化前的实现（逐范围 inRange 后合并掩码），作为对照"""
+    img_array = cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    hsv = cv2.cvtColor(img_array, cv2.COLOR_BGR2HSV)
+    mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+    for lower, upper in hsv_ranges:
+        mask = cv2.bitwise_or(mask, cv2.inRange(hsv, np.array(lower), np.array(upper)))
+    result = cv2.bitwise_and(img_array, img_array, mask=mask)
+    result[mask == 0] = [255, 255, 255]
+    return cv2.cvtColor(result, cv2.COLOR_BGR2RGB)
+
+
+def random_image(width: int = 120, height: int = 40, seed: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+def random_ranges(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    ranges = []
+    for _ in range(count):
+        lower = rng.integers(0, 120, 3)
+        upper = lower + rng.integers(0, 136, 3)
+        ranges.append((tuple(int(v) for v in lower), (min(int(upper[0]), 180), int(upper[1]), int(upper[2]))))
+    return ranges
+
+
+class TestColorFilterLUT:
+
+    @pytest.mark.parametrize("colors", [['red'], ['black', 'blue'], ColorFilter.get_available_colors()])
+    def test_presets_match_legacy(self, colors):
+        color_filter = ColorFilter(colors=colors)
+        image = random_image(seed=len(colors))
+
+        expected = legacy_filter(color_filter.get_ranges(), image)
+        assert np.array_equal(np.asarray(color_filter.filter_image(image)), expected)
+
+    @pytest.mark.parametrize("count", [1, 9, 40, 70])
+    def test_custom_ranges_match_legacy(self, count):
+        """范围数超过单张查找表位宽时仍与逐范围实现一致"""
+        ranges = random_ranges(count, seed=count)
+        color_filter = ColorFilter(custom_ranges=ranges)
+        image = random_image(seed=count)
+
+        assert np.array_equal(np.asarray(color_filter.filter_image(image)), legacy_filter(ranges, image))
+
+    def test_mask_and_bgr_array_input(self):
+        color_filter = ColorFilter(colors=['green', 'white'])
+        image = random_image(seed=3)
+        bgr = np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+
+        hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+        expected_mask = cv2.bitwise_or(*(cv2.inRange(hsv, np.array(lower), np.array(upper))
+                                         for lower, upper in color_filter.get_ranges()))
+        assert np.array_equal(color_filter.get_mask(bgr), expected_mask)
+        assert np.array_equal(np.asarray(color_filter.filter_image(bgr)),
+                              legacy_filter(color_filter.get_ranges(), image))
+
+    def test_lut_dtype_and_empty_range(self):
+        luts = compile_hsv_luts(random_ranges(70) + [((10, 0, 0), (5, 255, 255))])
+
+        assert [lut.dtype for lut in luts] == [np.uint64, np.uint8]
+        assert not luts[0].flags.writeable
+        # 下界大于上界的范围不命中任何像素
+        assert not (luts[1][:, 0, 0] & (1 << 6)).any()
+
+    def test_mutation_recompiles(self):
+        color_filter = ColorFilter(colors=['red'])
+        image = random_image(seed=5)
+        color_filter.filter_image(image)
+        color_filter.add_preset_color('blue')
+
+        assert np.array_equal(np.asarray(color_filter.filter_image(image)),
+                              legacy_filter(color_filter.get_ranges(), image))
+
+
+class TestCompiledColorFilter:
+
+    def test_cached_by_range_spec(self):
+        first = ColorFilter.compiled(colors=['Red', 'blue'])
+
+        assert ColorFilter.compiled(colors=['red', 'blue']) is first
+        assert ColorFilter.compiled(colors=['blue', 'red']) is not first
+        assert ColorFilter.compiled(custom_ranges=[[[0, 50, 50], [10, 255, 255]]]) is \
+            ColorFilter.compiled(custom_ranges=[((0, 50, 50), (10, 255, 255))])
+
+    def test_shared_filter_is_frozen(self):
+        color_filter = ColorFilter.compiled(colors=['black'])
+
+        with pytest.raises(ValueError):
+            color_filter.add_preset_color('blue')
+        with pytest.raises(ValueError):
+            color_filter.clear_ranges()
+        assert color_filter.get_ranges() == ColorFilter.get_color_range('black')
+
+    def test_thread_safe(self):
+        color_filter = ColorFilter.compiled(colors=['red', 'green'])
+        images = [random_image(seed=seed) for seed in range(8)]
+        expected = [legacy_filter(color_filter.get_ranges(), image) for image in images]
+        mismatches = []
+
+        def worker():
+            for image, reference in zip(images, expected):
+                if not np.array_equal(np.asarray(color_filter.filter_image(image)), reference):
+                    mismatches.append(image)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not mismatches
+
+    def test_ocr_engine_uses_shared_filter(self, tiny_ocr_engine, monkeypatch):
+        created = []
+        original_init = ColorFilter.__init__
+
+        def counting_init(self, *args, **kwargs):
+            created.append(self)
+            original_init(self, *args, **kwargs)
+
+        monkeypatch.setattr(ColorFilter, '__init__', counting_init)
+        image = random_image(seed=1)
+        for _ in range(3):
+            tiny_ocr_engine.predict(image, color_filter_colors=['purple'])
+
+        assert len(created) <= 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
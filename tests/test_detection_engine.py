@@ -0,0 +1,270 @@
+"""
+目标检测引擎测试
+
+内置检测模型不随仓库分发，使用微型YOLOX风格模型（见 conftest.build_tiny_detection_model）验证后处理。
+"""
+
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from ddddocr.core.detection_engine import nms_numpy, nms_opencv
+from ddddocr.utils.benchmark import benchmark_nms, synthetic_boxes
+
+
+def legacy_postprocess(engine, output, ratio, image_shape):
+    """优化前的后处理实现（逐次构建网格、逐列构建边界框、逐框裁剪），作为对照"""
+    grids = []
+    expanded_strides = []
+    for stride in (8, 16, 32):
+        hsize, wsize = 416 // stride, 416 // stride
+        xv, yv = np.meshgrid(np.arange(wsize), np.arange(hsize))
+        grid = np.stack((xv, yv), 2).reshape(1, -1, 2)
+        grids.append(grid)
+        expanded_strides.append(np.full((*grid.shape[:2], 1), stride))
+    grids = np.concatenate(grids, 1)
+    expanded_strides = np.concatenate(expanded_strides, 1)
+    output[..., :2] = (output[..., :2] + grids) * expanded_strides
+    output[..., 2:4] = np.exp(output[..., 2:4]) * expanded_strides
+
+    predictions = output[0]
+    boxes = predictions[:, :4]
+    scores = predictions[:, 4:5] * predictions[:, 5:]
+    boxes_xyxy = np.ones_like(boxes)
+    boxes_xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2.
+    boxes_xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2.
+    boxes_xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2.
+    boxes_xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2.
+    boxes_xyxy /= ratio
+    cls_inds = scores.argmax(1)
+    cls_scores = scores[np.arange(len(cls_inds)), cls_inds]
+    valid = cls_scores > 0.1
+    keep = nms_numpy(boxes_xyxy[valid], cls_scores[valid], 0.45)
+    pred = boxes_xyxy[valid][keep]
+    result = []
+    for b in pred.tolist():
+        x_min = 0 if b[0] < 0 else int(b[0])
+        y_min = 0 if b[1] < 0 else int(b[1])
+        x_max = int(image_shape[1]) if b[2] > image_shape[1] else int(b[2])
+        y_max = int(image_shape[0]) if b[3] > image_shape[0] else int(b[3])
+        result.append([x_min, y_min, x_max, y_max])
+    return result
+
+
+def legacy_preproc(img, input_size):
+    """优化前的letterbox预处理（每次新建填充数组）"""
+    padded_img = np.ones((input_size[0], input_size[1], 3), dtype=np.uint8) * 114
+    r = min(input_size[0] / img.shape[0], input_size[1] / img.shape[1])
+    resized_img = cv2.resize(img, (int(img.shape[1] * r), int(img.shape[0] * r)),
+                             interpolation=cv2.INTER_LINEAR).astype(np.uint8)
+    padded_img[: int(img.shape[0] * r), : int(img.shape[1] * r)] = resized_img
+    return np.ascontiguousarray(padded_img.transpose((2, 0, 1)), dtype=np.float32), r
+
+
+def png_bytes(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def random_image(width: int, height: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def raw_output(engine, img: np.ndarray):
+    im, ratio = engine.preproc(img, engine.INPUT_SIZE)
+    output = engine.session.run(None, {engine.session.get_inputs()[0].name: im[None]})[0]
+    return output, ratio
+
+
+class TestDetectionPostprocess:
+
+    def test_anchor_grids_cached(self, tiny_detection_engine):
+        grid, stride = tiny_detection_engine.anchor_grids((416, 416))
+
+        assert grid.shape == (3549, 2)
+        assert stride.shape == (3549, 1)
+        assert tiny_detection_engine.anchor_grids((416, 416))[0] is grid
+        assert not grid.flags.writeable
+
+    @pytest.mark.parametrize("size", [(120, 40), (300, 160), (416, 416), (640, 200)])
+    def test_matches_legacy_implementation(self, tiny_detection_engine, size):
+        """向量化后处理的边界框与优化前的实现完全一致"""
+        img = random_image(*size, seed=size[0])
+        output, ratio = raw_output(tiny_detection_engine, img)
+
+        expected = legacy_postprocess(tiny_detection_engine, output.copy(), ratio, img.shape)
+        result = tiny_detection_engine.postprocess(output, ratio, img.shape)
+
+        assert expected
+        assert result == expected
+
+    def test_predict_bytes(self, tiny_detection_engine):
+        img = random_image(200, 80, seed=3)
+        buffer = io.BytesIO()
+        Image.fromarray(img[:, :, ::-1]).save(buffer, format='PNG')
+
+        boxes = tiny_detection_engine.predict(buffer.getvalue())
+        output, ratio = raw_output(tiny_detection_engine, img)
+        assert boxes == legacy_postprocess(tiny_detection_engine, output, ratio, img.shape)
+        for x1, y1, x2, y2 in boxes:
+            assert 0 <= x1 and 0 <= y1 and x2 <= 200 and y2 <= 80
+
+
+
+class TestDetectionInput:
+
+    @pytest.mark.parametrize("size", [(120, 40), (416, 416), (640, 200)])
+    def test_preproc_matches_legacy(self, tiny_detection_engine, size):
+        bgr = random_image(*size, seed=1)
+        expected, expected_ratio = legacy_preproc(bgr, (416, 416))
+
+        result, ratio = tiny_detection_engine.preproc(bgr, (416, 416))
+        assert ratio == expected_ratio
+        assert np.array_equal(result, expected)
+
+        # RGB输入在写入时交换通道；复用的缓冲区中残留的旧数据被完全覆盖
+        out = np.full((3, 416, 416), -1, dtype=np.float32)
+        result, _ = tiny_detection_engine.preproc(np.ascontiguousarray(bgr[:, :, ::-1]), (416, 416),
+                                                  rgb=True, out=out)
+        assert result is out
+        assert np.array_equal(result, expected)
+
+    @pytest.mark.parametrize("mode", ["RGB", "RGBA", "L", "P"])
+    def test_pil_and_array_inputs_match_bytes(self, tiny_detection_engine, mode):
+        """PIL图像与数组直接检测的结果与先编码为PNG再检测一致"""
+        rgb = random_image(180, 70, seed=7)
+        image = Image.fromarray(rgb).convert(mode)
+        expected = tiny_detection_engine.predict(png_bytes(image))
+
+        assert expected
+        assert tiny_detection_engine.predict(image) == expected
+        if mode != "P":
+            assert tiny_detection_engine.predict(np.asarray(image)) == expected
+
+    def test_input_buffer_reused(self, tiny_detection_engine):
+        image = Image.fromarray(random_image(100, 40, seed=2))
+        tiny_detection_engine.predict(image)
+        buffer = tiny_detection_engine._get_input_buffer((416, 416))['input']
+        tiny_detection_engine.predict(random_image(300, 100, seed=3))
+
+        assert tiny_detection_engine._get_input_buffer((416, 416))['input'] is buffer
+
+    def test_invalid_bytes(self, tiny_detection_engine):
+        from ddddocr.utils.exceptions import ImageProcessError
+
+        with pytest.raises(ImageProcessError):
+            tiny_detection_engine.predict(b"not an image")
+
+
+
+class CountingSession:
+    """记录推理调用次数的会话代理"""
+
+    def __init__(self, session):
+        self.session = session
+        self.batch_sizes = []
+
+    def run(self, output_names, inputs):
+        self.batch_sizes.append(len(next(iter(inputs.values()))))
+        return self.session.run(output_names, inputs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+class TestDetectionNMS:
+
+    @pytest.mark.parametrize("count", [1, 30, 400, 2000])
+    def test_backends_agree(self, count):
+        boxes, scores = synthetic_boxes(count, seed=count)
+
+        expected = nms_numpy(boxes, scores, 0.45)
+        assert np.array_equal(nms_opencv(boxes, scores, 0.45), expected)
+
+    def test_empty_keep_returns_no_boxes(self, tiny_detection_engine, monkeypatch):
+        """NMS没有保留任何框时返回空列表而不是抛出异常"""
+        img = random_image(120, 40, seed=1)
+        output, ratio = raw_output(tiny_detection_engine, img)
+        monkeypatch.setattr(tiny_detection_engine, 'nms', lambda boxes, scores, nms_thr: np.empty(0, np.int64))
+
+        assert tiny_detection_engine.multiclass_nms(np.zeros((2, 4)), np.ones((2, 1)), 0.45, 0.1) is None
+        assert tiny_detection_engine.postprocess(output, ratio, img.shape) == []
+
+    def test_no_candidates(self, tiny_detection_engine):
+        img = random_image(120, 40, seed=1)
+        output, ratio = raw_output(tiny_detection_engine, img)
+        output[..., 4] = 0.0
+
+        assert tiny_detection_engine.postprocess(output, ratio, img.shape) == []
+
+    def test_numpy_backend(self, tiny_detection_engine):
+        from ddddocr import DetectionEngine
+
+        img = random_image(300, 120, seed=4)
+        engine = DetectionEngine(nms_backend='numpy')
+        assert engine.predict(img) == tiny_detection_engine.predict(img)
+
+    def test_benchmark_report(self):
+        report = benchmark_nms((20, 100), repeat=2)
+
+        assert [r['boxes'] for r in report['results']] == [20, 100]
+        assert all(r['identical'] for r in report['results'])
+        assert set(report['results'][0]['timings_ms']) == {'numpy', 'opencv'}
+
+
+class TestDetectionBatch:
+
+    def test_batch_matches_single(self, tiny_detection_engine):
+        """批量检测只推理一次，结果与逐张检测一致"""
+        images = [random_image(120, 40, seed=1), Image.fromarray(random_image(300, 100, seed=2)),
+                  png_bytes(Image.fromarray(random_image(416, 416, seed=3)))]
+        expected = [tiny_detection_engine.predict(image) for image in images]
+
+        session = CountingSession(tiny_detection_engine.session)
+        tiny_detection_engine.session = session
+        assert tiny_detection_engine.predict_batch(images) == expected
+        assert session.batch_sizes == [3]
+        assert tiny_detection_engine.predict_batch([]) == []
+
+
+class TestDetectAndRecognize:
+
+    def test_matches_per_crop_recognition(self, tiny_detection_engine, tiny_ocr_engine):
+        """不填充时结果与逐个裁剪后单独识别一致"""
+        img = random_image(300, 100, seed=5)
+        boxes = tiny_detection_engine.predict(img)
+        results = tiny_detection_engine.detect_and_recognize(img, tiny_ocr_engine, pad_to_common_width=False)
+
+        assert boxes
+        assert [r['box'] for r in results] == boxes
+        for result, (x1, y1, x2, y2) in zip(results, boxes):
+            if x2 <= x1 or y2 <= y1:
+                # 退化的边界框不参与识别
+                assert result['text'] == '' and result['confidence'] == 0.0
+                continue
+            # 数组输入按RGB处理
+            crop = Image.fromarray(np.ascontiguousarray(img[y1:y2, x1:x2]))
+            expected = tiny_ocr_engine.predict(crop, confidence=True)
+            assert result['text'] == expected['text']
+            assert result['confidence'] == pytest.approx(expected['confidence'])
+
+    def test_single_recognition_run(self, tiny_detection_engine, tiny_ocr_engine):
+        """图像只解码一次，所有区域合并为一次OCR推理"""
+        image = png_bytes(Image.fromarray(random_image(300, 100, seed=6)))
+        session = CountingSession(tiny_ocr_engine.session)
+        tiny_ocr_engine.session = session
+
+        results = tiny_detection_engine.detect_and_recognize(image, tiny_ocr_engine, padding=2)
+        valid = [r for r in results if r['box'][2] > r['box'][0] and r['box'][3] > r['box'][1]]
+        assert len(valid) > 1
+        assert session.batch_sizes == [len(valid)]
+        assert all(r['text'] for r in valid)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,170 @@
+"""
+模型加载器测试
+"""
+
+import io
+import os
+
+import pytest
+
+from ddddocr import ModelLoader, ModelLoadError, ModelRegistry, OCREngine, get_model_registry
+from tests.conftest import random_captcha
+
+
+class TestSessionOptions:
+
+    def test_env_and_config_precedence(self, monkeypatch):
+        """显式配置优先于环境变量"""
+        monkeypatch.setenv('DDDDOCR_INTRA_OP_THREADS', '2')
+        monkeypatch.setenv('DDDDOCR_EXECUTION_MODE', 'parallel')
+
+        options = ModelLoader.resolve_session_options({'execution_mode': 'sequential'})
+
+        assert options['intra_op_num_threads'] == 2
+        assert options['execution_mode'] == 'sequential'
+
+    def test_config_values_normalized_like_env(self, monkeypatch):
+        """显式配置与环境变量按同一规则规范化"""
+        monkeypatch.setenv('DDDDOCR_GRAPH_OPT_LEVEL', 'Extended')
+
+        options = ModelLoader.resolve_session_options({'execution_mode': 'Parallel', 'intra_op_num_threads': '3',
+                                                       'enable_mem_pattern': 'Off'})
+
+        assert options['execution_mode'] == 'parallel'
+        assert options['graph_optimization_level'] == 'extended'
+        assert options['intra_op_num_threads'] == 3
+        assert options['enable_mem_pattern'] is False
+
+    def test_invalid_options(self):
+        """无效选项抛出ModelLoadError"""
+        with pytest.raises(ModelLoadError):
+            ModelLoader.resolve_session_options({'graph_optimization_level': 'fastest'})
+        with pytest.raises(ModelLoadError):
+            ModelLoader.resolve_session_options({'unknown_option': 1})
+
+    def test_optimized_model_cache(self, tiny_ocr_files, tmp_path):
+        """首次加载写入优化模型缓存，再次加载直接复用"""
+        model_path, _ = tiny_ocr_files
+        cache_dir = str(tmp_path / 'optimized')
+        loader = ModelLoader(session_options={'optimized_model_dir': cache_dir,
+                                              'intra_op_num_threads': 1}, shared=False)
+
+        loader.load_model(model_path)
+        cache_path = loader.get_optimized_model_path(model_path)
+        assert os.path.exists(cache_path)
+        assert os.listdir(cache_dir) == [os.path.basename(cache_path)]
+
+        session = loader.load_model(model_path)
+        assert session.get_inputs()[0].name == 'input1'
+
+
+class TestModelRegistry:
+
+    def test_engines_share_session(self, tiny_ocr_files):
+        """相同模型与配置的引擎共享同一会话，全部释放后卸载"""
+        model_path, charsets_path = tiny_ocr_files
+        registry = get_model_registry()
+        loaded_before = len(registry)
+
+        first = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path)
+        second = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path)
+
+        assert first.session.key == second.session.key
+        assert len(registry) == loaded_before + 1
+        refcounts = {item['key']: item['refcount'] for item in registry.stats()}
+        assert refcounts[first.session.key] == 2
+
+        first.cleanup()
+        assert isinstance(second.predict(random_captcha(80)), str)
+        second.cleanup()
+        assert len(registry) == loaded_before
+
+    def test_release_after_clear_keeps_new_entry(self):
+        """clear() 之后释放旧句柄不减少新条目的引用计数，条目卸载时删除加载锁"""
+        registry = ModelRegistry()
+        old = registry.acquire('model', lambda: 'old-session')
+        registry.clear()
+        new = registry.acquire('model', lambda: 'new-session')
+
+        old.release()
+        assert registry.stats() == [{'key': 'model', 'refcount': 1}]
+        assert new._session == 'new-session'
+
+        new.release()
+        assert len(registry) == 0
+        assert registry._load_locks == {}
+
+    def test_different_options_not_shared(self, tiny_ocr_files):
+        """会话选项不同的引擎各自加载模型"""
+        model_path, charsets_path = tiny_ocr_files
+
+        first = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path)
+        second = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path,
+                           session_options={'intra_op_num_threads': 1})
+
+        assert first.session.key != second.session.key
+
+
+def tiny_samples(engine, count: int = 6):
+    """用微型模型的FP32识别结果作为标注生成样本"""
+    samples = []
+    for seed in range(count):
+        image = random_captcha(96, height=64, seed=seed)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        samples.append((engine.predict(image), buffer.getvalue()))
+    return samples
+
+
+class TestQuantization:
+
+    def test_quantized_model_published_after_guard(self, tiny_ocr_engine, tiny_ocr_files):
+        """正确率校验通过后发布量化模型，可通过 quantized=True 加载"""
+        from ddddocr.models.quantization import get_quantization_report_path, quantize_ocr_engine
+
+        model_path, charsets_path = tiny_ocr_files
+        with pytest.raises(ModelLoadError):
+            OCREngine(import_onnx_path=model_path, charsets_path=charsets_path, quantized=True)
+
+        samples = tiny_samples(tiny_ocr_engine)
+        report = quantize_ocr_engine(tiny_ocr_engine, samples, tolerance=1.0)
+
+        quantized_path = ModelLoader.get_quantized_model_path(model_path)
+        assert report['accepted']
+        assert report['size_bytes']['int8'] < report['size_bytes']['fp32']
+        assert os.path.exists(get_quantization_report_path(quantized_path))
+
+        engine = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path, quantized=True)
+        assert isinstance(engine.predict(random_captcha(96, height=64)), str)
+
+    def test_candidate_engine_built_explicitly(self, tiny_ocr_engine, tiny_ocr_files):
+        """with_model_file 重新构造引擎：配置相同、结果相同，不共享锁与预热状态"""
+        model_path, _ = tiny_ocr_files
+
+        candidate = tiny_ocr_engine.with_model_file(model_path)
+        try:
+            image = random_captcha(96, height=64)
+            assert candidate.predict(image) == tiny_ocr_engine.predict(image)
+            assert candidate.get_charset() == tiny_ocr_engine.get_charset()
+            assert candidate.width_buckets == tiny_ocr_engine.width_buckets
+            assert candidate._warmup_lock is not tiny_ocr_engine._warmup_lock
+            assert candidate.charset_manager is not tiny_ocr_engine.charset_manager
+        finally:
+            candidate.cleanup()
+
+    @pytest.mark.parametrize('method', ['dynamic', 'static'])
+    def test_rejected_model_not_published(self, tiny_ocr_engine, tiny_ocr_files, method):
+        """正确率下降超出容差时不发布量化模型"""
+        from ddddocr.models.quantization import quantize_ocr_engine
+
+        model_path, _ = tiny_ocr_files
+        report = quantize_ocr_engine(tiny_ocr_engine, tiny_samples(tiny_ocr_engine), method=method,
+                                     tolerance=-1.0)
+
+        assert not report['accepted']
+        assert not os.path.exists(ModelLoader.get_quantized_model_path(model_path))
+        assert sorted(os.listdir(os.path.dirname(model_path))) == ['charsets.json', 'tiny.onnx']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,99 @@
+"""
+OCR基准测试
+
+默认在微型模型上验证基准测试流程；设置环境变量 DDDDOCR_BENCH_CORPUS 为已标注样本目录时，
+额外用内置模型评估验证码代理的各预处理配置，DDDDOCR_BENCH_OUTPUT 指定结果JSON路径。
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from ddddocr.utils.benchmark import (STAGES, edit_distance, load_corpus, make_config,
+                                     run_benchmark, save_report)
+from tests.conftest import random_captcha
+
+
+@pytest.fixture
+def tiny_corpus(tmp_path, tiny_ocr_engine):
+    """用微型模型自身的识别结果作为标注生成样本目录，再加入一个错误标注的样本"""
+    corpus = tmp_path / 'corpus'
+    corpus.mkdir()
+    for seed in range(4):
+        image = random_captcha(96, height=64, seed=seed)
+        label = tiny_ocr_engine.predict(image) or 'empty'
+        image.save(corpus / f"{label}_{seed}.png")
+    random_captcha(96, height=64, seed=99).save(corpus / "zzzzzzzz_99.png")
+    return str(corpus)
+
+
+class TestBenchmark:
+
+    def test_edit_distance(self):
+        assert edit_distance("ab12", "ab12") == 0
+        assert edit_distance("ab12", "ab1") == 1
+        assert edit_distance("", "abc") == 3
+
+    def test_report_structure(self, tiny_ocr_engine, tiny_corpus, tmp_path):
+        """报告包含各阶段耗时分布与正确率，并可写为JSON"""
+        samples = load_corpus(tiny_corpus)
+        invert = make_config('invert', preprocess=lambda image: 255 - np.asarray(image.convert('L')))
+        report = run_benchmark(samples, {'tiny': tiny_ocr_engine}, [make_config('raw'), invert], repeat=2)
+
+        assert report['samples'] == 5
+        assert [(r['model'], r['config']) for r in report['results']] == [('tiny', 'raw'), ('tiny', 'invert')]
+
+        raw = report['results'][0]
+        assert raw['exact_accuracy'] == pytest.approx(4 / 5)
+        assert 0.0 <= raw['char_accuracy'] <= 1.0
+        assert raw['failures'][-1]['label'] == 'zzzzzzzz'
+        for stage in STAGES:
+            timing = raw['timings_ms'][stage]
+            assert 0.0 <= timing['p50'] <= timing['p95']
+
+        path = str(tmp_path / 'bench.json')
+        save_report(report, path)
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f)['results'][1]['config'] == 'invert'
+
+    def test_cli(self, tiny_ocr_files, tiny_corpus, tmp_path):
+        """python -m ddddocr bench 输出JSON报告"""
+        model_path, charsets_path = tiny_ocr_files
+        output = str(tmp_path / 'cli.json')
+        project_root = os.path.join(os.path.dirname(__file__), '..')
+        subprocess.run([sys.executable, '-m', 'ddddocr', 'bench', tiny_corpus, '--models', '',
+                        '--onnx', model_path, '--charsets', charsets_path, '--output', output],
+                       cwd=os.path.join(project_root, 'vision_model'), check=True, capture_output=True)
+
+        with open(output, encoding='utf-8') as f:
+            report = json.load(f)
+        assert report['results'][0]['model'] == 'custom'
+        assert report['samples'] == 5
+
+    @pytest.mark.skipif(not os.getenv('DDDDOCR_BENCH_CORPUS'), reason="未设置 DDDDOCR_BENCH_CORPUS")
+    def test_solver_pipelines_on_corpus(self):
+        """在真实样本上评估验证码代理的预处理配置与内置模型"""
+        from agents.captcha_solver_agent import CaptchaSolverAgent
+        from ddddocr import OCREngine
+
+        samples = load_corpus(os.environ['DDDDOCR_BENCH_CORPUS'])
+        engines = {'old': OCREngine(old=True), 'beta': OCREngine(beta=True)}
+        configs = [
+            make_config('original'),
+            make_config('processed', preprocess=lambda image: CaptchaSolverAgent.preprocess_array(
+                np.asarray(image.convert('RGB')))),
+        ]
+        report = run_benchmark(samples, engines, configs, warmup=3)
+
+        output = os.getenv('DDDDOCR_BENCH_OUTPUT')
+        if output:
+            save_report(report, output)
+        assert all(result['samples'] == len(samples) for result in report['results'])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,335 @@
+"""
+OCR识别引擎测试
+"""
+
+import numpy as np
+import pytest
+
+from tests.conftest import build_tiny_ocr_model, random_captcha
+
+
+class TestOCREngineInput:
+
+    def test_predict_accepts_gray_array(self, tiny_ocr_engine):
+        """灰度数组输入与PIL图像输入结果一致"""
+        image = random_captcha(96, seed=3)
+
+        assert tiny_ocr_engine.predict(np.asarray(image)) == tiny_ocr_engine.predict(image)
+
+
+class TestCTCDecode:
+
+    def test_matches_reference_decoder(self):
+        """向量化解码与逐步解码结果一致"""
+        from ddddocr import OCREngine
+
+        def reference(indices):
+            decoded, prev = [], None
+            for idx in indices:
+                if idx != prev and idx != 0:
+                    decoded.append(idx)
+                prev = idx
+            return decoded
+
+        rng = np.random.default_rng(0)
+        for length in [0, 1, 2, 17, 64]:
+            indices = rng.integers(0, 4, length)
+            assert OCREngine._ctc_decode_indices(indices).tolist() == reference(indices.tolist())
+
+    def test_charset_range_filters_output(self, tiny_ocr_engine):
+        """字符集范围限制只保留范围内字符"""
+        image = random_captcha(160, seed=5)
+
+        text = tiny_ocr_engine.predict(image, charset_range="0123456789")
+
+        assert all(char.isdigit() for char in text)
+
+    def test_range_mask_applied_before_argmax(self, tiny_ocr_engine):
+        """范围外字符得分最高时选择范围内的次优字符，而不是直接丢弃"""
+        charset = tiny_ocr_engine.get_charset()
+        logits = np.zeros((3, 1, len(charset)), dtype=np.float32)
+        for step, (best, allowed) in enumerate([("a", "1"), ("b", "2"), ("", "")]):
+            logits[step, 0, charset.index(best)] = 5.0
+            logits[step, 0, charset.index(allowed)] = 3.0
+
+        mask = tiny_ocr_engine.charset_manager.get_range_mask("0123456789")
+
+        assert tiny_ocr_engine._process_output(logits, False) == "ab"
+        assert tiny_ocr_engine._process_output(logits, False, mask) == "12"
+
+    def test_per_call_range_keeps_default(self, tiny_ocr_engine):
+        """按次传入的范围不修改引擎默认范围"""
+        image = random_captcha(160, seed=5)
+        unrestricted = tiny_ocr_engine.predict(image)
+
+        tiny_ocr_engine.predict(image, charset_range="0123456789")
+
+        assert tiny_ocr_engine.charset_manager.get_charset_range() == []
+        assert tiny_ocr_engine.predict(image) == unrestricted
+
+
+class TestOCREngineExpectedLength:
+
+    def test_constrained_path_matches_exhaustive_search(self):
+        """长度约束的Viterbi搜索与穷举所有路径的结果一致"""
+        import itertools
+        from ddddocr import OCREngine
+
+        def collapse(path):
+            return OCREngine._ctc_decode_indices(np.array(path)).size
+
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            steps, classes = int(rng.integers(1, 6)), int(rng.integers(2, 5))
+            low = int(rng.integers(1, 4))
+            high = low + int(rng.integers(0, 2))
+            log_probs = np.log(rng.dirichlet(np.ones(classes), size=steps))
+
+            scores = [log_probs[np.arange(steps), path].sum()
+                      for path in itertools.product(range(classes), repeat=steps)
+                      if low <= collapse(path) <= high]
+            path = OCREngine._length_constrained_path(log_probs, low, high)
+
+            if not scores:
+                assert path is None
+                continue
+            assert low <= collapse(path) <= high
+            assert log_probs[np.arange(steps), path].sum() == pytest.approx(max(scores))
+
+    def test_expected_length_enforced(self, tiny_ocr_engine):
+        """argmax结果长度不符时输出满足长度的最优路径，长度相符时结果不变"""
+        image = random_captcha(160, seed=5)
+        text = tiny_ocr_engine.predict(image)
+
+        assert tiny_ocr_engine.predict(image, expected_length=len(text)) == text
+        for length in (max(1, len(text) - 1), len(text) + 1):
+            result = tiny_ocr_engine.predict(image, confidence=True, expected_length=length)
+            assert len(result['text']) == length
+            assert len(result['char_probabilities']) == length
+
+    def test_expected_length_respects_charset_range(self, tiny_ocr_engine):
+        image = random_captcha(160, seed=5)
+
+        text = tiny_ocr_engine.predict(image, charset_range="0123456789", expected_length=(6, 7))
+
+        assert 6 <= len(text) <= 7
+        assert text.isdigit()
+
+    def test_invalid_expected_length(self, tiny_ocr_engine):
+        from ddddocr import DDDDOCRError
+
+        with pytest.raises(DDDDOCRError):
+            tiny_ocr_engine.predict(random_captcha(96), expected_length=(5, 4))
+
+
+class TestOCREngineConfidence:
+
+    def test_confidence_output(self, tiny_ocr_engine):
+        """逐字符置信度与文本一致，且不包含完整概率矩阵"""
+        image = random_captcha(160, seed=7)
+
+        result = tiny_ocr_engine.predict(image, confidence=True)
+
+        assert result['text'] == tiny_ocr_engine.predict(image)
+        assert len(result['char_probabilities']) == len(result['text'])
+        assert 'probabilities' not in result
+        if result['text']:
+            assert result['min_char_probability'] == min(result['char_probabilities'])
+            assert all(0.0 < p <= 1.0 for p in result['char_probabilities'])
+
+    def test_char_probability_uses_best_step(self, tiny_ocr_engine):
+        """重复时间步合并为一个字符，取其中的最高概率"""
+        charset = tiny_ocr_engine.get_charset()
+        logits = np.zeros((4, 1, len(charset)), dtype=np.float32)
+        logits[0, 0, charset.index("a")] = 2.0
+        logits[1, 0, charset.index("a")] = 8.0
+        logits[2, 0, 0] = 8.0
+        logits[3, 0, charset.index("b")] = 8.0
+
+        result = tiny_ocr_engine._process_output(logits, False, confidence=True)
+
+        assert result['text'] == "ab"
+        assert result['char_probabilities'][0] == pytest.approx(result['char_probabilities'][1])
+
+
+    def test_stage_timings(self, tiny_ocr_engine):
+        """传入timings时记录各阶段耗时，识别结果不变"""
+        image = random_captcha(160, seed=7)
+        timings = {}
+
+        result = tiny_ocr_engine.predict(image, confidence=True, timings=timings)
+
+        assert result == tiny_ocr_engine.predict(image, confidence=True)
+        assert set(timings) == {'preprocess', 'inference', 'ctc'}
+        assert all(value >= 0.0 for value in timings.values())
+
+class TestOCREngineBatch:
+
+    def test_predict_batch_matches_predict(self, tiny_ocr_engine):
+        """批量识别结果与逐张识别一致且保持输入顺序"""
+        images = [random_captcha(w, seed=i) for i, w in enumerate([80, 120, 80, 96])]
+
+        expected = [tiny_ocr_engine.predict(img) for img in images]
+
+        assert tiny_ocr_engine.predict_batch(images) == expected
+
+    def test_predict_batch_padded(self, tiny_ocr_engine):
+        """填充到统一宽度后一次推理，截断时间步后结果不变"""
+        images = [random_captcha(w, seed=i) for i, w in enumerate([64, 128, 96])]
+
+        expected = [tiny_ocr_engine.predict(img) for img in images]
+
+        assert tiny_ocr_engine.predict_batch(images, pad_to_common_width=True) == expected
+
+    def test_predict_batch_probability(self, tiny_ocr_engine):
+        """批量概率输出"""
+        results = tiny_ocr_engine.predict_batch([random_captcha(80), random_captcha(64)], probability=True)
+
+        assert len(results) == 2
+        assert all('text' in result and 'confidence' in result for result in results)
+
+    @pytest.mark.parametrize('batch_first', [False, True])
+    @pytest.mark.parametrize('named_output_dims', [True, False])
+    def test_output_layout_detected_once(self, tiny_ocr_files, tmp_path, batch_first, named_output_dims):
+        """输出布局在加载时确定：序列长度恰好等于batch大小时批量结果仍与逐张一致"""
+        from ddddocr import OCREngine
+
+        _, charsets_path = tiny_ocr_files
+        model_path = str(tmp_path / 'layout.onnx')
+        build_tiny_ocr_model(model_path, batch_first=batch_first, named_output_dims=named_output_dims)
+        engine = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path)
+        # 宽度16的图像缩放后有2个时间步，与batch大小相同
+        images = [random_captcha(16, height=64, seed=seed) for seed in range(2)]
+
+        assert engine.output_batch_axis == (0 if batch_first else 1)
+        assert engine.predict_batch(images, confidence=True) == [engine.predict(image, confidence=True)
+                                                                 for image in images]
+        engine.cleanup()
+
+    def test_predict_batch_empty(self, tiny_ocr_engine):
+        """空输入返回空列表"""
+        assert tiny_ocr_engine.predict_batch([]) == []
+
+
+class TestOCREngineWarmUp:
+
+    def test_warm_up_dedupes_input_shapes(self, tiny_ocr_engine):
+        """映射到相同模型输入形状的尺寸只预热一次"""
+        assert not tiny_ocr_engine.is_warmed_up()
+
+        tiny_ocr_engine.warm_up([(100, 50), (200, 100), (120, 40)])
+
+        stats = tiny_ocr_engine.get_warmup_stats()
+        assert stats['warmed_up']
+        assert list(stats['shapes']) == ['100x50', '120x40']
+        assert stats['shapes']['120x40']['input_shape'] == [1, 1, 64, 192]
+        assert stats['total_ms'] > 0
+
+    def test_warm_up_string_sizes(self, tiny_ocr_engine):
+        """字符串形式的尺寸（如环境变量的值）按 宽x高 解析"""
+        tiny_ocr_engine.warm_up("100x40,120x40")
+
+        stats = tiny_ocr_engine.get_warmup_stats()
+        assert stats['status'] == 'warm'
+        assert list(stats['shapes']) == ['100x40', '120x40']
+
+    def test_failed_warm_up_not_marked_warm(self, tiny_ocr_engine, monkeypatch):
+        """没有任何形状推理成功时记录失败状态，而不是标记为已预热"""
+        def failing_inference(*args, **kwargs):
+            raise RuntimeError("推理失败")
+
+        monkeypatch.setattr(tiny_ocr_engine, '_inference', failing_inference)
+        tiny_ocr_engine.warm_up([(100, 40)])
+
+        stats = tiny_ocr_engine.get_warmup_stats()
+        assert stats['status'] == 'failed'
+        assert not stats['warmed_up']
+        assert '推理失败' in stats['error']
+        assert tiny_ocr_engine.wait_until_warm(timeout=0) is False
+
+    def test_background_warm_up_at_init(self, tiny_ocr_files, monkeypatch):
+        """环境变量启用后台预热，初始化后即可识别"""
+        from ddddocr import ModelLoadError, OCREngine
+
+        monkeypatch.setenv('DDDDOCR_WARMUP', 'background')
+        monkeypatch.setenv('DDDDOCR_WARMUP_SHAPES', '96x32')
+        model_path, charsets_path = tiny_ocr_files
+        engine = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path)
+
+        assert isinstance(engine.predict(random_captcha(96)), str)
+        assert engine.wait_until_warm(timeout=10)
+        assert list(engine.get_warmup_stats()['shapes']) == ['96x32']
+
+        with pytest.raises(ModelLoadError):
+            OCREngine(import_onnx_path=model_path, charsets_path=charsets_path, warmup='eager')
+
+
+class TestOCREngineWidthBuckets:
+
+    @pytest.mark.parametrize('io_binding', [False, True])
+    def test_bucketed_output_identical(self, tiny_ocr_files, tiny_ocr_engine, io_binding):
+        """感受野不跨列（卷积核宽度等于步长）时，按宽度桶填充后的结果与不分桶完全一致"""
+        from ddddocr import OCREngine
+
+        model_path, charsets_path = tiny_ocr_files
+        engine = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path,
+                           width_buckets="160,256", io_binding=io_binding)
+
+        for seed, width in enumerate([70, 96, 101, 128, 150, 260]):
+            image = random_captcha(width, seed=seed)
+            assert engine.predict(image) == tiny_ocr_engine.predict(image)
+            bucketed = engine.predict(image, confidence=True)
+            expected = tiny_ocr_engine.predict(image, confidence=True)
+            assert bucketed['char_probabilities'] == pytest.approx(expected['char_probabilities'])
+
+        assert engine.io_binding == io_binding
+        assert len(engine._bucket_buffers) == (2 if io_binding else 0)
+
+    def test_bucket_agreement_with_wide_receptive_field(self, tiny_ocr_files, tiny_ocr_engine, tmp_path):
+        """感受野跨列的模型分桶后结果会改变，校验时去掉这些桶；感受野不跨列时全部保留"""
+        from ddddocr import OCREngine
+
+        _, charsets_path = tiny_ocr_files
+        wide_model_path = str(tmp_path / 'wide.onnx')
+        build_tiny_ocr_model(wide_model_path, kernel_width=40)
+        wide_engine = OCREngine(import_onnx_path=wide_model_path, charsets_path=charsets_path)
+        images = [random_captcha(width, seed=seed)
+                  for seed, width in enumerate([60, 66, 70, 75, 80, 96, 101, 110, 128])]
+
+        report = wide_engine.bucket_agreement(images, "160,256")
+        assert sum(stats['samples'] for stats in report.values()) == len(images)
+        assert any(stats['agreed'] < stats['samples'] for stats in report.values())
+        accepted, _ = wide_engine.verify_width_buckets(images, "160,256")
+        assert accepted != [160, 256]
+
+        accepted, report = tiny_ocr_engine.verify_width_buckets(images, "160,256")
+        assert accepted == [160, 256]
+        assert all(stats['agreed'] == stats['samples'] for stats in report.values())
+
+    def test_io_binding_reuses_buffers_across_threads(self, tiny_ocr_files, tiny_ocr_engine):
+        """同一宽度桶复用预分配缓冲区，并发识别结果正确"""
+        from concurrent.futures import ThreadPoolExecutor
+        from ddddocr import OCREngine
+
+        model_path, charsets_path = tiny_ocr_files
+        engine = OCREngine(import_onnx_path=model_path, charsets_path=charsets_path,
+                           width_buckets=[256], io_binding=True)
+        images = [random_captcha(90 + seed * 7, seed=seed) for seed in range(12)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(engine.predict, images))
+
+        assert results == [tiny_ocr_engine.predict(image) for image in images]
+        assert len(engine._bucket_buffers) == 1
+
+    def test_suggest_width_buckets(self, tiny_ocr_engine):
+        from ddddocr import OCREngine
+
+        assert OCREngine.suggest_width_buckets([150, 150, 190]) == [152, 192]
+        buckets = OCREngine.suggest_width_buckets(list(range(100, 300)), max_buckets=4)
+        assert len(buckets) == 4 and buckets[-1] == 304
+        assert tiny_ocr_engine.input_width(random_captcha(120, height=40)) == 192
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
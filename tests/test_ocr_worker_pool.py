@@ -0,0 +1,160 @@
+"""
+验证码识别进程池测试
+
+工作进程使用本模块的识别函数工厂（spawn方式要求模块级函数），不加载真实模型。
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from agents.captcha_solver_agent import CaptchaSolverAgent
+from utils.ocr_worker_pool import PRIORITY_LOGIN, PRIORITY_SELECT, OCRWorkerPool
+
+
+def echo_recognizer_factory():
+    """识别结果为图片数据本身；slow 耗时较长，crash 使工作进程退出"""
+    def recognize(image_data: bytes):
+        if image_data == b'crash':
+            os._exit(1)
+        time.sleep(0.3 if image_data == b'slow' else 0.01)
+        return {"code": image_data.decode(), "confidence": 1.0}
+    return recognize
+
+
+def failing_recognizer_factory():
+    raise RuntimeError("模型加载失败")
+
+
+def start_once_recognizer_factory():
+    """只能启动一次：标记文件存在时（即崩溃后重启）加载失败"""
+    marker = os.environ['OCR_POOL_TEST_MARKER']
+    if os.path.exists(marker):
+        raise RuntimeError("模型加载失败")
+    open(marker, 'w').close()
+    return echo_recognizer_factory()
+
+
+def thread_count_recognizer_factory():
+    """识别结果为工作进程的ONNX推理线程数设置"""
+    threads = os.environ['DDDDOCR_INTRA_OP_THREADS']
+    return lambda image_data: {"code": threads, "confidence": 1.0}
+
+
+@pytest.fixture
+def pool():
+    pool = OCRWorkerPool(1, recognizer_factory=echo_recognizer_factory)
+    yield pool
+    pool.close()
+
+
+class TestOCRWorkerPool:
+
+    def test_login_requests_jump_queue(self, pool):
+        """工作进程繁忙时排队的登录验证码先于选课验证码识别"""
+        completed = []
+        first = pool.submit(b'slow', PRIORITY_SELECT)
+        first.add_done_callback(lambda f: completed.append(f.result()["code"]))
+        while pool.stats()['queued']:
+            time.sleep(0.01)
+
+        futures = [pool.submit(b'select1', PRIORITY_SELECT),
+                   pool.submit(b'select2', PRIORITY_SELECT),
+                   pool.submit(b'login', PRIORITY_LOGIN)]
+        for future in futures:
+            future.add_done_callback(lambda f: completed.append(f.result()["code"]))
+        for future in [first] + futures:
+            future.result(timeout=10)
+
+        assert completed == ['slow', 'login', 'select1', 'select2']
+        assert futures[0].result()["worker_pid"] != os.getpid()
+        assert pool.stats()['completed'] == 4
+
+    def test_worker_restarts_after_crash(self, pool):
+        """工作进程异常退出时当前请求失败，进程重启后继续服务"""
+        with pytest.raises(RuntimeError):
+            pool.submit(b'crash').result(timeout=10)
+        assert pool.submit(b'after').result(timeout=30)["code"] == 'after'
+        assert pool.stats()['restarts'] == 1
+
+    def test_pool_broken_when_restart_fails(self, tmp_path, monkeypatch):
+        """工作进程无法重启时，排队与新的请求立即失败而不是一直等待"""
+        monkeypatch.setenv('OCR_POOL_TEST_MARKER', str(tmp_path / 'started'))
+        pool = OCRWorkerPool(1, recognizer_factory=start_once_recognizer_factory)
+        try:
+            crashed = pool.submit(b'crash')
+            queued = pool.submit(b'queued')
+            with pytest.raises(RuntimeError):
+                crashed.result(timeout=30)
+            with pytest.raises(RuntimeError, match="不可用"):
+                queued.result(timeout=30)
+
+            assert pool.is_broken()
+            assert pool.stats()['broken'] is True
+            with pytest.raises(RuntimeError, match="不可用"):
+                pool.submit(b'after')
+        finally:
+            pool.close()
+
+    def test_startup_failure(self):
+        with pytest.raises(RuntimeError, match="模型加载失败"):
+            OCRWorkerPool(1, recognizer_factory=failing_recognizer_factory)
+
+    def test_startup_failure_stops_started_workers(self, tmp_path, monkeypatch):
+        """后面的工作进程启动失败时，已经启动的工作进程被停止"""
+        monkeypatch.setenv('OCR_POOL_TEST_MARKER', str(tmp_path / 'started'))
+        with pytest.raises(RuntimeError, match="模型加载失败"):
+            OCRWorkerPool(2, recognizer_factory=start_once_recognizer_factory)
+
+        assert not [p for p in multiprocessing.active_children() if p.name.startswith('ocr-worker')]
+
+    def test_workers_split_inference_threads(self, monkeypatch):
+        """各工作进程的推理线程数为 CPU核数 // 工作进程数，不占满全部核心"""
+        monkeypatch.delenv('DDDDOCR_INTRA_OP_THREADS', raising=False)
+        monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+        pool = OCRWorkerPool(2, recognizer_factory=thread_count_recognizer_factory)
+        try:
+            assert pool.intra_op_threads == 4
+            assert pool.submit(b'x').result(timeout=30)["code"] == '4'
+        finally:
+            pool.close()
+
+    def test_solver_uses_pool(self, pool):
+        """识别代理通过进程池识别，并区分排队与识别耗时"""
+        solver = CaptchaSolverAgent(mode="ai", debug=False, ocr_pool=pool)
+        result = asyncio.run(solver.recognize_text_async(b'7a9c', source="login"))
+
+        assert result["code"] == '7a9c'
+        assert result["solve_time"] >= 0.01
+        assert result["queue_wait"] >= 0.0
+        assert solver._model is None
+        solver.close()
+
+    def test_browser_select_captcha_uses_pool(self, pool, monkeypatch):
+        """浏览器代理共用带进程池的识别代理，选课验证码按选课优先级交给工作进程"""
+        from agents.browser_agent import BrowserAgent
+
+        priorities = []
+        submit = pool.submit
+
+        def recording_submit(image_data, priority=PRIORITY_SELECT):
+            priorities.append(priority)
+            return submit(image_data, priority)
+
+        monkeypatch.setattr(pool, 'submit', recording_submit)
+        solver = CaptchaSolverAgent(mode="ai", debug=False, ocr_pool=pool)
+        browser = BrowserAgent(headless=True, captcha_solver=solver)
+        result = asyncio.run(browser.captcha_solver.recognize_text_async(b'5b2d', source="select"))
+
+        assert browser.captcha_solver is solver
+        assert result["code"] == '5b2d'
+        assert result["worker_pid"] != os.getpid()
+        assert priorities == [PRIORITY_SELECT]
+        solver.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
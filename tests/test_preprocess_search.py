@@ -0,0 +1,91 @@
+"""
+验证码预处理参数搜索测试
+"""
+
+import functools
+import io
+
+import numpy as np
+import pytest
+
+from agents.captcha_solver_agent import CaptchaSolverAgent, DEFAULT_PREPROCESS_PARAMS
+from tests.conftest import random_captcha
+from utils.captcha_profile import load_profile
+from utils.preprocess_search import (
+    create_default_model, grid_candidates, random_candidates, search_preprocessing, build_tuned_profile
+)
+
+# 用于生成样本标注的"正确"预处理参数
+TARGET_PARAMS = {'contrast': 1.0, 'binarize': 'otsu'}
+
+
+def captcha_bytes(seed: int) -> bytes:
+    buffer = io.BytesIO()
+    random_captcha(96, height=40, seed=seed).convert('RGB').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class TestPreprocessParams:
+
+    def test_default_params_unchanged(self):
+        rgb = np.asarray(random_captcha(60, seed=1).convert('RGB'))
+
+        assert np.array_equal(CaptchaSolverAgent.preprocess_array(rgb),
+                              CaptchaSolverAgent.preprocess_array(rgb, dict(DEFAULT_PREPROCESS_PARAMS)))
+
+    def test_binarize_and_median(self):
+        rgb = np.asarray(random_captcha(60, seed=2).convert('RGB'))
+
+        fixed = CaptchaSolverAgent.preprocess_array(rgb, {'binarize': 128, 'median_blur': 3})
+        otsu = CaptchaSolverAgent.preprocess_array(rgb, {'binarize': 'otsu'})
+        assert set(np.unique(fixed)) <= {0, 255}
+        assert set(np.unique(otsu)) <= {0, 255}
+        assert fixed.shape == rgb.shape[:2]
+
+
+class TestPreprocessSearch:
+
+    def test_candidates(self):
+        space = {'contrast': [1.0, 2.0], 'median_blur': [0, 3, 5]}
+
+        assert len(grid_candidates(space)) == 6
+        sampled = random_candidates(space, 4, seed=1)
+        assert len(sampled) == 4
+        assert sampled == random_candidates(space, 4, seed=1)
+        assert len(random_candidates(space, 100)) == 6
+
+    def test_search_finds_labelling_params(self, tiny_ocr_files, tmp_path):
+        """样本按某组参数的识别结果标注时，搜索应找到正确率100%的参数并写入格式文件"""
+        model_path, charsets_path = tiny_ocr_files
+        factory = functools.partial(create_default_model, import_onnx_path=model_path,
+                                    charsets_path=charsets_path)
+
+        labeller = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old", confidence_threshold=0)
+        labeller.model = factory()
+        labeller.preprocess_params = TARGET_PARAMS
+        samples = []
+        for seed in range(12):
+            image = captcha_bytes(seed)
+            code = labeller.recognize_text(image)['code']
+            if code:
+                samples.append((code, image))
+        assert samples
+
+        candidates = grid_candidates({'contrast': [1.0, 2.0], 'binarize': [None, 'otsu']})
+        report = search_preprocessing(samples, candidates, model_factory=factory, workers=2,
+                                      confidence_threshold=0)
+
+        assert report['candidates'] == 4
+        assert report['workers'] == 2
+        assert report['best']['accuracy'] == 1.0
+        assert report['best']['first_try_rate'] == 1.0
+
+        path = str(tmp_path / 'tuned.json')
+        build_tuned_profile(report).save(path)
+        solver = CaptchaSolverAgent(mode="ai", debug=False, profile=path)
+        assert solver.preprocess_params == report['best']['params']
+        assert load_profile(path).preprocess['contrast'] in (1.0, 2.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
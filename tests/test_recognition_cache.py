@@ -0,0 +1,111 @@
+"""
+识别结果缓存测试
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from agents.captcha_solver_agent import CaptchaSolverAgent
+from utils.recognition_cache import RecognitionCache, pixel_hash
+
+
+def captcha_bytes(color: str = 'white', format: str = 'PNG') -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (100, 40), color=color).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+class CountingModel:
+    def __init__(self, text: str = "ab12"):
+        self.text = text
+        self.calls = 0
+
+    def classification(self, image, confidence=False):
+        self.calls += 1
+        return {"text": self.text, "char_probabilities": [0.95] * len(self.text)}
+
+
+class TestRecognitionCache:
+
+    def test_lru_eviction_and_stats(self):
+        cache = RecognitionCache(max_size=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, {"code": key, "confidence": 0.9})
+
+        assert cache.get("a") is None
+        assert cache.get("c")["cached"] is True
+        stats = cache.stats()
+        assert stats['size'] == 2
+        assert stats['evictions'] == 1
+        assert stats['hit_rate'] == pytest.approx(0.5)
+
+    def test_rejected_entry_never_returned(self):
+        cache = RecognitionCache()
+        cache.put("k", {"code": "ab12", "confidence": 0.9})
+        cache.report("k", "ab12", accepted=False)
+
+        assert cache.get("k") is None
+        assert cache.was_rejected("k", "ab12")
+        assert not cache.put("k", {"code": "ab12", "confidence": 0.9})
+        assert cache.put("k", {"code": "ab13", "confidence": 0.9})
+
+    def test_accepted_and_empty_results(self):
+        cache = RecognitionCache()
+        assert not cache.put("empty", {"code": "", "confidence": 0.0})
+        cache.put("k", {"code": "ab12", "confidence": 0.9})
+        cache.report("k", "ab12", accepted=True)
+
+        assert cache.get("k")["accepted"] is True
+
+    def test_pixel_hash_ignores_encoding(self):
+        png = np.asarray(Image.open(io.BytesIO(captcha_bytes(format='PNG'))).convert('RGB'))
+        bmp = np.asarray(Image.open(io.BytesIO(captcha_bytes(format='BMP'))).convert('RGB'))
+
+        assert pixel_hash(png) == pixel_hash(bmp)
+        assert pixel_hash(png, salt="a") != pixel_hash(png, salt="b")
+
+
+class TestSolverCache:
+
+    def test_repeated_captcha_recognized_once(self):
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old")
+        model = CountingModel()
+        agent.model = model
+
+        first = agent.recognize_text(captcha_bytes())
+        second = agent.recognize_text(captcha_bytes(format='BMP'))
+
+        assert model.calls == 1
+        assert second["code"] == first["code"]
+        assert second["cached"] is True
+        assert agent.cache_stats()['hits'] == 1
+
+    def test_rejected_code_not_resubmitted(self):
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old")
+        model = CountingModel()
+        agent.model = model
+
+        assert agent.solve_captcha(captcha_bytes(), manual_fallback=False) == "ab12"
+        agent.report_result(False)
+
+        assert agent.solve_captcha(captcha_bytes(), manual_fallback=False) == ""
+        assert model.calls == 2
+        assert agent.cache_stats()['rejected'] == 1
+
+    def test_cache_disabled(self):
+        agent = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old", cache_size=0)
+        model = CountingModel()
+        agent.model = model
+
+        agent.recognize_text(captcha_bytes())
+        agent.recognize_text(captcha_bytes())
+
+        assert model.calls == 2
+        assert agent.cache_stats() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,207 @@
+"""
+远程识别客户端测试
+
+本地启动一个按 ddddocr API 接口约定（/health、/status、/initialize、/ocr）响应的HTTP服务，由微型模型识别；
+安装了 fastapi 与 uvicorn 时，额外针对 python -m ddddocr api 启动的真实服务测试。
+"""
+
+import base64
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents.captcha_solver_agent import CaptchaSolverAgent
+from tests.conftest import random_captcha
+from utils.remote_ocr import RemoteOCRClient, RemoteOCRError
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def captcha_bytes(seed: int = 0) -> bytes:
+    buffer = io.BytesIO()
+    random_captcha(96, height=64, seed=seed).convert('RGB').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def ocr_server(tiny_ocr_engine):
+    """按API接口约定响应的本地识别服务，delay 控制 /ocr 的响应延迟，initialized 表示是否已加载OCR模型"""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, body, status=200):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/status':
+                self._reply({'service_status': 'running', 'loaded_models': ['ocr'] if server.initialized else [],
+                             'enabled_features': [], 'version': 'test', 'uptime': 0.0})
+            else:
+                self._reply({'status': 'healthy', 'timestamp': time.time()})
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            server.posts.append(self.path)
+            if self.path == '/initialize':
+                server.initialized = True
+                self._reply({'success': True, 'message': '初始化成功', 'data': request})
+                return
+            if not server.initialized:
+                self._reply({'detail': 'OCR功能未初始化，请先调用 /initialize 接口'}, status=400)
+                return
+            time.sleep(server.delay)
+            server.connections.add(self.client_address)
+            result = tiny_ocr_engine.predict(base64.b64decode(request['image']), confidence=True)
+            self._reply({'success': True, 'message': 'OCR识别成功',
+                         'data': {'text': result['text'], 'char_probabilities': result['char_probabilities']}})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    # 超时测试中客户端先断开连接，不打印服务端异常
+    server.handle_error = lambda request, client_address: None
+    server.delay = 0.0
+    server.initialized = True
+    server.posts = []
+    server.connections = set()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestRemoteOCRClient:
+
+    def test_matches_in_process_result(self, ocr_server, tiny_ocr_engine):
+        """远程识别结果与本地一致，连续请求复用同一个连接"""
+        client = RemoteOCRClient(ocr_server.url)
+        assert client.is_available()
+
+        for seed in range(3):
+            image = captcha_bytes(seed)
+            expected = tiny_ocr_engine.predict(image, confidence=True)
+            result = client.classification(image, confidence=True)
+            assert result['text'] == expected['text']
+            assert result['char_probabilities'] == pytest.approx(expected['char_probabilities'])
+        assert len(ocr_server.connections) == 1
+        assert client.stats()['requests'] == 3
+        client.close()
+
+    def test_timeout_marks_unavailable(self, ocr_server):
+        ocr_server.delay = 0.5
+        client = RemoteOCRClient(ocr_server.url, timeout=0.1, health_interval=60)
+        with pytest.raises(RemoteOCRError):
+            client.classification(captcha_bytes())
+        assert not client.is_available()
+        client.close()
+
+    def test_uninitialized_server_not_available(self, ocr_server):
+        """服务运行但未加载OCR模型时视为不可用；被拒绝的请求同样标记不可用"""
+        ocr_server.initialized = False
+        client = RemoteOCRClient(ocr_server.url, health_interval=60)
+        assert not client.is_available()
+
+        client._mark(True)
+        with pytest.raises(RemoteOCRError, match="未初始化"):
+            client.classification(captcha_bytes())
+        assert not client.is_available()
+        assert ocr_server.posts == ['/ocr']
+        client.close()
+
+    def test_initializes_fresh_server(self, ocr_server):
+        """配置了 init_options 时，健康检查为新启动的服务加载模型"""
+        ocr_server.initialized = False
+        client = RemoteOCRClient(ocr_server.url, init_options={'ocr': True})
+
+        assert client.is_available()
+        assert isinstance(client.classification(captcha_bytes()), str)
+        assert ocr_server.posts == ['/initialize', '/ocr']
+        client.close()
+
+    def test_solver_initializes_remote(self, ocr_server):
+        """识别代理首次使用时初始化尚未加载模型的服务，不加载本地模型"""
+        ocr_server.initialized = False
+        solver = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old",
+                                    remote_ocr_url=ocr_server.url)
+        result = solver.recognize_text(captcha_bytes())
+
+        assert result['variant'] == 'processed:remote'
+        assert ocr_server.posts == ['/initialize', '/ocr']
+        assert solver._model is None
+        solver.close()
+
+    def test_solver_prefers_remote(self, ocr_server):
+        """远程服务可用时不加载本地模型"""
+        solver = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old",
+                                    remote_ocr_url=ocr_server.url)
+        result = solver.recognize_text(captcha_bytes())
+
+        assert result['variant'] == 'processed:remote'
+        assert solver._model is None
+        solver.close()
+
+    def test_solver_falls_back_to_local_model(self, tiny_ocr_files):
+        """远程服务不可用时使用本地模型识别"""
+        from ddddocr import DdddOcr
+
+        model_path, charsets_path = tiny_ocr_files
+        solver = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old",
+                                    remote_ocr_url=f"http://127.0.0.1:{free_port()}")
+        solver.model = DdddOcr(show_ad=False, import_onnx_path=model_path, charsets_path=charsets_path)
+        result = solver.recognize_text(captcha_bytes())
+
+        assert result['variant'] == 'processed:old'
+        assert solver.remote_ocr.stats()['healthy'] is False
+        solver.close()
+
+    def test_bundled_api_server(self, tiny_ocr_files, tiny_ocr_engine):
+        """针对 python -m ddddocr api 启动的服务识别"""
+        pytest.importorskip('fastapi')
+        pytest.importorskip('uvicorn')
+
+        model_path, charsets_path = tiny_ocr_files
+        port = free_port()
+        vision_model = os.path.join(os.path.dirname(__file__), '..', 'vision_model')
+        process = subprocess.Popen([sys.executable, '-m', 'ddddocr', 'api', '--host', '127.0.0.1',
+                                    '--port', str(port)], cwd=vision_model,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # 新启动的服务没有加载模型，健康检查时按 init_options 初始化
+        client = RemoteOCRClient(f"http://127.0.0.1:{port}", timeout=10,
+                                 init_options={'import_onnx_path': model_path, 'charsets_path': charsets_path})
+        try:
+            deadline = time.monotonic() + 30
+            while not client.health_check():
+                assert time.monotonic() < deadline, "API服务启动超时"
+                time.sleep(0.2)
+
+            image = captcha_bytes()
+            result = client.classification(image, confidence=True)
+            assert result['text'] == tiny_ocr_engine.predict(image)
+        finally:
+            client.close()
+            process.terminate()
+            process.wait(10)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
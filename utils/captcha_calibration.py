@@ -0,0 +1,116 @@
+"""
+验证码置信度校准工具
+在已标注的验证码样本上评估识别置信度与实际正确率的关系，用于选择自动提交阈值
+
+样本目录中每个图片文件名的第一个下划线之前的部分为标注文本，例如：
+    a7kd_0001.png  ->  a7kd
+    3fx9.jpg       ->  3fx9
+"""
+
+import os
+import sys
+from typing import Any, Dict, Sequence, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+# 样本目录格式与 ddddocr 基准测试共用同一实现（ddddocr 位于 vision_model 目录）
+_vision_model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'vision_model')
+if _vision_model_path not in sys.path:
+    sys.path.insert(0, _vision_model_path)
+
+from ddddocr.utils.corpus import label_from_filename, load_corpus as load_labelled_corpus
+
+console = Console()
+
+# 默认评估的置信度阈值
+DEFAULT_THRESHOLDS = (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+
+def build_calibration_report(predictions: Sequence[Tuple[str, str, float]],
+                             thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+                             bins: int = 10, case_sensitive: bool = False) -> Dict[str, Any]:
+    """
+    根据识别结果生成校准报告
+
+    Args:
+        predictions: (标注文本, 识别文本, 置信度) 列表
+        thresholds: 需要评估的置信度阈值
+        bins: 可靠性分箱数量
+        case_sensitive: 比较标注与识别文本时是否区分大小写
+
+    Returns:
+        报告字典，包含总体正确率、各阈值的提交率/提交正确率，以及按置信度分箱的实际正确率
+    """
+    total = len(predictions)
+    if case_sensitive:
+        outcomes = [(label == text, confidence) for label, text, confidence in predictions]
+    else:
+        outcomes = [(label.lower() == text.lower(), confidence) for label, text, confidence in predictions]
+    correct_total = sum(1 for correct, _ in outcomes if correct)
+
+    threshold_rows = []
+    for threshold in thresholds:
+        accepted = [correct for correct, confidence in outcomes if confidence >= threshold]
+        accepted_correct = sum(accepted)
+        threshold_rows.append({
+            'threshold': threshold,
+            'submitted': len(accepted),
+            'submit_rate': len(accepted) / total if total else 0.0,
+            'submit_accuracy': accepted_correct / len(accepted) if accepted else 0.0,
+            # 被拦下但其实识别正确的样本，对应一次不必要的刷新
+            'rejected_correct': correct_total - accepted_correct,
+        })
+
+    bin_rows = []
+    for index in range(bins):
+        low, high = index / bins, (index + 1) / bins
+        members = [(correct, confidence) for correct, confidence in outcomes
+                   if low <= confidence < high or (index == bins - 1 and confidence == 1.0)]
+        if not members:
+            continue
+        bin_rows.append({
+            'range': (low, high),
+            'count': len(members),
+            'mean_confidence': sum(confidence for _, confidence in members) / len(members),
+            'accuracy': sum(1 for correct, _ in members if correct) / len(members),
+        })
+
+    return {
+        'samples': total,
+        'accuracy': correct_total / total if total else 0.0,
+        'thresholds': threshold_rows,
+        'bins': bin_rows,
+    }
+
+
+def display_calibration_report(report: Dict[str, Any]) -> None:
+    """
+    以表格形式输出校准报告
+
+    Args:
+        report: build_calibration_report 返回的报告
+    """
+    console.print(f"📊 样本数：{report['samples']}，整体正确率：{report['accuracy']:.1%}", style="cyan")
+
+    table = Table(title="置信度阈值评估")
+    table.add_column("阈值", style="cyan", justify="right")
+    table.add_column("提交数", justify="right")
+    table.add_column("提交率", justify="right")
+    table.add_column("提交正确率", style="green", justify="right")
+    table.add_column("误拦截（正确但被刷新）", style="yellow", justify="right")
+    for row in report['thresholds']:
+        table.add_row(f"{row['threshold']:.2f}", str(row['submitted']), f"{row['submit_rate']:.1%}",
+                      f"{row['submit_accuracy']:.1%}", str(row['rejected_correct']))
+    console.print(table)
+
+    table = Table(title="置信度可靠性")
+    table.add_column("置信度区间", style="cyan")
+    table.add_column("样本数", justify="right")
+    table.add_column("平均置信度", justify="right")
+    table.add_column("实际正确率", style="green", justify="right")
+    for row in report['bins']:
+        low, high = row['range']
+        table.add_row(f"[{low:.1f}, {high:.1f})", str(row['count']),
+                      f"{row['mean_confidence']:.2f}", f"{row['accuracy']:.1%}")
+    console.print(table)
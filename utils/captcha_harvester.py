@@ -0,0 +1,266 @@
+"""
+验证码样本采集工具
+保存识别过的验证码图片、识别结果、置信度以及服务器的判定结果（通过/拒绝），
+作为离线校准、基准测试和调优OCR流程的数据集
+
+存储结构（内容寻址，相同图片只保存一份）：
+    <root>/objects/<sha256前2位>/<sha256>.<扩展名>
+    <root>/index.db    SQLite索引
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from utils.captcha_profile import CaptchaProfile
+
+# 默认存储上限（字节）
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# 服务器判定结果
+VERDICT_ACCEPTED = 'accepted'
+VERDICT_REJECTED = 'rejected'
+
+
+def detect_image_extension(image_data: bytes) -> str:
+    """
+    根据文件头判断图片格式
+
+    Args:
+        image_data: 图片数据
+
+    Returns:
+        扩展名（不含点），无法识别时返回 bin
+    """
+    if image_data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if image_data.startswith(b'\xff\xd8'):
+        return 'jpg'
+    if image_data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if image_data.startswith(b'BM'):
+        return 'bmp'
+    return 'bin'
+
+
+class CaptchaHarvester:
+    """验证码样本库（线程安全）"""
+
+    def __init__(self, root_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        初始化样本库
+
+        Args:
+            root_dir: 存储目录
+            max_bytes: 图片总大小上限，超出时优先淘汰最早的未判定样本
+        """
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(root_dir, 'objects'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root_dir, 'index.db'), check_same_thread=False)
+        self._create_tables()
+
+    def _create_tables(self):
+        """创建索引表"""
+        with self._lock:
+            cursor = self.conn.cursor()
+
+            # 图片（按内容哈希去重）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256 TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at TIMESTAMP NOT NULL
+                )
+            ''')
+
+            # 每次识别记录
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS samples (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+                    source TEXT,
+                    predicted TEXT,
+                    confidence REAL,
+                    variant TEXT,
+                    submitted TEXT,
+                    verdict TEXT,
+                    created_at TIMESTAMP NOT NULL,
+                    verified_at TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_samples_sha256 ON samples(sha256)')
+
+            self.conn.commit()
+
+    def record(self, image_data: bytes, result: Dict[str, Any], submitted: str = "",
+               source: str = "captcha") -> int:
+        """
+        记录一次识别
+
+        Args:
+            image_data: 验证码图片数据
+            result: recognize_text 的识别结果
+            submitted: 实际提交的验证码（可能来自手动输入），未提交时为空
+            source: 来源（如 login、select）
+
+        Returns:
+            样本ID
+        """
+        sha256 = hashlib.sha256(image_data).hexdigest()
+        extension = detect_image_extension(image_data)
+        relative_path = os.path.join('objects', sha256[:2], f"{sha256}.{extension}")
+        now = datetime.now().isoformat()
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT 1 FROM blobs WHERE sha256 = ?', (sha256,))
+            if cursor.fetchone() is None:
+                full_path = os.path.join(self.root_dir, relative_path)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                # 先写临时文件再重命名，避免中断时留下不完整的图片
+                temp_path = f"{full_path}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(image_data)
+                os.replace(temp_path, full_path)
+                cursor.execute('INSERT INTO blobs (sha256, path, size, created_at) VALUES (?, ?, ?, ?)',
+                               (sha256, relative_path, len(image_data), now))
+
+            cursor.execute('''
+                INSERT INTO samples (sha256, source, predicted, confidence, variant, submitted, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (sha256, source, result.get('code', ''), float(result.get('confidence', 0.0)),
+                  result.get('variant'), submitted, now))
+            sample_id = cursor.lastrowid
+
+            self._enforce_size_cap(cursor, keep=sha256)
+            self.conn.commit()
+            return sample_id
+
+    def report_verdict(self, sample_id: int, accepted: bool) -> None:
+        """
+        记录服务器对提交验证码的判定结果
+
+        Args:
+            sample_id: 样本ID
+            accepted: 服务器是否接受了验证码
+        """
+        with self._lock:
+            self.conn.execute('UPDATE samples SET verdict = ?, verified_at = ? WHERE id = ?',
+                              (VERDICT_ACCEPTED if accepted else VERDICT_REJECTED,
+                               datetime.now().isoformat(), sample_id))
+            self.conn.commit()
+
+    def _enforce_size_cap(self, cursor: sqlite3.Cursor, keep: str) -> None:
+        """
+        超出存储上限时淘汰图片：先淘汰没有判定结果的，再按时间从早到晚淘汰
+
+        Args:
+            cursor: 数据库游标（调用方持有锁）
+            keep: 不淘汰的图片哈希（刚写入的图片）
+        """
+        cursor.execute('SELECT COALESCE(SUM(size), 0) FROM blobs')
+        total = cursor.fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        cursor.execute('''
+            SELECT b.sha256, b.path, b.size
+            FROM blobs b
+            WHERE b.sha256 != ?
+            ORDER BY EXISTS (SELECT 1 FROM samples s WHERE s.sha256 = b.sha256 AND s.verdict IS NOT NULL),
+                     b.created_at
+        ''', (keep,))
+        for sha256, path, size in cursor.fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root_dir, path))
+            except FileNotFoundError:
+                pass
+            cursor.execute('DELETE FROM samples WHERE sha256 = ?', (sha256,))
+            cursor.execute('DELETE FROM blobs WHERE sha256 = ?', (sha256,))
+            total -= size
+
+    @staticmethod
+    def is_exportable_code(code: str, profile: Optional[CaptchaProfile] = None) -> bool:
+        """
+        判断提交的验证码能否安全地用作导出文件名中的标注
+
+        只允许字母与数字（下划线会截断 label_from_filename 读出的标注，路径分隔符与 .. 会写到导出目录之外）；
+        指定验证码格式时还必须符合该格式（字符集、长度等），手动输入的错误内容不会进入样本目录。
+
+        Args:
+            code: 提交的验证码
+            profile: 验证码格式
+
+        Returns:
+            是否可以导出
+        """
+        if not code or not code.isalnum():
+            return False
+        return profile is None or profile.matches(code)
+
+    def export_labelled(self, directory: str, profile: Optional[CaptchaProfile] = None) -> int:
+        """
+        导出服务器判定通过的样本，文件名为 <验证码>_<哈希前8位>.<扩展名>，
+        可直接作为 calibrate-captcha 的样本目录；不能安全用作文件名的验证码跳过（见 is_exportable_code）
+
+        Args:
+            directory: 导出目录
+            profile: 验证码格式，指定时只导出符合格式的验证码
+
+        Returns:
+            导出的样本数量
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT DISTINCT s.submitted, b.sha256, b.path
+                FROM samples s JOIN blobs b ON s.sha256 = b.sha256
+                WHERE s.verdict = ? AND s.submitted != ''
+            ''', (VERDICT_ACCEPTED,)).fetchall()
+
+        exported = 0
+        for code, sha256, path in rows:
+            if not self.is_exportable_code(code, profile):
+                continue
+            extension = os.path.splitext(path)[1]
+            with open(os.path.join(self.root_dir, path), 'rb') as src:
+                data = src.read()
+            with open(os.path.join(directory, f"{code}_{sha256[:8]}{extension}"), 'wb') as dst:
+                dst.write(data)
+            exported += 1
+        return exported
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取样本库统计信息
+
+        Returns:
+            图片数、总大小、样本数以及各判定结果的数量
+        """
+        with self._lock:
+            blobs, total_bytes = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+            samples = self.conn.execute('SELECT COUNT(*) FROM samples').fetchone()[0]
+            verdicts = dict(self.conn.execute(
+                'SELECT verdict, COUNT(*) FROM samples WHERE verdict IS NOT NULL GROUP BY verdict'
+            ).fetchall())
+        return {
+            'images': blobs,
+            'bytes': total_bytes,
+            'samples': samples,
+            'accepted': verdicts.get(VERDICT_ACCEPTED, 0),
+            'rejected': verdicts.get(VERDICT_REJECTED, 0),
+        }
+
+    def close(self) -> None:
+        """关闭索引数据库"""
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,227 @@
+"""
+验证码格式配置
+描述验证码的字符集、长度、大小写规则与格式正则，用于约束解码并在提交前校验识别结果
+
+配置可以是内置名称（如 ybu），也可以是JSON文件路径：
+    {"name": "ybu", "charset": "0123456789abcdefghijklmnopqrstuvwxyz",
+     "length": 5, "case": "lower", "pattern": "[0-9a-z]{5}",
+     "preprocess": {"contrast": 2.5, "median_blur": 3}}
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, Optional, Tuple, Union
+
+# 大小写规则：sensitive（区分大小写）、lower / upper（不区分大小写，统一转换后提交）
+CASE_RULES = ('sensitive', 'lower', 'upper')
+
+# 内置验证码格式
+BUILTIN_PROFILES: Dict[str, Dict[str, Any]] = {
+    # 延边大学教务系统：5位小写字母与数字（如 3v3th）
+    'ybu': {
+        'charset': '0123456789abcdefghijklmnopqrstuvwxyz',
+        'length': 5,
+        'case': 'lower',
+        'pattern': '[0-9a-z]{5}',
+    },
+}
+
+
+def parse_expected_length(value: Optional[Union[int, str, Tuple[int, int]]]) -> Optional[Tuple[int, int]]:
+    """
+    解析验证码期望长度
+
+    Args:
+        value: 长度（如 4）、长度范围字符串（如 "4" 或 "4-5"）或 (最小, 最大) 元组/列表
+
+    Returns:
+        (最小长度, 最大长度)，未设置时返回None
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value, value
+    if isinstance(value, (tuple, list)):
+        return int(value[0]), int(value[1])
+
+    parts = str(value).split('-', 1)
+    low = int(parts[0])
+    high = int(parts[1]) if len(parts) > 1 else low
+    return low, high
+
+
+class CaptchaProfile:
+    """验证码格式"""
+
+    def __init__(self, name: str, charset: str = "",
+                 length: Optional[Union[int, str, Tuple[int, int]]] = None,
+                 case: str = 'sensitive', pattern: Optional[str] = None,
+                 preprocess: Optional[Dict[str, Any]] = None):
+        """
+        初始化验证码格式
+
+        Args:
+            name: 格式名称
+            charset: 允许的字符（为空时不限制）
+            length: 字符数（如 5 或 "4-5"）
+            case: 大小写规则（sensitive/lower/upper）
+            pattern: 规范化后的识别结果必须完整匹配的正则
+            preprocess: 预处理参数（覆盖验证码识别代理的默认预处理参数）
+
+        Raises:
+            ValueError: 当大小写规则或正则无效时
+        """
+        if case not in CASE_RULES:
+            raise ValueError(f"不支持的大小写规则: {case}，可选 {', '.join(CASE_RULES)}")
+        self.name = name
+        self.charset = charset
+        self.length = parse_expected_length(length)
+        self.case = case
+        self.pattern = pattern
+        self.preprocess = preprocess
+        try:
+            self._regex = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise ValueError(f"无效的验证码格式正则: {pattern}（{e}）") from e
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], name: str = "custom") -> 'CaptchaProfile':
+        """
+        从字典创建验证码格式
+
+        Args:
+            data: 配置字典
+            name: 字典中未指定名称时使用的名称
+
+        Returns:
+            验证码格式
+        """
+        return cls(name=data.get('name', name), charset=data.get('charset', ''),
+                   length=data.get('length'), case=data.get('case', 'sensitive'),
+                   pattern=data.get('pattern'), preprocess=data.get('preprocess'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为可写入JSON的字典
+
+        Returns:
+            配置字典
+        """
+        return {
+            'name': self.name,
+            'charset': self.charset,
+            'length': list(self.length) if self.length else None,
+            'case': self.case,
+            'pattern': self.pattern,
+            'preprocess': self.preprocess,
+        }
+
+    def save(self, path: str) -> None:
+        """
+        保存为JSON文件（可通过 CAPTCHA_PROFILE 指定该文件加载）
+
+        Args:
+            path: 文件路径
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @property
+    def decode_charset(self) -> Optional[str]:
+        """
+        解码时允许的字符（不区分大小写时同时允许大小写两种形式）
+
+        Returns:
+            字符串形式的字符集范围，不限制时返回None
+        """
+        if not self.charset:
+            return None
+        if self.case == 'sensitive':
+            return self.charset
+        return ''.join(dict.fromkeys(self.charset + self.charset.lower() + self.charset.upper()))
+
+    def normalize(self, code: str) -> str:
+        """
+        按大小写规则规范化识别结果
+
+        Args:
+            code: 识别文本
+
+        Returns:
+            规范化后的文本
+        """
+        code = code.strip()
+        if self.case == 'lower':
+            return code.lower()
+        if self.case == 'upper':
+            return code.upper()
+        return code
+
+    def violation(self, code: str) -> Optional[str]:
+        """
+        校验规范化后的识别结果
+
+        Args:
+            code: 识别文本
+
+        Returns:
+            不符合格式的原因，符合时返回None
+        """
+        if not code:
+            return "识别结果为空"
+        if self.length is not None:
+            low, high = self.length
+            if not low <= len(code) <= high:
+                expected = str(low) if low == high else f"{low}-{high}"
+                return f"长度 {len(code)} 不符合期望的 {expected} 位"
+        if self.charset:
+            invalid = sorted(set(code) - set(self.charset))
+            if invalid:
+                return f"包含字符集外的字符 {''.join(invalid)}"
+        if self._regex is not None and not self._regex.fullmatch(code):
+            return f"不匹配格式 {self.pattern}"
+        return None
+
+    def matches(self, code: str) -> bool:
+        """
+        判断规范化后的识别结果是否符合格式
+
+        Args:
+            code: 识别文本
+
+        Returns:
+            是否符合
+        """
+        return self.violation(code) is None
+
+
+def load_profile(value: Union[str, CaptchaProfile, None]) -> Optional[CaptchaProfile]:
+    """
+    加载验证码格式
+
+    Args:
+        value: 内置格式名称、JSON文件路径或已创建的格式
+
+    Returns:
+        验证码格式，未设置时返回None
+
+    Raises:
+        ValueError: 当格式名称未知或文件无效时
+    """
+    if value is None or isinstance(value, CaptchaProfile):
+        return value
+    if not value:
+        return None
+    if value in BUILTIN_PROFILES:
+        return CaptchaProfile.from_dict(BUILTIN_PROFILES[value], name=value)
+    if os.path.isfile(value):
+        try:
+            with open(value, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"验证码格式文件读取失败: {value}（{e}）") from e
+        return CaptchaProfile.from_dict(data, name=os.path.splitext(os.path.basename(value))[0])
+    raise ValueError(f"未知的验证码格式: {value}，可选内置格式 {', '.join(BUILTIN_PROFILES)} 或JSON文件路径")
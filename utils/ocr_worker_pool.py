@@ -0,0 +1,349 @@
+"""
+验证码识别进程池
+多用户部署时，在独立的工作进程中识别验证码，避免预处理与推理争抢Web服务进程的GIL
+
+- 每个工作进程启动时加载一次识别模型并预热
+- 各工作进程的ONNX推理线程数为 CPU核数 // 工作进程数，避免多个进程各自占满全部核心
+- 请求与结果通过管道传递（验证码图片只有几KB，无需共享内存）
+- 请求按优先级分派：登录验证码优先于选课验证码，同优先级先到先得
+- 工作进程全部无法重启时进程池标记为不可用：排队中的请求立即失败，新的请求被拒绝
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from rich.console import Console
+
+console = Console()
+
+# 请求优先级（数值越小越先处理）
+PRIORITY_LOGIN = 0
+PRIORITY_SELECT = 1
+
+# 验证码来源对应的优先级
+SOURCE_PRIORITIES = {
+    'login': PRIORITY_LOGIN,
+    'select': PRIORITY_SELECT,
+}
+
+# 关闭工作线程的哨兵（优先级最低，排在所有请求之后）
+_SHUTDOWN_PRIORITY = float('inf')
+
+# 识别函数工厂：在工作进程中调用一次，返回 识别函数(图片数据) -> 识别结果
+RecognizerFactory = Callable[[], Callable[[bytes], Dict[str, Any]]]
+
+
+def create_solver_recognizer() -> Callable[[bytes], Dict[str, Any]]:
+    """
+    默认识别函数工厂：在工作进程中创建AI模式的验证码识别代理并预热
+
+    Returns:
+        识别函数
+    """
+    from agents.captcha_solver_agent import CaptchaSolverAgent
+
+    # 识别结果由主进程缓存（服务器判定在主进程回填），工作进程不重复缓存
+    solver = CaptchaSolverAgent(mode="ai", debug=False, cache_size=0)
+    solver.warm_up(background=False)
+    return solver.recognize_text
+
+
+def _worker_main(conn, recognizer_factory: RecognizerFactory, intra_op_threads: int) -> None:
+    """
+    工作进程入口：加载模型后循环处理请求
+
+    Args:
+        conn: 与主进程通信的管道
+        recognizer_factory: 识别函数工厂
+        intra_op_threads: 本进程ONNX推理的算子内线程数（已设置环境变量 DDDDOCR_INTRA_OP_THREADS 时以其为准）
+    """
+    # 在加载模型之前设置，ModelLoader 创建会话时读取
+    os.environ.setdefault('DDDDOCR_INTRA_OP_THREADS', str(intra_op_threads))
+    try:
+        recognize = recognizer_factory()
+    except Exception as e:
+        conn.send(('error', str(e)))
+        return
+    conn.send(('ready', os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        request_id, image_data = message
+        start = time.perf_counter()
+        try:
+            result = dict(recognize(image_data))
+        except Exception as e:
+            result = {"code": "", "confidence": 0.0, "error": str(e)}
+        result["solve_time"] = time.perf_counter() - start
+        result["worker_pid"] = os.getpid()
+        conn.send((request_id, result))
+
+
+class OCRWorkerPool:
+    """验证码识别进程池（线程安全）"""
+
+    def __init__(self, workers: Optional[int] = None,
+                 recognizer_factory: RecognizerFactory = create_solver_recognizer,
+                 start_method: str = "spawn", ready_timeout: float = 120.0,
+                 intra_op_threads: Optional[int] = None):
+        """
+        初始化进程池并启动工作进程
+
+        Args:
+            workers: 工作进程数，默认读取环境变量 CAPTCHA_OCR_WORKERS，未设置时为CPU核数
+            recognizer_factory: 识别函数工厂（必须可被pickle，即模块级函数）
+            start_method: 进程启动方式；默认spawn，避免在已创建线程和ONNX会话的进程中fork
+            ready_timeout: 等待工作进程加载模型的超时时间（秒）
+            intra_op_threads: 每个工作进程的ONNX推理线程数，默认为 CPU核数 // 工作进程数（至少为1）
+
+        Raises:
+            RuntimeError: 当工作进程启动失败时
+        """
+        if workers is None:
+            workers = int(os.getenv('CAPTCHA_OCR_WORKERS') or 0) or os.cpu_count() or 1
+        self.workers = max(1, workers)
+        self.recognizer_factory = recognizer_factory
+        self.ready_timeout = ready_timeout
+        if intra_op_threads is None:
+            intra_op_threads = (os.cpu_count() or 1) // self.workers
+        self.intra_op_threads = max(1, intra_op_threads)
+
+        self._context = multiprocessing.get_context(start_method)
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._closed = False
+        # 所有工作进程都无法重启时记录原因，进程池不再接受请求
+        self._broken: Optional[str] = None
+        self._alive_dispatchers = self.workers
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'restarts': 0}
+
+        self._processes: List[Any] = [None] * self.workers
+        self._connections: List[Any] = [None] * self.workers
+        try:
+            for index in range(self.workers):
+                self._start_worker(index)
+        except Exception:
+            # 之后的工作进程启动失败：停止已经启动的进程，不留下孤儿进程
+            self._stop_workers(timeout=5.0)
+            raise
+
+        self._threads = [threading.Thread(target=self._dispatch_loop, args=(index,),
+                                          name=f"ocr-dispatch-{index}", daemon=True)
+                         for index in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+        console.print(f"🧵 验证码识别进程池已启动：{self.workers} 个工作进程", style="green")
+
+    @classmethod
+    def from_env(cls) -> Optional['OCRWorkerPool']:
+        """
+        按环境变量 CAPTCHA_OCR_WORKERS 创建进程池
+
+        Returns:
+            进程池；未设置或为0时返回None（在Web进程内识别）
+        """
+        workers = int(os.getenv('CAPTCHA_OCR_WORKERS') or 0)
+        if workers <= 0:
+            return None
+        return cls(workers)
+
+    def _start_worker(self, index: int) -> None:
+        """
+        启动（或重启）一个工作进程并等待模型加载完成
+
+        Args:
+            index: 工作进程序号
+
+        Raises:
+            RuntimeError: 当工作进程加载失败或超时时
+        """
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main,
+                                        args=(child_conn, self.recognizer_factory, self.intra_op_threads),
+                                        name=f"ocr-worker-{index}", daemon=True)
+        process.start()
+        child_conn.close()
+
+        if not parent_conn.poll(self.ready_timeout):
+            process.terminate()
+            raise RuntimeError(f"验证码识别进程 {index} 启动超时")
+        status, detail = parent_conn.recv()
+        if status != 'ready':
+            process.join()
+            raise RuntimeError(f"验证码识别进程 {index} 启动失败：{detail}")
+
+        self._processes[index] = process
+        self._connections[index] = parent_conn
+
+    def _dispatch_loop(self, index: int) -> None:
+        """
+        分派线程：每个工作进程对应一个线程，空闲时取出优先级最高的请求交给该进程
+
+        Args:
+            index: 工作进程序号
+        """
+        while True:
+            priority, _, future, image_data = self._queue.get()
+            if priority == _SHUTDOWN_PRIORITY:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                connection = self._connections[index]
+                connection.send((id(future), image_data))
+                _, result = connection.recv()
+                future.set_result(result)
+                with self._lock:
+                    self._stats['completed'] += 1
+            except (EOFError, OSError) as e:
+                # 工作进程异常退出：本次请求失败，重启进程后继续服务
+                future.set_exception(RuntimeError(f"验证码识别进程异常退出：{e}"))
+                with self._lock:
+                    self._stats['failed'] += 1
+                    self._stats['restarts'] += 1
+                try:
+                    self._start_worker(index)
+                except Exception as restart_error:
+                    console.print(f"❌ 验证码识别进程重启失败：{restart_error}", style="red")
+                    self._dispatcher_exited(f"验证码识别进程重启失败：{restart_error}")
+                    break
+    
+    def _dispatcher_exited(self, reason: str) -> None:
+        """
+        分派线程因工作进程无法重启而退出；最后一个退出时标记进程池不可用并使排队中的请求失败
+        
+        Args:
+            reason: 退出原因
+        """
+        with self._lock:
+            self._alive_dispatchers -= 1
+            if self._alive_dispatchers > 0:
+                return
+            self._broken = reason
+            # 持有锁时清空队列，submit 无法在清空之后再放入请求
+            while True:
+                try:
+                    priority, _, future, _ = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if priority != _SHUTDOWN_PRIORITY and future.set_running_or_notify_cancel():
+                    future.set_exception(RuntimeError(f"验证码识别进程池不可用：{reason}"))
+                    self._stats['failed'] += 1
+        console.print(f"❌ 验证码识别进程池不可用：{reason}", style="red")
+    
+    def is_broken(self) -> bool:
+        """
+        检查进程池是否因工作进程无法重启而不可用
+        
+        Returns:
+            是否不可用
+        """
+        return self._broken is not None
+
+    def submit(self, image_data: bytes, priority: int = PRIORITY_SELECT) -> Future:
+        """
+        提交识别请求
+
+        Args:
+            image_data: 验证码图片数据
+            priority: 优先级（PRIORITY_LOGIN / PRIORITY_SELECT，数值越小越先处理）
+
+        Returns:
+            识别结果的Future，结果附带 solve_time（工作进程内识别秒数）
+
+        Raises:
+            RuntimeError: 当进程池已关闭或不可用时
+        """
+        if self._closed:
+            raise RuntimeError("验证码识别进程池已关闭")
+        future: Future = Future()
+        with self._lock:
+            if self._broken is not None:
+                raise RuntimeError(f"验证码识别进程池不可用：{self._broken}")
+            self._queue.put((priority, next(self._sequence), future, image_data))
+            self._stats['submitted'] += 1
+        return future
+
+    async def recognize_async(self, image_data: bytes, priority: int = PRIORITY_SELECT,
+                              timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        异步识别验证码
+
+        Args:
+            image_data: 验证码图片数据
+            priority: 优先级
+            timeout: 超时时间（秒），超时后尚未开始的请求会被取消
+
+        Returns:
+            识别结果
+
+        Raises:
+            asyncio.TimeoutError: 当超时时
+        """
+        future = self.submit(image_data, priority)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取进程池统计信息
+
+        Returns:
+            工作进程数、可用工作进程数、是否不可用、排队请求数以及已提交、完成、失败、重启次数
+        """
+        with self._lock:
+            return dict(self._stats, workers=self.workers, alive_workers=self._alive_dispatchers,
+                        broken=self._broken is not None, queued=self._queue.qsize())
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        关闭进程池：已排队的请求处理完后停止工作进程
+
+        Args:
+            timeout: 等待每个工作进程退出的时间（秒）
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        for _ in self._threads:
+            self._queue.put((_SHUTDOWN_PRIORITY, next(self._sequence), None, None))
+        for thread in self._threads:
+            thread.join(timeout)
+        self._stop_workers(timeout)
+
+    def _stop_workers(self, timeout: float) -> None:
+        """
+        通知工作进程退出，超时未退出时强制终止
+
+        Args:
+            timeout: 等待每个工作进程退出的时间（秒）
+        """
+        for connection, process in zip(self._connections, self._processes):
+            try:
+                connection.send(None)
+            except (OSError, AttributeError):
+                pass
+            if process is not None:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
@@ -0,0 +1,264 @@
+"""
+验证码预处理参数搜索
+在已标注的验证码样本上网格/随机搜索预处理参数（红线容差、对比度、中值滤波、二值化、颜色过滤），
+按"首次提交即正确"的比例排序，并将最优参数写入验证码格式文件供识别代理加载
+
+每组参数在独立的工作进程中评估（spawn方式启动，每个进程加载一次模型并使用单线程推理），
+样本在进程启动时传入一次，之后只传递参数与评估结果。
+"""
+
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+from utils.captcha_profile import CaptchaProfile
+
+console = Console()
+
+# 默认搜索空间（各参数的候选值）
+DEFAULT_SEARCH_SPACE: Dict[str, List[Any]] = {
+    'red_line_tolerance': [None, 10, 20, 30, 40],
+    'contrast': [1.0, 1.5, 2.0, 2.5, 3.0],
+    'median_blur': [0, 3],
+    'binarize': [None, 'otsu'],
+    'color_filter': [None, ['black', 'blue']],
+}
+
+# 模型工厂：在工作进程中调用一次，返回具有 classification 方法的识别模型
+ModelFactory = Callable[[], Any]
+
+# 工作进程内的识别代理与样本（由 _init_worker 设置）
+_worker_solver = None
+_worker_samples: List[Tuple[str, bytes]] = []
+_worker_case_sensitive = False
+
+
+def create_default_model(beta: bool = False, import_onnx_path: str = "", charsets_path: str = ""):
+    """
+    默认模型工厂：创建单线程推理的DdddOcr模型（多个工作进程并行时避免线程争抢）
+
+    Args:
+        beta: 是否使用beta模型
+        import_onnx_path: 自定义模型路径
+        charsets_path: 自定义字符集路径
+
+    Returns:
+        DdddOcr实例
+
+    Raises:
+        RuntimeError: 当DdddOcr模块不可用时
+    """
+    from agents.captcha_solver_agent import _import_ddddocr
+
+    ddddocr = _import_ddddocr()
+    if ddddocr is None:
+        raise RuntimeError("DdddOcr模块不可用")
+    return ddddocr.DdddOcr(show_ad=False, beta=beta, import_onnx_path=import_onnx_path,
+                           charsets_path=charsets_path, session_options={'intra_op_num_threads': 1})
+
+
+def grid_candidates(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    生成搜索空间内的全部参数组合
+
+    Args:
+        space: 参数名到候选值列表的映射
+
+    Returns:
+        参数组合列表
+    """
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_candidates(space: Dict[str, Sequence[Any]], trials: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    从搜索空间中随机抽取不重复的参数组合
+
+    Args:
+        space: 参数名到候选值列表的映射
+        trials: 抽取数量（超过组合总数时返回全部组合）
+        seed: 随机种子
+
+    Returns:
+        参数组合列表
+    """
+    candidates = grid_candidates(space)
+    if trials >= len(candidates):
+        return candidates
+    return random.Random(seed).sample(candidates, trials)
+
+
+def _init_worker(model_factory: ModelFactory, samples: List[Tuple[str, bytes]],
+                 profile_data: Optional[Dict[str, Any]], confidence_threshold: float,
+                 case_sensitive: bool) -> None:
+    """
+    工作进程初始化：加载模型并创建只识别主变体的识别代理
+
+    Args:
+        model_factory: 模型工厂
+        samples: (标注文本, 图片数据) 列表
+        profile_data: 验证码格式字典
+        confidence_threshold: 自动提交的置信度阈值
+        case_sensitive: 比较标注与识别文本时是否区分大小写
+    """
+    global _worker_solver, _worker_samples, _worker_case_sensitive
+    from agents import captcha_solver_agent
+    from agents.captcha_solver_agent import CaptchaSolverAgent
+
+    # 评估数百组参数时不输出逐条识别日志
+    captcha_solver_agent.console.quiet = True
+    profile = CaptchaProfile.from_dict(profile_data) if profile_data else None
+    solver = CaptchaSolverAgent(mode="ai", debug=False, variants="processed:old", profile=profile,
+                                confidence_threshold=confidence_threshold, cache_size=0)
+    # 只评估本地模型的预处理效果，不使用远程识别服务
+    solver.remote_ocr = None
+    solver.model = model_factory()
+
+    _worker_solver = solver
+    _worker_samples = samples
+    _worker_case_sensitive = case_sensitive
+
+
+def _evaluate(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在工作进程中评估一组预处理参数
+
+    Args:
+        params: 预处理参数
+
+    Returns:
+        评估结果：正确率、首次提交即正确的比例、提交错误的比例与平均识别耗时
+    """
+    solver = _worker_solver
+    solver.preprocess_params = params
+    correct = first_try = wrong_submit = 0
+    start = time.perf_counter()
+    for label, image_data in _worker_samples:
+        result = solver.recognize_text(image_data)
+        code = result.get('code', '')
+        if solver.profile is not None:
+            label = solver.profile.normalize(label)
+        is_correct = bool(code) and (code == label if _worker_case_sensitive else code.lower() == label.lower())
+        submitted = solver.is_confident(result)
+        correct += is_correct
+        first_try += submitted and is_correct
+        wrong_submit += submitted and not is_correct
+    elapsed = time.perf_counter() - start
+
+    total = len(_worker_samples)
+    return {
+        'params': params,
+        'accuracy': correct / total if total else 0.0,
+        'first_try_rate': first_try / total if total else 0.0,
+        'wrong_submit_rate': wrong_submit / total if total else 0.0,
+        'mean_ms': elapsed * 1000 / total if total else 0.0,
+    }
+
+
+def search_preprocessing(samples: List[Tuple[str, bytes]], candidates: List[Dict[str, Any]],
+                         model_factory: ModelFactory = create_default_model,
+                         profile: Optional[CaptchaProfile] = None, workers: Optional[int] = None,
+                         confidence_threshold: float = 0.5, case_sensitive: bool = False) -> Dict[str, Any]:
+    """
+    在样本上评估各组预处理参数
+
+    默认参数总是作为基线参与评估。结果按首次提交即正确的比例、正确率、提交错误比例排序。
+
+    Args:
+        samples: (标注文本, 图片数据) 列表
+        candidates: 参数组合列表
+        model_factory: 模型工厂（多进程时必须可被pickle，即模块级函数或其partial）
+        profile: 验证码格式（约束解码与校验，同时作为输出格式的基础）
+        workers: 工作进程数，默认为CPU核数；为1时在当前进程中评估
+        confidence_threshold: 自动提交的置信度阈值
+        case_sensitive: 比较标注与识别文本时是否区分大小写
+
+    Returns:
+        报告字典：samples、results（已排序）、best、baseline
+    """
+    from agents.captcha_solver_agent import DEFAULT_PREPROCESS_PARAMS
+
+    baseline = dict(DEFAULT_PREPROCESS_PARAMS)
+    full_candidates = [baseline] + [{**DEFAULT_PREPROCESS_PARAMS, **params} for params in candidates]
+    # 去除重复组合（列表值转为元组后比较）
+    unique: Dict[Any, Dict[str, Any]] = {}
+    for params in full_candidates:
+        key = tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                           for name, value in params.items()))
+        unique.setdefault(key, params)
+    full_candidates = list(unique.values())
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(full_candidates)))
+    initargs = (model_factory, samples, profile.to_dict() if profile else None,
+                confidence_threshold, case_sensitive)
+    if workers == 1:
+        _init_worker(*initargs)
+        results = [_evaluate(params) for params in full_candidates]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=initargs) as executor:
+            results = list(executor.map(_evaluate, full_candidates))
+
+    baseline_result = results[0]
+    results.sort(key=lambda row: (-row['first_try_rate'], -row['accuracy'], row['wrong_submit_rate']))
+    return {
+        'samples': len(samples),
+        'candidates': len(full_candidates),
+        'workers': workers,
+        'results': results,
+        'best': results[0],
+        'baseline': baseline_result,
+    }
+
+
+def build_tuned_profile(report: Dict[str, Any], profile: Optional[CaptchaProfile] = None,
+                        name: str = "tuned") -> CaptchaProfile:
+    """
+    将搜索得到的最优预处理参数写入验证码格式
+
+    Args:
+        report: search_preprocessing 返回的报告
+        profile: 基础验证码格式（字符集、长度等保持不变）
+        name: 未给出基础格式时的格式名称
+
+    Returns:
+        带预处理参数的验证码格式
+    """
+    data = profile.to_dict() if profile else {'name': name}
+    data['preprocess'] = dict(report['best']['params'])
+    return CaptchaProfile.from_dict(data, name=name)
+
+
+def display_search_report(report: Dict[str, Any], top: int = 5) -> None:
+    """
+    以表格形式输出搜索结果
+
+    Args:
+        report: search_preprocessing 返回的报告
+        top: 显示的结果数
+    """
+    console.print(f"📊 样本数：{report['samples']}，参数组合：{report['candidates']}，"
+                  f"工作进程：{report['workers']}", style="cyan")
+
+    table = Table(title="预处理参数搜索结果")
+    table.add_column("排名", style="cyan", justify="right")
+    table.add_column("首次提交正确", style="green", justify="right")
+    table.add_column("正确率", justify="right")
+    table.add_column("提交错误", style="yellow", justify="right")
+    table.add_column("平均耗时", justify="right")
+    table.add_column("参数")
+    rows = [(str(index + 1), row) for index, row in enumerate(report['results'][:top])]
+    rows.append(("基线", report['baseline']))
+    for rank, row in rows:
+        params = ', '.join(f"{name}={value}" for name, value in row['params'].items() if name != 'red_line_color')
+        table.add_row(rank, f"{row['first_try_rate']:.1%}", f"{row['accuracy']:.1%}",
+                      f"{row['wrong_submit_rate']:.1%}", f"{row['mean_ms']:.1f}ms", params)
+    console.print(table)
@@ -0,0 +1,152 @@
+"""
+验证码识别结果缓存
+重试、刷新循环与多个识别变体可能多次识别同一张验证码，按解码后像素的哈希缓存识别结果，
+相同图片不再重复预处理与推理
+
+- 容量有限的LRU缓存（线程安全），超出容量时淘汰最久未使用的结果
+- 提交后回填服务器判定：被接受的结果标记为已验证，被拒绝的结果立即移出缓存，
+  并记录 (图片, 验证码) 组合，之后不会再从缓存返回或自动提交该验证码
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# 默认缓存容量（验证码数量）
+DEFAULT_CACHE_SIZE = 256
+
+
+def pixel_hash(pixels: np.ndarray, salt: str = "") -> str:
+    """
+    计算解码后像素的哈希（与图片编码格式、元数据无关）
+
+    Args:
+        pixels: 图片数组
+        salt: 附加到哈希中的字符串（如预处理参数，参数不同时结果不共享）
+
+    Returns:
+        十六进制哈希字符串
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{pixels.shape}{pixels.dtype}{salt}".encode('utf-8'))
+    digest.update(np.ascontiguousarray(pixels).data)
+    return digest.hexdigest()
+
+
+class RecognitionCache:
+    """识别结果LRU缓存（线程安全）"""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        初始化缓存
+
+        Args:
+            max_size: 最多缓存的验证码数量
+        """
+        self.max_size = max(1, max_size)
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        # 被服务器拒绝的 (图片哈希, 验证码)，容量与缓存相同
+        self._rejected: 'OrderedDict[Tuple[str, str], None]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'rejected': 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        查找识别结果
+
+        Args:
+            key: 图片哈希
+
+        Returns:
+            识别结果副本（附带 cached=True 与 accepted 判定），未命中时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return dict(entry['result'], cached=True, accepted=entry['accepted'])
+
+    def put(self, key: str, result: Dict[str, Any]) -> bool:
+        """
+        缓存识别结果（空结果、出错的结果与已被拒绝的验证码不缓存）
+
+        Args:
+            key: 图片哈希
+            result: 识别结果
+
+        Returns:
+            是否已缓存
+        """
+        code = result.get('code')
+        if not code or result.get('error'):
+            return False
+        stored = {name: value for name, value in result.items() if name not in ('cached', 'accepted')}
+        with self._lock:
+            if (key, code) in self._rejected:
+                return False
+            self._entries[key] = {'result': stored, 'accepted': None}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return True
+
+    def report(self, key: str, code: str, accepted: bool) -> None:
+        """
+        回填服务器对验证码的判定
+
+        Args:
+            key: 图片哈希
+            code: 实际提交的验证码
+            accepted: 服务器是否接受
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if accepted:
+                if entry is not None and entry['result'].get('code') == code:
+                    entry['accepted'] = True
+                return
+            if entry is not None and entry['result'].get('code') == code:
+                del self._entries[key]
+            self._rejected[(key, code)] = None
+            self._rejected.move_to_end((key, code))
+            while len(self._rejected) > self.max_size:
+                self._rejected.popitem(last=False)
+            self._stats['rejected'] += 1
+
+    def was_rejected(self, key: str, code: str) -> bool:
+        """
+        判断验证码是否曾被服务器拒绝
+
+        Args:
+            key: 图片哈希
+            code: 验证码
+
+        Returns:
+            是否被拒绝过
+        """
+        with self._lock:
+            return (key, code) in self._rejected
+
+    def clear(self) -> None:
+        """清空缓存（保留统计与被拒绝记录）"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            容量、当前大小、命中数、未命中数、命中率、淘汰数与被拒绝数
+        """
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(self._stats, size=len(self._entries), max_size=self.max_size,
+                        hit_rate=self._stats['hits'] / lookups if lookups else 0.0)
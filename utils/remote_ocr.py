@@ -0,0 +1,244 @@
+"""
+远程验证码识别客户端
+调用 ddddocr API 服务（python -m ddddocr api）的 /ocr 接口，使多个Web/CLI进程共享同一个已预热的模型服务
+
+- 使用带连接池的 requests.Session，连接保持复用，避免每个验证码重新握手
+- 每次请求都有超时；请求失败后标记服务不可用，在下一次健康检查通过前不再请求
+- 健康检查通过 /status 确认OCR模型已加载；新启动的服务尚未加载模型时，按给定配置调用 /initialize
+- 接口与 DdddOcr.classification 一致，可以直接替代本地模型
+"""
+
+import base64
+import io
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+# 默认请求超时（秒）
+DEFAULT_REMOTE_TIMEOUT = 3.0
+# 服务不可用后重新进行健康检查的间隔（秒）
+DEFAULT_HEALTH_INTERVAL = 30.0
+# 默认连接池大小（同时进行的远程识别数）
+DEFAULT_POOL_SIZE = 4
+# 可能自行恢复的HTTP错误（超时、限流），不标记服务不可用
+TRANSIENT_STATUS_CODES = (408, 429)
+
+
+class RemoteOCRError(Exception):
+    """远程识别失败（连接失败、超时或服务返回错误）"""
+    pass
+
+
+class RemoteOCRClient:
+    """ddddocr API 服务客户端（线程安全）"""
+
+    def __init__(self, base_url: str, timeout: float = DEFAULT_REMOTE_TIMEOUT,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 health_interval: float = DEFAULT_HEALTH_INTERVAL,
+                 init_options: Optional[Dict[str, Any]] = None):
+        """
+        初始化客户端
+
+        Args:
+            base_url: 服务地址（如 http://127.0.0.1:8000）
+            timeout: 单次请求超时（秒）
+            pool_size: 连接池大小
+            health_interval: 服务不可用后重新检查的间隔（秒）
+            init_options: 服务尚未加载OCR模型时传给 /initialize 的配置；为None时不初始化，
+                视为服务不可用
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.init_options = init_options
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._healthy: Optional[bool] = None
+        self._checked_at = 0.0
+        self._stats = {'requests': 0, 'failures': 0}
+
+    @staticmethod
+    def encode_image(image: Union[bytes, np.ndarray, Image.Image]) -> str:
+        """
+        将图片编码为base64字符串（数组与PIL图片先编码为PNG）
+
+        Args:
+            image: 图片字节数据、numpy数组或PIL图片
+
+        Returns:
+            base64字符串
+        """
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        if isinstance(image, Image.Image):
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG')
+            image = buffer.getvalue()
+        return base64.b64encode(image).decode('ascii')
+
+    def _mark(self, healthy: bool) -> None:
+        with self._lock:
+            self._healthy = healthy
+            self._checked_at = time.monotonic()
+
+    def _ocr_loaded(self) -> bool:
+        """
+        请求 /status 检查服务是否已加载OCR模型（/health 只说明服务在运行）
+
+        Returns:
+            OCR模型是否已加载
+
+        Raises:
+            requests.RequestException: 当请求失败时
+            ValueError: 当响应不是JSON时
+        """
+        response = self.session.get(f"{self.base_url}/status", timeout=self.timeout)
+        return response.ok and 'ocr' in (response.json().get('loaded_models') or [])
+
+    def health_check(self) -> bool:
+        """
+        检查服务是否可以识别：服务在运行且已加载OCR模型；
+        尚未加载且配置了 init_options 时先请求 /initialize
+
+        Returns:
+            服务是否可用
+        """
+        try:
+            response = self.session.get(f"{self.base_url}/health", timeout=self.timeout)
+            healthy = response.ok and response.json().get('status') == 'healthy'
+            if healthy and not self._ocr_loaded():
+                healthy = False
+                if self.init_options is not None:
+                    self._post('/initialize', dict(self.init_options))
+                    healthy = self._ocr_loaded()
+        except (requests.RequestException, ValueError, RemoteOCRError):
+            healthy = False
+        self._mark(healthy)
+        return healthy
+
+    def is_available(self) -> bool:
+        """
+        判断是否应当使用远程服务：首次使用或上次失败超过检查间隔时重新进行健康检查
+
+        Returns:
+            服务是否可用
+        """
+        with self._lock:
+            healthy = self._healthy
+            stale = time.monotonic() - self._checked_at >= self.health_interval
+        if healthy is None or (not healthy and stale):
+            return self.health_check()
+        return healthy
+
+    def initialize(self, **options: Any) -> Dict[str, Any]:
+        """
+        请求 /initialize 让服务加载模型（参数与 InitializeRequest 相同）
+
+        Returns:
+            服务返回的数据
+
+        Raises:
+            RemoteOCRError: 当初始化失败时
+        """
+        return self._post('/initialize', options)
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        发送POST请求并解析 APIResponse
+
+        Args:
+            path: 接口路径
+            payload: 请求体
+
+        Returns:
+            APIResponse 的 data 字段
+
+        Raises:
+            RemoteOCRError: 当请求失败或服务返回错误时
+        """
+        with self._lock:
+            self._stats['requests'] += 1
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+            body = response.json()
+        except (requests.RequestException, ValueError) as e:
+            # 连接失败或超时：在下一次健康检查通过前不再请求
+            self._mark(False)
+            with self._lock:
+                self._stats['failures'] += 1
+            raise RemoteOCRError(f"远程识别服务请求失败: {e}") from e
+
+        if not response.ok or not body.get('success'):
+            with self._lock:
+                self._stats['failures'] += 1
+            if 400 <= response.status_code < 500 and response.status_code not in TRANSIENT_STATUS_CODES:
+                # 请求本身被拒绝（如模型未初始化）：重试同样会失败，重新检查前不再请求
+                self._mark(False)
+            message = body.get('message') or body.get('detail') or response.reason
+            raise RemoteOCRError(f"远程识别服务返回错误: {message}")
+        return body.get('data') or {}
+
+    def classification(self, img: Union[bytes, np.ndarray, Image.Image], png_fix: bool = False,
+                       charset_range: Optional[Union[int, str]] = None,
+                       confidence: bool = False,
+                       expected_length: Optional[Tuple[int, int]] = None) -> Union[str, Dict[str, Any]]:
+        """
+        远程识别验证码（与 DdddOcr.classification 的返回格式一致）
+
+        Args:
+            img: 图片字节数据、numpy数组或PIL图片
+            png_fix: 是否修复PNG透明背景问题
+            charset_range: 字符集范围限制
+            confidence: 是否返回逐字符置信度
+            expected_length: 期望字符数范围 (最少, 最多)
+
+        Returns:
+            识别文本；confidence为True时返回 {text, confidence, char_probabilities, min_char_probability}
+
+        Raises:
+            RemoteOCRError: 当远程识别失败时
+        """
+        data = self._post('/ocr', {
+            'image': self.encode_image(img),
+            'png_fix': png_fix,
+            'charset_range': charset_range,
+            'confidence': confidence,
+            'expected_length': list(expected_length) if expected_length else None,
+        })
+        text = data.get('text') or ''
+        if not confidence:
+            return text
+
+        char_probabilities = data.get('char_probabilities')
+        if char_probabilities is None:
+            raise RemoteOCRError("远程识别服务未返回逐字符置信度，请升级服务")
+        return {
+            'text': text,
+            'confidence': float(np.mean(char_probabilities)) if char_probabilities else 0.0,
+            'char_probabilities': char_probabilities,
+            'min_char_probability': min(char_probabilities) if char_probabilities else 0.0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取客户端统计信息
+
+        Returns:
+            服务地址、可用状态以及请求数、失败数
+        """
+        with self._lock:
+            return dict(self._stats, base_url=self.base_url, healthy=self._healthy)
+
+    def close(self) -> None:
+        """关闭连接池"""
+        self.session.close()
@@ -0,0 +1,78 @@
+"""
+启动耗时分析工具
+记录模块导入、模型加载等启动阶段的耗时，便于排查冷启动开销
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+
+class StartupProfile:
+    """启动阶段耗时记录器（线程安全，后台预热线程也可记录）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings: List[Tuple[str, float]] = []
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        记录一个阶段的耗时
+
+        Args:
+            stage: 阶段名称
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            self._timings.append((stage, seconds))
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """
+        测量代码块耗时并记录
+
+        Args:
+            stage: 阶段名称
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def get_timings(self) -> Dict[str, float]:
+        """
+        获取各阶段耗时（同名阶段累加）
+
+        Returns:
+            阶段名称到耗时（秒）的映射
+        """
+        timings: Dict[str, float] = {}
+        with self._lock:
+            for stage, seconds in self._timings:
+                timings[stage] = timings.get(stage, 0.0) + seconds
+        return timings
+
+    def display(self) -> None:
+        """以表格形式输出启动耗时"""
+        timings = self.get_timings()
+        if not timings:
+            console.print("⏱️ 暂无启动耗时记录", style="yellow")
+            return
+
+        table = Table(title="启动耗时分析")
+        table.add_column("阶段", style="cyan")
+        table.add_column("耗时 (ms)", style="green", justify="right")
+        for stage, seconds in timings.items():
+            table.add_row(stage, f"{seconds * 1000:.1f}")
+        console.print(table)
+
+
+# 全局启动耗时记录器
+startup_profile = StartupProfile()
@@ -50,7 +50,7 @@ from .utils.exceptions import DDDDOCRError, ModelLoadError, ImageProcessError, T
 # 导入新的模块化组件（供高级用户使用）
 from .core import OCREngine, DetectionEngine, SlideEngine
 from .preprocessing import ImageProcessor
-from .models import ModelLoader, CharsetManager
+from .models import ModelLoader, CharsetManager, ModelRegistry, get_model_registry
 
 # 公共接口
 __all__ = [
@@ -76,6 +76,8 @@ __all__ = [
     'ImageProcessor',
     'ModelLoader',
     'CharsetManager',
+    'ModelRegistry',
+    'get_model_registry',
     
     # 版本信息
     '__version__',
@@ -1,7 +1,10 @@
 # coding=utf-8
 """
 ddddocr命令行入口点
-支持通过 python -m ddddocr api 启动HTTP服务
+支持通过 python -m ddddocr api 启动HTTP服务，
+通过 python -m ddddocr bench <样本目录> 运行识别基准测试，
+通过 python -m ddddocr quantize <样本目录> 生成并校验INT8量化模型，
+通过 python -m ddddocr buckets <样本目录> 根据样本宽度分布推荐宽度桶
 """
 
 import sys
@@ -30,6 +33,54 @@ def main():
                            choices=["critical", "error", "warning", "info", "debug", "trace"],
                            help="日志级别 (默认: info)")
     
+    # 基准测试命令
+    bench_parser = subparsers.add_parser("bench", help="在已标注样本上评估识别正确率与分阶段耗时")
+    bench_parser.add_argument("corpus", help="样本目录（文件名下划线之前的部分为标注，如 a7kd_0001.png）")
+    bench_parser.add_argument("--models", default="old",
+                             help="逗号分隔的内置模型：old、beta (默认: old)")
+    bench_parser.add_argument("--onnx", help="自定义模型路径（与 --charsets 一起使用，作为 custom 模型参与评估）")
+    bench_parser.add_argument("--charsets", help="自定义模型字符集路径")
+    bench_parser.add_argument("--color-filter", help="额外评估颜色过滤配置，逗号分隔的预设颜色，如 red,blue")
+    bench_parser.add_argument("--charset-range", help="字符集范围限制，如 0-6 的数字或字符串")
+    bench_parser.add_argument("--png-fix", action="store_true", help="修复PNG透明背景")
+    bench_parser.add_argument("--repeat", type=int, default=1, help="每个样本重复识别次数 (默认: 1)")
+    bench_parser.add_argument("--warmup", type=int, default=3, help="计时前的预热样本数 (默认: 3)")
+    bench_parser.add_argument("--case-sensitive", action="store_true", help="区分大小写比较标注")
+    bench_parser.add_argument("--output", help="结果JSON输出路径")
+    
+    # 模型量化命令
+    quantize_parser = subparsers.add_parser("quantize", help="生成INT8量化模型，正确率校验通过后发布")
+    quantize_parser.add_argument("corpus", help="用于正确率校验（及静态量化校准）的标注样本目录")
+    quantize_parser.add_argument("--model", default="old", choices=["old", "beta"],
+                                help="要量化的内置模型 (默认: old)")
+    quantize_parser.add_argument("--onnx", help="要量化的自定义模型路径（与 --charsets 一起使用）")
+    quantize_parser.add_argument("--charsets", help="自定义模型字符集路径")
+    quantize_parser.add_argument("--method", default="dynamic", choices=["dynamic", "static"],
+                                help="量化方式 (默认: dynamic)")
+    quantize_parser.add_argument("--per-channel", action="store_true", help="按通道量化权重")
+    quantize_parser.add_argument("--tolerance", type=float, default=None,
+                                help="允许的完全正确率下降 (默认: 0.01)")
+    quantize_parser.add_argument("--calibration-size", type=int, default=32,
+                                help="静态量化使用的校准样本数 (默认: 32)")
+    quantize_parser.add_argument("--case-sensitive", action="store_true", help="区分大小写比较标注")
+    
+    # 宽度桶推荐命令
+    buckets_parser = subparsers.add_parser("buckets", help="根据样本的模型输入宽度分布推荐宽度桶")
+    buckets_parser.add_argument("corpus", help="验证码样本目录")
+    buckets_parser.add_argument("--model", default="old", choices=["old", "beta"],
+                               help="内置模型 (默认: old)")
+    buckets_parser.add_argument("--onnx", help="自定义模型路径（与 --charsets 一起使用）")
+    buckets_parser.add_argument("--charsets", help="自定义模型字符集路径")
+    buckets_parser.add_argument("--max-buckets", type=int, default=4, help="最多的桶数 (默认: 4)")
+    buckets_parser.add_argument("--min-agreement", type=float, default=1.0,
+                                help="每个桶与不分桶识别结果的最低一致率，低于该值的桶不推荐 (默认: 1.0)")
+    
+    # NMS基准测试命令
+    nms_parser = subparsers.add_parser("nms-bench", help="对比目标检测NMS后端的耗时")
+    nms_parser.add_argument("--counts", default="50,200,1000,3000", help="逗号分隔的候选框数量 (默认: 50,200,1000,3000)")
+    nms_parser.add_argument("--repeat", type=int, default=20, help="每种数量重复计时次数 (默认: 20)")
+    nms_parser.add_argument("--output", help="结果JSON输出路径")
+    
     # 颜色过滤器信息命令
     color_parser = subparsers.add_parser("colors", help="显示可用的颜色过滤器预设")
     
@@ -43,6 +94,14 @@ def main():
     
     if args.command == "api":
         start_api_server(args)
+    elif args.command == "bench":
+        run_bench(args)
+    elif args.command == "quantize":
+        run_quantize(args)
+    elif args.command == "buckets":
+        suggest_buckets(args)
+    elif args.command == "nms-bench":
+        run_nms_bench(args)
     elif args.command == "colors":
         show_color_presets()
     elif args.command == "version":
@@ -100,6 +159,148 @@ def start_api_server(args):
         sys.exit(1)
 
 
+def run_bench(args):
+    """运行识别基准测试"""
+    from .core import OCREngine
+    from .utils.benchmark import load_corpus, make_config, run_benchmark, save_report, format_report
+    
+    samples = load_corpus(args.corpus)
+    if not samples:
+        print(f"错误: 样本目录中没有图片: {args.corpus}")
+        sys.exit(1)
+    
+    try:
+        engines = {}
+        for name in filter(None, (m.strip() for m in args.models.split(","))):
+            if name not in ("old", "beta"):
+                print(f"错误: 未知模型 {name}，可选 old、beta")
+                sys.exit(1)
+            engines[name] = OCREngine(old=name == "old", beta=name == "beta")
+        if args.onnx:
+            engines["custom"] = OCREngine(import_onnx_path=args.onnx, charsets_path=args.charsets or "")
+    except Exception as e:
+        print(f"加载模型失败: {e}")
+        sys.exit(1)
+    
+    charset_range = args.charset_range
+    if charset_range is not None and charset_range.isdigit():
+        charset_range = int(charset_range)
+    configs = [make_config("raw", png_fix=args.png_fix, charset_range=charset_range)]
+    if args.color_filter:
+        colors = [c.strip() for c in args.color_filter.split(",") if c.strip()]
+        configs.append(make_config("color:" + "+".join(colors), png_fix=args.png_fix,
+                                   color_filter_colors=colors, charset_range=charset_range))
+    
+    report = run_benchmark(samples, engines, configs, repeat=args.repeat,
+                           warmup=args.warmup, case_sensitive=args.case_sensitive)
+    report["corpus"] = str(Path(args.corpus).resolve())
+    print(format_report(report))
+    
+    if args.output:
+        save_report(report, args.output)
+        print(f"结果已保存: {args.output}")
+
+
+def run_nms_bench(args):
+    """运行NMS基准测试"""
+    from .utils.benchmark import benchmark_nms, format_nms_report, save_report
+    
+    try:
+        counts = [int(c) for c in args.counts.split(",") if c.strip()]
+    except ValueError:
+        print(f"错误: 无效的候选框数量: {args.counts}")
+        sys.exit(1)
+    
+    report = benchmark_nms(counts, repeat=args.repeat)
+    print(format_nms_report(report))
+    
+    if args.output:
+        save_report(report, args.output)
+        print(f"结果已保存: {args.output}")
+
+
+def run_quantize(args):
+    """生成INT8量化模型并校验正确率"""
+    from .core import OCREngine
+    from .models.quantization import DEFAULT_ACCURACY_TOLERANCE, quantize_ocr_engine
+    from .utils.benchmark import load_corpus
+    
+    samples = load_corpus(args.corpus)
+    if not samples:
+        print(f"错误: 样本目录中没有图片: {args.corpus}")
+        sys.exit(1)
+    
+    tolerance = args.tolerance if args.tolerance is not None else DEFAULT_ACCURACY_TOLERANCE
+    try:
+        if args.onnx:
+            engine = OCREngine(import_onnx_path=args.onnx, charsets_path=args.charsets or "")
+        else:
+            engine = OCREngine(old=args.model == "old", beta=args.model == "beta")
+        report = quantize_ocr_engine(engine, samples, method=args.method, tolerance=tolerance,
+                                     per_channel=args.per_channel, calibration_size=args.calibration_size,
+                                     case_sensitive=args.case_sensitive)
+    except Exception as e:
+        print(f"量化失败: {e}")
+        sys.exit(1)
+    
+    baseline, quantized = report["baseline"], report["quantized"]
+    print(f"模型: {report['model']} -> {report['quantized_model']} ({report['method']})")
+    print(f"文件大小: {report['size_bytes']['fp32'] / 1024 / 1024:.2f}MB -> "
+          f"{report['size_bytes']['int8'] / 1024 / 1024:.2f}MB")
+    print(f"完全正确率: {baseline['exact_accuracy']:.1%} -> {quantized['exact_accuracy']:.1%} "
+          f"(容差 {tolerance:.1%})")
+    print(f"推理耗时 p50: {baseline['timings_ms']['inference']['p50']:.2f}ms -> "
+          f"{quantized['timings_ms']['inference']['p50']:.2f}ms")
+    
+    if not report["accepted"]:
+        print("正确率下降超出容差，量化模型未发布")
+        sys.exit(1)
+    print("量化模型已发布，可通过 DdddOcr(quantized=True) 加载")
+
+
+def suggest_buckets(args):
+    """根据样本宽度分布推荐宽度桶，并去掉在样本上改变识别结果的桶"""
+    from collections import Counter
+    from .core import OCREngine
+    from .utils.benchmark import load_corpus
+    
+    samples = load_corpus(args.corpus)
+    if not samples:
+        print(f"错误: 样本目录中没有图片: {args.corpus}")
+        sys.exit(1)
+    
+    try:
+        if args.onnx:
+            engine = OCREngine(import_onnx_path=args.onnx, charsets_path=args.charsets or "")
+        else:
+            engine = OCREngine(old=args.model == "old", beta=args.model == "beta")
+    except Exception as e:
+        print(f"加载模型失败: {e}")
+        sys.exit(1)
+    
+    widths = [engine.input_width(image_data) for _, image_data in samples]
+    buckets = OCREngine.suggest_width_buckets(widths, args.max_buckets)
+    
+    print(f"样本数: {len(widths)}，模型输入宽度: {min(widths)} ~ {max(widths)}")
+    for width, count in sorted(Counter(widths).items()):
+        print(f"  {width:5d}: {count}")
+    
+    # 分桶填充可能改变感受野跨列模型的结果，只推荐在样本上达到一致率要求的桶
+    images = [image_data for _, image_data in samples]
+    print(f"候选宽度桶: {','.join(str(bucket) for bucket in buckets)}")
+    for bucket, stats in engine.bucket_agreement(images, buckets).items():
+        if stats['samples']:
+            print(f"  {bucket:5d}: 一致 {stats['agreed']}/{stats['samples']}")
+    accepted, _ = engine.verify_width_buckets(images, buckets, args.min_agreement)
+    rejected = [bucket for bucket in buckets if bucket not in accepted]
+    if rejected:
+        print(f"改变识别结果的桶（已去掉）: {','.join(str(bucket) for bucket in rejected)}")
+    if not accepted:
+        print("没有不改变识别结果的宽度桶，建议不启用分桶")
+        return
+    print(f"推荐宽度桶: DDDDOCR_WIDTH_BUCKETS={','.join(str(bucket) for bucket in accepted)}")
+
+
 def show_color_presets():
     """显示颜色过滤器预设"""
     try:
@@ -185,6 +386,9 @@ DDDDOCR 使用示例
 6. 查看可用颜色:
    python -m ddddocr colors
 
+7. 识别基准测试（结果可保存为JSON，用于对比不同提交）:
+   python -m ddddocr bench ./captchas --models old,beta --output bench.json
+
 API服务使用示例:
 ===============
 
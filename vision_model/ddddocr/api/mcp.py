@@ -139,17 +139,14 @@ class MCPHandler:
                     # 解码base64图片
                     image_data = base64.b64decode(ocr_request.image)
                     
-                    # 设置字符集范围
-                    if ocr_request.charset_range is not None:
-                        self.service.ocr_instance.set_ranges(ocr_request.charset_range)
-                    
                     # 执行OCR识别
                     result = self.service.ocr_instance.classification(
                         image_data,
                         png_fix=ocr_request.png_fix,
                         probability=ocr_request.probability,
                         color_filter_colors=ocr_request.color_filter_colors,
-                        color_filter_custom_ranges=ocr_request.color_filter_custom_ranges
+                        color_filter_custom_ranges=ocr_request.color_filter_custom_ranges,
+                        charset_range=ocr_request.charset_range
                     )
                     
                 elif method == "ddddocr_detection":
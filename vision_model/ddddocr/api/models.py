@@ -17,6 +17,7 @@ class InitializeRequest(BaseModel):
     device_id: int = Field(0, description="GPU设备ID")
     import_onnx_path: str = Field("", description="自定义ONNX模型路径")
     charsets_path: str = Field("", description="自定义字符集路径")
+    session_options: Optional[Dict[str, Any]] = Field(None, description="ONNX运行时会话选项（线程数、执行模式、图优化级别、优化模型缓存目录）")
 
 
 class SwitchModelRequest(BaseModel):
@@ -40,6 +41,8 @@ class OCRRequest(BaseModel):
     color_filter_colors: Optional[List[str]] = Field(None, description="颜色过滤预设颜色列表")
     color_filter_custom_ranges: Optional[List[List[List[int]]]] = Field(None, description="自定义HSV颜色范围")
     charset_range: Optional[Union[int, str]] = Field(None, description="字符集范围限制")
+    confidence: bool = Field(False, description="是否返回逐字符置信度")
+    expected_length: Optional[Union[int, List[int]]] = Field(None, description="期望字符数（如 4 或 [4, 5]），解码时搜索满足长度的最优路径")
 
 
 class DetectionRequest(BaseModel):
@@ -80,6 +83,7 @@ class OCRResponse(BaseModel):
     """OCR识别响应模型"""
     text: Optional[str] = Field(None, description="识别的文本")
     probability: Optional[Dict[str, Any]] = Field(None, description="概率信息")
+    char_probabilities: Optional[List[float]] = Field(None, description="逐字符置信度")
 
 
 class DetectionResponse(BaseModel):
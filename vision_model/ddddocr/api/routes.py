@@ -92,21 +92,23 @@ def create_routes(app: FastAPI, service):
             except Exception:
                 raise HTTPException(status_code=400, detail="图片base64解码失败")
             
-            # 设置字符集范围
-            if request.charset_range is not None:
-                service.ocr_instance.set_ranges(request.charset_range)
-            
             # 执行OCR识别
             result = service.ocr_instance.classification(
                 image_data,
                 png_fix=request.png_fix,
                 probability=request.probability,
                 color_filter_colors=request.color_filter_colors,
-                color_filter_custom_ranges=request.color_filter_custom_ranges
+                color_filter_custom_ranges=request.color_filter_custom_ranges,
+                charset_range=request.charset_range,
+                confidence=request.confidence and not request.probability,
+                expected_length=(tuple(request.expected_length) if isinstance(request.expected_length, list)
+                                 else request.expected_length)
             )
             
             if request.probability:
                 response_data = OCRResponse(text=None, probability=result)
+            elif request.confidence:
+                response_data = OCRResponse(text=result["text"], char_probabilities=result["char_probabilities"])
             else:
                 response_data = OCRResponse(text=result, probability=None)
             
@@ -53,7 +53,8 @@ class DDDDOCRService:
                     device_id=config.device_id,
                     show_ad=False,
                     import_onnx_path=config.import_onnx_path,
-                    charsets_path=config.charsets_path
+                    charsets_path=config.charsets_path,
+                    session_options=config.session_options
                 )
                 self.enabled_features.add("ocr")
             
@@ -63,7 +64,8 @@ class DDDDOCRService:
                     det=True,
                     use_gpu=config.use_gpu,
                     device_id=config.device_id,
-                    show_ad=False
+                    show_ad=False,
+                    session_options=config.session_options
                 )
                 self.enabled_features.add("detection")
             
@@ -6,6 +6,7 @@
 
 from typing import Union, List, Optional, Dict, Any, Tuple
 import pathlib
+import numpy as np
 from PIL import Image
 
 from ..core.ocr_engine import OCREngine
@@ -25,7 +26,12 @@ class DdddOcr:
     
     def __init__(self, ocr: bool = True, det: bool = False, old: bool = False, beta: bool = False,
                  use_gpu: bool = False, device_id: int = 0, show_ad: bool = True, 
-                 import_onnx_path: str = "", charsets_path: str = ""):
+                 import_onnx_path: str = "", charsets_path: str = "",
+                 session_options: Optional[Dict[str, Any]] = None, quantized: bool = False,
+                 warmup: Optional[Union[bool, str]] = None,
+                 warmup_sizes: Optional[Union[str, List[Tuple[int, int]]]] = None,
+                 width_buckets: Optional[Union[str, List[int]]] = None,
+                 io_binding: Optional[bool] = None):
         """
         初始化DDDDOCR
         
@@ -39,6 +45,13 @@ class DdddOcr:
             show_ad: 是否显示广告信息
             import_onnx_path: 自定义ONNX模型路径
             charsets_path: 自定义字符集路径
+            session_options: ONNX运行时会话选项（线程数、执行模式、图优化级别、优化模型缓存目录等）
+            quantized: 是否加载INT8量化OCR模型（需先通过 python -m ddddocr quantize 生成）
+            warmup: OCR模型预热模式（off/sync/background），默认读取环境变量 DDDDOCR_WARMUP
+            warmup_sizes: 预热的验证码原图尺寸，如 "100x40,120x40"，默认读取环境变量 DDDDOCR_WARMUP_SHAPES
+            width_buckets: OCR模型输入宽度桶，如 "128,160,192"，默认读取环境变量 DDDDOCR_WIDTH_BUCKETS
+                （结果近似，启用前用 python -m ddddocr buckets 校验）
+            io_binding: 是否为每个宽度桶预分配缓冲区并通过IOBinding推理，默认读取环境变量 DDDDOCR_IO_BINDING
         """
         # 显示广告信息（保持原有行为）
         if show_ad:
@@ -63,6 +76,8 @@ class DdddOcr:
         self.device_id = device_id
         self.import_onnx_path = import_onnx_path
         self.charsets_path = charsets_path
+        self.session_options = session_options
+        self.quantized = quantized
         
         # 初始化引擎
         self.ocr_engine: Optional[OCREngine] = None
@@ -73,7 +88,7 @@ class DdddOcr:
         if det:
             # 目标检测模式
             self.det = True
-            self.detection_engine = DetectionEngine(use_gpu, device_id)
+            self.detection_engine = DetectionEngine(use_gpu, device_id, session_options)
         elif ocr or import_onnx_path:
             # OCR模式
             self.det = False
@@ -83,7 +98,13 @@ class DdddOcr:
                 old=old,
                 beta=beta,
                 import_onnx_path=import_onnx_path,
-                charsets_path=charsets_path
+                charsets_path=charsets_path,
+                session_options=session_options,
+                quantized=quantized,
+                warmup=warmup,
+                warmup_sizes=warmup_sizes,
+                width_buckets=width_buckets,
+                io_binding=io_binding
             )
         else:
             # 滑块模式
@@ -92,19 +113,25 @@ class DdddOcr:
         # 滑块引擎总是可用
         self.slide_engine = SlideEngine()
     
-    def classification(self, img: Union[bytes, str, pathlib.PurePath, Image.Image], 
+    def classification(self, img: Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray], 
                       png_fix: bool = False, probability: bool = False,
                       color_filter_colors: Optional[List[str]] = None,
-                      color_filter_custom_ranges: Optional[List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]] = None) -> Union[str, Dict[str, Any]]:
+                      color_filter_custom_ranges: Optional[List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]] = None,
+                      charset_range: Optional[Union[int, str, List[str]]] = None,
+                      confidence: bool = False,
+                      expected_length: Optional[Union[int, Tuple[int, int]]] = None) -> Union[str, Dict[str, Any]]:
         """
         OCR识别方法
         
         Args:
-            img: 图片数据（bytes、str、pathlib.PurePath或PIL.Image）
+            img: 图片数据（bytes、str、pathlib.PurePath、PIL.Image或numpy数组）
             png_fix: 是否修复PNG透明背景问题
             probability: 是否返回概率信息
             color_filter_colors: 颜色过滤预设颜色列表，如 ['red', 'blue']
             color_filter_custom_ranges: 自定义HSV颜色范围列表，如 [((0,50,50), (10,255,255))]
+            charset_range: 本次识别的字符集范围限制，不影响 set_ranges 设置的默认范围
+            confidence: 是否返回逐字符置信度（text、confidence、char_probabilities、min_char_probability）
+            expected_length: 期望字符数（如 4 或 (4, 5)），解码时在满足长度的路径中取概率最高者
         
         Returns:
             识别结果文本或包含概率信息的字典
@@ -123,15 +150,64 @@ class DdddOcr:
             png_fix=png_fix,
             probability=probability,
             color_filter_colors=color_filter_colors,
-            color_filter_custom_ranges=color_filter_custom_ranges
+            color_filter_custom_ranges=color_filter_custom_ranges,
+            charset_range=charset_range,
+            confidence=confidence,
+            expected_length=expected_length
         )
     
-    def detection(self, img: Union[bytes, str, pathlib.PurePath, Image.Image]) -> List[List[int]]:
+    def classification_batch(self, imgs: List[Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray]],
+                             png_fix: bool = False, probability: bool = False,
+                             color_filter_colors: Optional[List[str]] = None,
+                             color_filter_custom_ranges: Optional[List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]] = None,
+                             pad_to_common_width: bool = False,
+                             charset_range: Optional[Union[int, str, List[str]]] = None,
+                             confidence: bool = False,
+                             expected_length: Optional[Union[int, Tuple[int, int]]] = None) -> List[Union[str, Dict[str, Any]]]:
+        """
+        批量OCR识别方法
+        
+        Args:
+            imgs: 图片数据列表
+            png_fix: 是否修复PNG透明背景问题
+            probability: 是否返回概率信息
+            color_filter_colors: 颜色过滤预设颜色列表
+            color_filter_custom_ranges: 自定义HSV颜色范围列表
+            pad_to_common_width: 是否填充到统一宽度后一次推理
+            charset_range: 本次识别的字符集范围限制，不影响 set_ranges 设置的默认范围
+            confidence: 是否返回逐字符置信度
+            expected_length: 期望字符数（如 4 或 (4, 5)）
+        
+        Returns:
+            与输入顺序一致的识别结果列表
+            
+        Raises:
+            DDDDOCRError: 当功能未启用或识别失败时
+        """
+        if self.det:
+            raise DDDDOCRError("当前识别类型为目标检测")
+        
+        if not self.ocr_engine:
+            raise DDDDOCRError("OCR功能未初始化")
+        
+        return self.ocr_engine.predict_batch(
+            images=imgs,
+            png_fix=png_fix,
+            probability=probability,
+            color_filter_colors=color_filter_colors,
+            color_filter_custom_ranges=color_filter_custom_ranges,
+            pad_to_common_width=pad_to_common_width,
+            charset_range=charset_range,
+            confidence=confidence,
+            expected_length=expected_length
+        )
+    
+    def detection(self, img: Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray]) -> List[List[int]]:
         """
         目标检测方法
         
         Args:
-            img: 图片数据
+            img: 图片数据（PIL图像与RGB numpy数组直接检测，不经过PNG编码）
             
         Returns:
             检测到的边界框列表
@@ -147,6 +223,57 @@ class DdddOcr:
         
         return self.detection_engine.predict(img)
     
+    def detection_batch(self, imgs: List[Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray]]) -> List[List[List[int]]]:
+        """
+        批量目标检测方法（一次推理检测所有图片）
+        
+        Args:
+            imgs: 图片数据列表
+            
+        Returns:
+            与输入顺序一致的边界框列表
+            
+        Raises:
+            DDDDOCRError: 当功能未启用或检测失败时
+        """
+        if not self.det:
+            raise DDDDOCRError("当前识别类型为OCR")
+        
+        if not self.detection_engine:
+            raise DDDDOCRError("目标检测功能未初始化")
+        
+        return self.detection_engine.predict_batch(imgs)
+    
+    def detect_and_recognize(self, img: Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray],
+                             ocr: 'DdddOcr', padding: int = 0,
+                             expected_length: Optional[Union[int, Tuple[int, int]]] = None) -> List[Dict[str, Any]]:
+        """
+        检测后识别：检测图中的文字区域，并用另一个OCR实例一次识别所有区域
+        
+        Args:
+            img: 图片数据
+            ocr: 用于识别的DdddOcr实例（ocr=True）
+            padding: 裁剪时向外扩展的像素数
+            expected_length: 每个区域的期望字符数
+            
+        Returns:
+            结果列表，每项包含 box、text、confidence、char_probabilities
+            
+        Raises:
+            DDDDOCRError: 当功能未启用或识别失败时
+        """
+        if not self.det:
+            raise DDDDOCRError("当前识别类型为OCR")
+        
+        if not self.detection_engine:
+            raise DDDDOCRError("目标检测功能未初始化")
+        
+        if not getattr(ocr, 'ocr_engine', None):
+            raise DDDDOCRError("识别实例未启用OCR功能")
+        
+        return self.detection_engine.detect_and_recognize(img, ocr.ocr_engine, padding=padding,
+                                                          expected_length=expected_length)
+    
     def slide_match(self, target_img: Union[bytes, str, pathlib.PurePath, Image.Image],
                    background_img: Union[bytes, str, pathlib.PurePath, Image.Image],
                    simple_target: bool = False) -> Dict[str, Any]:
@@ -225,6 +352,40 @@ class DdddOcr:
         
         return self.ocr_engine.get_charset()
     
+    def warm_up(self, sizes: Optional[Union[str, List[Tuple[int, int]]]] = None, background: bool = False):
+        """
+        预热OCR模型，使首个真实验证码以稳定速度识别
+        
+        Args:
+            sizes: 验证码原图尺寸 (宽, 高) 列表或 "宽x高,宽x高" 字符串，默认使用初始化时的预热尺寸
+            background: 是否在后台线程中预热
+            
+        Returns:
+            后台预热线程，同步预热时返回None
+            
+        Raises:
+            DDDDOCRError: 当OCR功能未启用时
+        """
+        if not self.ocr_engine:
+            raise DDDDOCRError("OCR功能未初始化")
+        
+        return self.ocr_engine.warm_up(sizes, background=background)
+    
+    def get_warmup_stats(self) -> Dict[str, Any]:
+        """
+        获取OCR模型的预热状态与耗时
+        
+        Returns:
+            预热统计信息
+            
+        Raises:
+            DDDDOCRError: 当OCR功能未启用时
+        """
+        if not self.ocr_engine:
+            raise DDDDOCRError("OCR功能未初始化")
+        
+        return self.ocr_engine.get_warmup_stats()
+    
     def switch_device(self, use_gpu: bool, device_id: int = 0) -> None:
         """
         切换计算设备
@@ -15,17 +15,19 @@ from ..utils.exceptions import ModelLoadError
 class BaseEngine(ABC):
     """基础引擎抽象类"""
     
-    def __init__(self, use_gpu: bool = False, device_id: int = 0):
+    def __init__(self, use_gpu: bool = False, device_id: int = 0,
+                 session_options: Optional[Dict[str, Any]] = None):
         """
         初始化基础引擎
         
         Args:
             use_gpu: 是否使用GPU
             device_id: GPU设备ID
+            session_options: ONNX运行时会话选项
         """
         self.use_gpu = use_gpu
         self.device_id = device_id
-        self.model_loader = ModelLoader(use_gpu, device_id)
+        self.model_loader = ModelLoader(use_gpu, device_id, session_options)
         self.session: Optional[onnxruntime.InferenceSession] = None
         self.is_initialized = False
     
@@ -91,17 +93,24 @@ class BaseEngine(ABC):
             
             # 如果已经初始化，需要重新加载模型
             if self.is_initialized:
+                self._release_session()
                 self._reload_model()
     
     def _reload_model(self) -> None:
         """重新加载模型（子类可重写）"""
         pass
     
+    def _release_session(self) -> None:
+        """释放当前会话（共享会话只减少引用计数）"""
+        session = getattr(self, 'session', None)
+        if session is not None:
+            if hasattr(session, 'release'):
+                session.release()
+            self.session = None
+    
     def cleanup(self) -> None:
         """清理资源"""
-        if self.session:
-            del self.session
-            self.session = None
+        self._release_session()
         self.is_initialized = False
     
     def __del__(self):
@@ -4,31 +4,124 @@
 提供目标检测功能
 """
 
-from typing import Union, List, Tuple
+import pathlib
+import threading
+from typing import Union, List, Tuple, Optional, Dict, Any
 import numpy as np
 from PIL import Image
 
 from .base import BaseEngine
-from ..utils.image_io import load_image_from_input, image_to_numpy
+from ..utils.image_io import load_image_from_input
 from ..utils.exceptions import ModelLoadError, ImageProcessError, safe_import_opencv
 from ..utils.validators import validate_image_input
 
 # 安全导入OpenCV
 cv2 = safe_import_opencv()
 
+# NMS后端：opencv（cv2.dnn.NMSBoxes，C++实现）、numpy（逐框循环）
+NMS_BACKENDS = ('opencv', 'numpy')
+
+
+def nms_numpy(boxes: np.ndarray, scores: np.ndarray, nms_thr: float) -> np.ndarray:
+    """
+    单类别NMS（numpy逐框循环实现，坐标按包含端点的像素计算面积）
+
+    Args:
+        boxes: 边界框 (N, 4)，格式为 [x1, y1, x2, y2]
+        scores: 得分 (N,)
+        nms_thr: IoU阈值，与已保留框的IoU大于该值的框被抑制
+
+    Returns:
+        保留框的下标（按得分从高到低）
+    """
+    x1 = boxes[:, 0]
+    y1 = boxes[:, 1]
+    x2 = boxes[:, 2]
+    y2 = boxes[:, 3]
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        w = np.maximum(0.0, xx2 - xx1 + 1)
+        h = np.maximum(0.0, yy2 - yy1 + 1)
+        inter = w * h
+        ovr = inter / (areas[i] + areas[order[1:]] - inter)
+        inds = np.where(ovr <= nms_thr)[0]
+        order = order[inds + 1]
+    return np.array(keep, dtype=np.int64)
+
+
+def nms_opencv(boxes: np.ndarray, scores: np.ndarray, nms_thr: float) -> np.ndarray:
+    """
+    单类别NMS（cv2.dnn.NMSBoxes），抑制规则与 nms_numpy 一致
+
+    Args:
+        boxes: 边界框 (N, 4)，格式为 [x1, y1, x2, y2]
+        scores: 得分 (N,)
+        nms_thr: IoU阈值
+
+    Returns:
+        保留框的下标（按得分从高到低）
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    # 宽高加1，与 nms_numpy 按包含端点的像素计算的交集与面积相同
+    xywh = np.empty((len(boxes), 4), dtype=np.float64)
+    xywh[:, :2] = boxes[:, :2]
+    xywh[:, 2:] = boxes[:, 2:4] - boxes[:, :2] + 1
+    # 候选框已按得分阈值过滤；NMSBoxes只保留得分大于0的框，非正得分整体平移（不改变排序）
+    scores = scores.astype(np.float64)
+    if scores.min() <= 0:
+        scores = scores - scores.min() + 1.0
+    keep = cv2.dnn.NMSBoxes(xywh, scores.astype(np.float32), 0.0, float(nms_thr))
+    return np.asarray(keep, dtype=np.int64).reshape(-1)
+
 
 class DetectionEngine(BaseEngine):
     """目标检测引擎"""
+    
+    # 检测模型输入尺寸 (高, 宽)
+    INPUT_SIZE = (416, 416)
+    
+    # NMS的IoU阈值与候选框得分阈值
+    NMS_THRESHOLD = 0.45
+    SCORE_THRESHOLD = 0.1
+    
+    # letterbox填充的像素值
+    PAD_VALUE = 114
 
-    def __init__(self, use_gpu: bool = False, device_id: int = 0):
+    def __init__(self, use_gpu: bool = False, device_id: int = 0,
+                 session_options: Optional[Dict[str, Any]] = None,
+                 nms_backend: Optional[str] = None):
         """
         初始化检测引擎
 
         Args:
             use_gpu: 是否使用GPU
             device_id: GPU设备ID
+            session_options: ONNX运行时会话选项
+            nms_backend: NMS后端（opencv/numpy），默认在OpenCV包含dnn模块时使用opencv
+
+        Raises:
+            ModelLoadError: 当初始化失败或NMS后端不支持时
         """
-        super().__init__(use_gpu, device_id)
+        super().__init__(use_gpu, device_id, session_options)
+        if nms_backend is None:
+            nms_backend = 'opencv' if hasattr(cv2, 'dnn') else 'numpy'
+        if nms_backend not in NMS_BACKENDS:
+            raise ModelLoadError(f"不支持的NMS后端: {nms_backend}，可选 {', '.join(NMS_BACKENDS)}")
+        self.nms_backend = nms_backend
+        # 各输入尺寸的锚点网格与步长（只计算一次）
+        self._grid_cache: Dict[Tuple[Tuple[int, int], bool], Tuple[np.ndarray, np.ndarray]] = {}
+        # 各输入尺寸复用的模型输入缓冲区
+        self._input_buffers: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._buffer_lock = threading.Lock()
         self.initialize()
 
     def initialize(self, **kwargs) -> None:
@@ -46,12 +139,14 @@ class DetectionEngine(BaseEngine):
         except Exception as e:
             raise ModelLoadError(f"检测引擎初始化失败: {str(e)}") from e
 
-    def predict(self, image: Union[bytes, str, Image.Image]) -> List[List[int]]:
+    def predict(self, image: Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray]) -> List[List[int]]:
         """
         执行目标检测
 
+        数组与PIL图像直接写入模型输入缓冲区，不经过PNG编码与解码。
+
         Args:
-            image: 输入图像
+            image: 输入图像（字节数据、文件路径、base64字符串、PIL图像或RGB/灰度numpy数组）
 
         Returns:
             检测到的边界框列表，每个边界框格式为[x1, y1, x2, y2]
@@ -67,87 +162,302 @@ class DetectionEngine(BaseEngine):
         validate_image_input(image)
 
         try:
-            # 直接使用原始的get_bbox方法
-            if isinstance(image, bytes):
-                return self.get_bbox(image)
-            elif isinstance(image, Image.Image):
-                import io
-                img_bytes = io.BytesIO()
-                image.save(img_bytes, format='PNG')
-                return self.get_bbox(img_bytes.getvalue())
-            else:
-                # 其他类型先转换为PIL Image再处理
-                pil_image = load_image_from_input(image)
-                import io
-                img_bytes = io.BytesIO()
-                pil_image.save(img_bytes, format='PNG')
-                return self.get_bbox(img_bytes.getvalue())
+            img, rgb = self.to_array(image)
+            return self._detect(img, rgb)
 
         except Exception as e:
             raise ImageProcessError(f"目标检测失败: {str(e)}") from e
 
-    def preproc(self, img, input_size, swap=(2, 0, 1)):
-        """预处理函数（来自原始代码）"""
-        if len(img.shape) == 3:
-            padded_img = np.ones((input_size[0], input_size[1], 3), dtype=np.uint8) * 114
+    @staticmethod
+    def to_array(image: Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray]) -> Tuple[np.ndarray, bool]:
+        """
+        将输入图像转换为uint8数组（尽量不复制）
+
+        字节数据由OpenCV解码为BGR；PIL图像与numpy数组保持RGB通道顺序，在写入模型输入时再交换通道。
+        透明通道直接丢弃，与OpenCV按彩色模式解码PNG的结果一致。
+
+        Args:
+            image: 输入图像
+
+        Returns:
+            (形状为 (H, W) 或 (H, W, 3) 的数组, 通道顺序是否为RGB)
+
+        Raises:
+            ImageProcessError: 当图像无法解码或数组形状不支持时
+        """
+        if isinstance(image, bytes):
+            img = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                raise ImageProcessError("图片解码失败")
+            return img, False
+
+        if isinstance(image, np.ndarray) and image.dtype == np.uint8:
+            array = image
         else:
-            padded_img = np.ones(input_size, dtype=np.uint8) * 114
+            # 文件路径、base64字符串与非uint8数组按统一规则加载为PIL图像
+            if not isinstance(image, Image.Image):
+                image = load_image_from_input(image)
+            if image.mode not in ('RGB', 'RGBA', 'L'):
+                image = image.convert('RGB')
+            array = np.asarray(image)
+
+        if array.ndim == 3 and array.shape[2] == 1:
+            array = array[:, :, 0]
+        elif array.ndim == 3 and array.shape[2] == 4:
+            array = np.ascontiguousarray(array[:, :, :3])
+        elif not (array.ndim == 2 or (array.ndim == 3 and array.shape[2] == 3)):
+            raise ImageProcessError(f"不支持的数组形状: {array.shape}，支持 (H, W)、(H, W, 1/3/4)")
+        return array, True
+
+    def detect_and_recognize(self, image: Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray],
+                             ocr_engine, padding: int = 0, pad_to_common_width: bool = True,
+                             charset_range: Optional[Union[int, str, List[str]]] = None,
+                             expected_length: Optional[Union[int, Tuple[int, int]]] = None,
+                             png_fix: bool = False) -> List[Dict[str, Any]]:
+        """
+        检测后识别（点选/文字类验证码）：图像只解码一次，各边界框直接从解码后的数组裁剪，
+        所有裁剪图合并为一次OCR推理
+
+        Args:
+            image: 输入图像（类型同 predict）
+            ocr_engine: 识别每个边界框内字符的OCR引擎（OCREngine）
+            padding: 裁剪时向外扩展的像素数（不超出原图）
+            pad_to_common_width: 裁剪图是否填充到统一宽度后一次推理（False时按宽度分组推理，
+                与逐张识别完全一致）
+            charset_range: 识别的字符集范围限制
+            expected_length: 每个边界框的期望字符数（如 1）
+            png_fix: 是否修复PNG透明背景
+
+        Returns:
+            按检测顺序排列的结果列表，每项为
+            {box: [x1, y1, x2, y2], text, confidence, char_probabilities}
+
+        Raises:
+            ImageProcessError: 当图像处理失败时
+            ModelLoadError: 当模型未初始化时
+        """
+        if not self.is_ready():
+            raise ModelLoadError("检测引擎未初始化")
+        validate_image_input(image)
+
+        try:
+            img, rgb = self.to_array(image)
+            boxes = self._detect(img, rgb)
+        except Exception as e:
+            raise ImageProcessError(f"目标检测失败: {str(e)}") from e
+        if not boxes:
+            return []
+
+        height, width = img.shape[:2]
+        crops = []
+        indices = []
+        for index, (x1, y1, x2, y2) in enumerate(boxes):
+            x1, y1 = max(0, x1 - padding), max(0, y1 - padding)
+            x2, y2 = min(width, x2 + padding), min(height, y2 + padding)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            crop = img[y1:y2, x1:x2]
+            if crop.ndim == 3 and not rgb:
+                crop = crop[:, :, ::-1]
+            # 灰度裁剪直接交给OCR引擎，彩色裁剪包装为RGB图像（只复制裁剪区域）
+            crops.append(crop if crop.ndim == 2 else Image.fromarray(np.ascontiguousarray(crop), 'RGB'))
+            indices.append(index)
+
+        results = [{'box': box, 'text': '', 'confidence': 0.0, 'char_probabilities': []} for box in boxes]
+        if crops:
+            recognized = ocr_engine.predict_batch(
+                crops, png_fix=png_fix, charset_range=charset_range, pad_to_common_width=pad_to_common_width,
+                confidence=True, expected_length=expected_length)
+            for index, result in zip(indices, recognized):
+                results[index].update(text=result['text'], confidence=result['confidence'],
+                                      char_probabilities=result['char_probabilities'])
+        return results
+
+    def preproc(self, img, input_size, swap=(2, 0, 1), rgb=False, out=None):
+        """
+        letterbox预处理：等比缩放后放在左上角，其余部分填充为 PAD_VALUE
+
+        Args:
+            img: uint8图像数组 (H, W, 3) 或灰度 (H, W)
+            input_size: 模型输入尺寸 (高, 宽)
+            swap: 输出的维度顺序（默认 CHW）
+            rgb: 输入是否为RGB顺序（模型输入为BGR，写入时交换通道）
+            out: 写入的float32缓冲区（形状为按swap排列的 (高, 宽, 3)），为None时新建
+
+        Returns:
+            (模型输入数组, 缩放比例)
+        """
         r = min(input_size[0] / img.shape[0], input_size[1] / img.shape[1])
-        resized_img = cv2.resize(
-            img,
-            (int(img.shape[1] * r), int(img.shape[0] * r)),
-            interpolation=cv2.INTER_LINEAR,
-        ).astype(np.uint8)
-        padded_img[: int(img.shape[0] * r), : int(img.shape[1] * r)] = resized_img
-        padded_img = padded_img.transpose(swap)
-        padded_img = np.ascontiguousarray(padded_img, dtype=np.float32)
-        return padded_img, r
+        new_h, new_w = int(img.shape[0] * r), int(img.shape[1] * r)
+        resized_img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        if resized_img.ndim == 2:
+            resized_img = resized_img[:, :, None]
+        elif rgb:
+            resized_img = resized_img[:, :, ::-1]
 
-    def demo_postprocess(self, outputs, img_size, p6=False):
-        """后处理函数（来自原始代码）"""
+        if out is None:
+            out = np.empty(tuple((input_size[0], input_size[1], 3)[axis] for axis in swap), dtype=np.float32)
+        # 在 (高, 宽, 3) 视图上写入，只重置填充区域
+        padded_img = out.transpose(np.argsort(swap))
+        padded_img[new_h:] = self.PAD_VALUE
+        padded_img[:new_h, new_w:] = self.PAD_VALUE
+        padded_img[:new_h, :new_w] = resized_img
+        return out, r
+
+    def _get_input_buffer(self, input_size: Tuple[int, int], batch_size: int = 1) -> Dict[str, Any]:
+        """
+        获取输入尺寸对应的复用输入缓冲区（首次使用或批量更大时创建）
+
+        Args:
+            input_size: 模型输入尺寸 (高, 宽)
+            batch_size: 需要的批量大小
+
+        Returns:
+            包含 input（形状 (容量, 3, 高, 宽)，使用时取前 batch_size 张）与 lock 的字典
+        """
+        with self._buffer_lock:
+            buffers = self._input_buffers.get(input_size)
+            if buffers is None or len(buffers['input']) < batch_size:
+                # 扩容时换用新的缓冲区与锁，正在使用旧缓冲区的调用不受影响
+                buffers = {'input': np.empty((batch_size, 3) + tuple(input_size), dtype=np.float32),
+                           'lock': threading.Lock()}
+                self._input_buffers[input_size] = buffers
+            return buffers
+
+    def supports_batch(self) -> bool:
+        """
+        检测模型是否支持批量输入（batch维度为动态维度）
+
+        Returns:
+            是否支持批量推理
+        """
+        return not isinstance(self.session.get_inputs()[0].shape[0], int)
+
+    def _detect(self, img: np.ndarray, rgb: bool = False) -> List[List[int]]:
+        """
+        检测单张已解码的图像
+
+        Args:
+            img: uint8图像数组
+            rgb: 通道顺序是否为RGB
+
+        Returns:
+            边界框列表，每个边界框格式为[x1, y1, x2, y2]
+        """
+        buffers = self._get_input_buffer(self.INPUT_SIZE)
+        # 同一输入尺寸的并发检测在写入缓冲区与推理期间串行执行
+        with buffers['lock']:
+            input_buffer = buffers['input'][:1]
+            _, ratio = self.preproc(img, self.INPUT_SIZE, rgb=rgb, out=input_buffer[0])
+            output = self.session.run(None, {self.session.get_inputs()[0].name: input_buffer})
+        return self.postprocess(output[0], ratio, img.shape)
+
+    def predict_batch(self, images: List[Union[bytes, str, pathlib.PurePath, Image.Image, np.ndarray]]
+                      ) -> List[List[List[int]]]:
+        """
+        批量目标检测：所有图像写入同一个输入批次，只调用一次推理
+
+        模型的batch维度固定时逐张检测。
+
+        Args:
+            images: 输入图像列表（类型同 predict）
+
+        Returns:
+            与输入顺序一致的边界框列表
+
+        Raises:
+            ImageProcessError: 当图像处理失败时
+            ModelLoadError: 当模型未初始化时
+        """
+        if not self.is_ready():
+            raise ModelLoadError("检测引擎未初始化")
+        if not images:
+            return []
+        for image in images:
+            validate_image_input(image)
+
+        try:
+            arrays = [self.to_array(image) for image in images]
+            if len(arrays) == 1 or not self.supports_batch():
+                return [self._detect(img, rgb) for img, rgb in arrays]
+
+            buffers = self._get_input_buffer(self.INPUT_SIZE, len(arrays))
+            with buffers['lock']:
+                batch = buffers['input'][:len(arrays)]
+                ratios = [self.preproc(img, self.INPUT_SIZE, rgb=rgb, out=batch[index])[1]
+                          for index, (img, rgb) in enumerate(arrays)]
+                output = self.session.run(None, {self.session.get_inputs()[0].name: batch})[0]
+            return [self.postprocess(output[index:index + 1], ratio, img.shape)
+                    for index, ((img, _), ratio) in enumerate(zip(arrays, ratios))]
+
+        except Exception as e:
+            raise ImageProcessError(f"批量目标检测失败: {str(e)}") from e
+
+    def anchor_grids(self, img_size: Tuple[int, int], p6: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取输入尺寸对应的锚点网格与步长（按输入尺寸缓存）
+
+        Args:
+            img_size: 模型输入尺寸 (高, 宽)
+            p6: 是否包含步长64的输出层
+
+        Returns:
+            (网格坐标 (N, 2), 步长 (N, 1))，均为float32且只读
+        """
+        key = (tuple(img_size), p6)
+        cached = self._grid_cache.get(key)
+        if cached is not None:
+            return cached
+
+        strides = [8, 16, 32, 64] if p6 else [8, 16, 32]
         grids = []
         expanded_strides = []
-        if not p6:
-            strides = [8, 16, 32]
-        else:
-            strides = [8, 16, 32, 64]
-        hsizes = [img_size[0] // stride for stride in strides]
-        wsizes = [img_size[1] // stride for stride in strides]
-        for hsize, wsize, stride in zip(hsizes, wsizes, strides):
+        for stride in strides:
+            hsize, wsize = img_size[0] // stride, img_size[1] // stride
             xv, yv = np.meshgrid(np.arange(wsize), np.arange(hsize))
-            grid = np.stack((xv, yv), 2).reshape(1, -1, 2)
-            grids.append(grid)
-            shape = grid.shape[:2]
-            expanded_strides.append(np.full((*shape, 1), stride))
-        grids = np.concatenate(grids, 1)
-        expanded_strides = np.concatenate(expanded_strides, 1)
-        outputs[..., :2] = (outputs[..., :2] + grids) * expanded_strides
-        outputs[..., 2:4] = np.exp(outputs[..., 2:4]) * expanded_strides
+            grids.append(np.stack((xv, yv), 2).reshape(-1, 2))
+            expanded_strides.append(np.full((hsize * wsize, 1), stride))
+        grid = np.concatenate(grids, 0).astype(np.float32)
+        stride = np.concatenate(expanded_strides, 0).astype(np.float32)
+        grid.setflags(write=False)
+        stride.setflags(write=False)
+        self._grid_cache[key] = (grid, stride)
+        return grid, stride
+
+    def demo_postprocess(self, outputs, img_size, p6=False):
+        """
+        将模型输出的网格偏移解码为输入尺寸上的中心点与宽高（原地修改）
+
+        Args:
+            outputs: 模型输出 (batch, N, 5 + 类别数)
+            img_size: 模型输入尺寸 (高, 宽)
+            p6: 是否包含步长64的输出层
+
+        Returns:
+            解码后的输出
+        """
+        grid, stride = self.anchor_grids(img_size, p6)
+        outputs[..., :2] += grid
+        outputs[..., :2] *= stride
+        np.exp(outputs[..., 2:4], out=outputs[..., 2:4])
+        outputs[..., 2:4] *= stride
         return outputs
 
     def nms(self, boxes, scores, nms_thr):
-        """Single class NMS implemented in Numpy."""
-        x1 = boxes[:, 0]
-        y1 = boxes[:, 1]
-        x2 = boxes[:, 2]
-        y2 = boxes[:, 3]
-        areas = (x2 - x1 + 1) * (y2 - y1 + 1)
-        order = scores.argsort()[::-1]
-        keep = []
-        while order.size > 0:
-            i = order[0]
-            keep.append(i)
-            xx1 = np.maximum(x1[i], x1[order[1:]])
-            yy1 = np.maximum(y1[i], y1[order[1:]])
-            xx2 = np.minimum(x2[i], x2[order[1:]])
-            yy2 = np.minimum(y2[i], y2[order[1:]])
-            w = np.maximum(0.0, xx2 - xx1 + 1)
-            h = np.maximum(0.0, yy2 - yy1 + 1)
-            inter = w * h
-            ovr = inter / (areas[i] + areas[order[1:]] - inter)
-            inds = np.where(ovr <= nms_thr)[0]
-            order = order[inds + 1]
-        return keep
+        """
+        单类别NMS（按 nms_backend 选择实现）
+
+        Args:
+            boxes: 边界框 (N, 4)，格式为 [x1, y1, x2, y2]
+            scores: 得分 (N,)
+            nms_thr: IoU阈值
+
+        Returns:
+            保留框的下标数组
+        """
+        if self.nms_backend == 'opencv':
+            return nms_opencv(boxes, scores, nms_thr)
+        return nms_numpy(boxes, scores, nms_thr)
 
     def multiclass_nms_class_agnostic(self, boxes, scores, nms_thr, score_thr):
         """Multiclass NMS implemented in Numpy. Class-agnostic version."""
@@ -160,53 +470,53 @@ class DetectionEngine(BaseEngine):
         valid_boxes = boxes[valid_score_mask]
         valid_cls_inds = cls_inds[valid_score_mask]
         keep = self.nms(valid_boxes, valid_scores, nms_thr)
-        if keep:
-            dets = np.concatenate(
-                [valid_boxes[keep], valid_scores[keep, None], valid_cls_inds[keep, None]], 1
-            )
-        return dets
+        if len(keep) == 0:
+            return None
+        return np.concatenate(
+            [valid_boxes[keep], valid_scores[keep, None], valid_cls_inds[keep, None]], 1
+        )
 
     def multiclass_nms(self, boxes, scores, nms_thr, score_thr):
         """Multiclass NMS implemented in Numpy"""
         return self.multiclass_nms_class_agnostic(boxes, scores, nms_thr, score_thr)
 
-    def get_bbox(self, image_bytes):
-        """原始的目标检测方法"""
-        img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
-        im, ratio = self.preproc(img, (416, 416))
-        ort_inputs = {self.session.get_inputs()[0].name: im[None, :, :, :]}
-        output = self.session.run(None, ort_inputs)
-        predictions = self.demo_postprocess(output[0], (416, 416))[0]
-        boxes = predictions[:, :4]
-        scores = predictions[:, 4:5] * predictions[:, 5:]
-        boxes_xyxy = np.ones_like(boxes)
-        boxes_xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2.
-        boxes_xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2.
-        boxes_xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2.
-        boxes_xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2.
+    def postprocess(self, output: np.ndarray, ratio: float, image_shape: Tuple[int, ...]) -> List[List[int]]:
+        """
+        将单张图像的模型输出转换为原图上的边界框（解码、缩放、NMS与裁剪均为向量化计算）
+
+        Args:
+            output: 模型输出 (1, N, 5 + 类别数)，会被原地修改
+            ratio: 预处理时的缩放比例
+            image_shape: 原图形状 (高, 宽[, 通道])
+
+        Returns:
+            边界框列表，每个边界框格式为[x1, y1, x2, y2]
+        """
+        predictions = self.demo_postprocess(output, self.INPUT_SIZE)[0]
+        centers = predictions[:, :2]
+        half_sizes = predictions[:, 2:4] / 2.
+        boxes_xyxy = np.concatenate((centers - half_sizes, centers + half_sizes), axis=1)
         boxes_xyxy /= ratio
-        pred = self.multiclass_nms(boxes_xyxy, scores, nms_thr=0.45, score_thr=0.1)
-        try:
-            final_boxes = pred[:, :4].tolist()
-            result = []
-            for b in final_boxes:
-                if b[0] < 0:
-                    x_min = 0
-                else:
-                    x_min = int(b[0])
-                if b[1] < 0:
-                    y_min = 0
-                else:
-                    y_min = int(b[1])
-                if b[2] > img.shape[1]:
-                    x_max = int(img.shape[1])
-                else:
-                    x_max = int(b[2])
-                if b[3] > img.shape[0]:
-                    y_max = int(img.shape[0])
-                else:
-                    y_max = int(b[3])
-                result.append([x_min, y_min, x_max, y_max])
-        except Exception as e:
+        scores = predictions[:, 4:5] * predictions[:, 5:]
+        pred = self.multiclass_nms(boxes_xyxy, scores, nms_thr=self.NMS_THRESHOLD, score_thr=self.SCORE_THRESHOLD)
+        if pred is None or len(pred) == 0:
             return []
-        return result
+
+        # 左上角不小于0，右下角不超过原图尺寸，再向零取整
+        height, width = image_shape[:2]
+        lower = np.array([0, 0, -np.inf, -np.inf])
+        upper = np.array([np.inf, np.inf, width, height])
+        return np.clip(pred[:, :4], lower, upper).astype(np.int64).tolist()
+
+    def get_bbox(self, image_bytes):
+        """
+        解码图片字节并执行目标检测
+
+        Args:
+            image_bytes: 图片字节数据
+
+        Returns:
+            边界框列表，每个边界框格式为[x1, y1, x2, y2]
+        """
+        img, _ = self.to_array(image_bytes)
+        return self._detect(img)
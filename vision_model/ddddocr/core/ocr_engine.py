@@ -4,7 +4,12 @@ OCR识别引擎
 提供文字识别功能
 """
 
-from typing import Union, List, Optional, Dict, Any, Tuple
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Union, List, Optional, Dict, Any, Iterator, Sequence, Tuple
 import numpy as np
 from PIL import Image
 
@@ -13,16 +18,32 @@ from ..models.charset_manager import CharsetManager
 from ..preprocessing.color_filter import ColorFilter
 from ..preprocessing.image_processor import ImageProcessor
 from ..utils.image_io import load_image_from_input, png_rgba_black_preprocess
-from ..utils.exceptions import ModelLoadError, ImageProcessError
+from ..utils.exceptions import DDDDOCRError, ModelLoadError, ImageProcessError
 from ..utils.validators import validate_image_input
 
 
 class OCREngine(BaseEngine):
     """OCR识别引擎"""
     
+    # 预热模式：off（不预热）、sync（初始化时同步预热）、background（后台线程预热）
+    WARMUP_MODES = ('off', 'sync', 'background')
+    
+    # 默认预热的验证码原图尺寸 (宽, 高)
+    DEFAULT_WARMUP_SIZES = ((100, 40), (120, 40), (160, 60))
+    
+    # 宽度桶对齐的像素数（与默认模型的时间步步长一致）
+    BUCKET_ALIGNMENT = 8
+    
     def __init__(self, use_gpu: bool = False, device_id: int = 0, 
                  old: bool = False, beta: bool = False,
-                 import_onnx_path: str = "", charsets_path: str = ""):
+                 import_onnx_path: str = "", charsets_path: str = "",
+                 session_options: Optional[Dict[str, Any]] = None,
+                 quantized: bool = False,
+                 warmup: Optional[Union[bool, str]] = None,
+                 warmup_sizes: Optional[Union[str, Sequence[Tuple[int, int]]]] = None,
+                 width_buckets: Optional[Union[str, Sequence[int]]] = None,
+                 io_binding: Optional[bool] = None,
+                 model_path: str = ""):
         """
         初始化OCR引擎
         
@@ -33,14 +54,30 @@ class OCREngine(BaseEngine):
             beta: 是否使用beta版模型
             import_onnx_path: 自定义模型路径
             charsets_path: 自定义字符集路径
+            session_options: ONNX运行时会话选项
+            quantized: 是否加载INT8量化模型（需先通过 python -m ddddocr quantize 生成）
+            warmup: 预热模式（off/sync/background，True等同sync），默认读取环境变量 DDDDOCR_WARMUP
+            warmup_sizes: 预热的验证码原图尺寸，如 "100x40,120x40"，默认读取环境变量 DDDDOCR_WARMUP_SHAPES
+            width_buckets: 模型输入宽度桶，如 "128,160,192"，默认读取环境变量 DDDDOCR_WIDTH_BUCKETS，
+                为空时不分桶（每种宽度都是新的输入形状）。分桶结果是近似的：感受野跨越多列的模型
+                会受填充列影响，启用前应以 python -m ddddocr buckets 在样本上校验一致率
+            io_binding: 是否为每个宽度桶预分配输入输出缓冲区并通过IOBinding推理（需要宽度桶），
+                默认读取环境变量 DDDDOCR_IO_BINDING
+            model_path: 显式指定加载的模型文件（如待校验的量化模型），字符集与预处理配置
+                仍由 old/beta/import_onnx_path 决定；为空时按这些参数选择模型文件
+            
+        Raises:
+            ModelLoadError: 当初始化失败或预热、分桶配置无效时
         """
-        super().__init__(use_gpu, device_id)
+        super().__init__(use_gpu, device_id, session_options)
         
         self.old = old
         self.beta = beta
+        self.quantized = quantized
         self.import_onnx_path = import_onnx_path
         self.charsets_path = charsets_path
         self.use_import_onnx = bool(import_onnx_path)
+        self.model_path = model_path
         
         # 字符集管理器
         self.charset_manager = CharsetManager()
@@ -49,9 +86,112 @@ class OCREngine(BaseEngine):
         self.word = False
         self.resize = []
         self.channel = 1
+        # 三维序列输出中batch所在的维度：1 表示 (sequence_length, batch, num_classes)，
+        # 0 表示 (batch, sequence_length, num_classes)；加载模型时确定一次
+        self.output_batch_axis = 1
+        
+        # 预热配置与状态
+        self.warmup_mode = self.resolve_warmup_mode(warmup)
+        if warmup_sizes is None:
+            warmup_sizes = os.getenv('DDDDOCR_WARMUP_SHAPES') or self.DEFAULT_WARMUP_SIZES
+        self.warmup_sizes = self.parse_warmup_sizes(warmup_sizes)
+        self.warmup_timings: Dict[str, Dict[str, Any]] = {}
+        self.warmup_total_ms: Optional[float] = None
+        self.warmup_error: Optional[str] = None
+        self._warmed_up = threading.Event()
+        # 预热结束（无论成功与否），wait_until_warm 据此返回
+        self._warmup_finished = threading.Event()
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        
+        # 宽度分桶与IOBinding缓冲区
+        if width_buckets is None:
+            width_buckets = os.getenv('DDDDOCR_WIDTH_BUCKETS') or []
+        self.width_buckets = self.parse_width_buckets(width_buckets)
+        if io_binding is None:
+            io_binding = os.getenv('DDDDOCR_IO_BINDING', 'false').lower() in ('1', 'true', 'yes', 'on')
+        self.io_binding = io_binding and bool(self.width_buckets)
+        self._bucket_buffers: Dict[Tuple[int, ...], Dict[str, Any]] = {}
+        self._bucket_lock = threading.Lock()
         
         # 初始化引擎
         self.initialize()
+        
+        if self.warmup_mode != 'off':
+            self.warm_up(background=self.warmup_mode == 'background')
+    
+    def with_model_file(self, model_path: str,
+                        session_options: Optional[Dict[str, Any]] = None) -> 'OCREngine':
+        """
+        以相同的模型配置（字符集、预处理、宽度桶）创建加载另一个模型文件的新引擎
+        
+        新引擎重新构造，不与本引擎共享锁、预热状态或缓冲区，也不预热。
+        
+        Args:
+            model_path: 模型文件路径（如待校验的量化模型）
+            session_options: 会话选项，默认与本引擎相同
+            
+        Returns:
+            新的OCR引擎
+            
+        Raises:
+            ModelLoadError: 当加载失败时
+        """
+        return OCREngine(use_gpu=self.use_gpu, device_id=self.device_id, old=self.old, beta=self.beta,
+                         import_onnx_path=self.import_onnx_path, charsets_path=self.charsets_path,
+                         session_options=session_options if session_options is not None
+                         else self.model_loader.session_options,
+                         warmup='off', warmup_sizes=self.warmup_sizes, width_buckets=self.width_buckets,
+                         io_binding=self.io_binding, model_path=model_path)
+    
+    @classmethod
+    def resolve_warmup_mode(cls, warmup: Optional[Union[bool, str]] = None) -> str:
+        """
+        解析预热模式：显式配置 > 环境变量 DDDDOCR_WARMUP > off
+        
+        Args:
+            warmup: 预热模式或布尔值
+            
+        Returns:
+            预热模式
+            
+        Raises:
+            ModelLoadError: 当预热模式无效时
+        """
+        if warmup is None:
+            warmup = os.getenv('DDDDOCR_WARMUP') or 'off'
+        if isinstance(warmup, bool):
+            return 'sync' if warmup else 'off'
+        mode = warmup.lower()
+        if mode not in cls.WARMUP_MODES:
+            raise ModelLoadError(f"预热模式无效: {warmup}，可选 {', '.join(cls.WARMUP_MODES)}")
+        return mode
+    
+    @staticmethod
+    def parse_warmup_sizes(value: Union[str, Sequence[Tuple[int, int]]]) -> List[Tuple[int, int]]:
+        """
+        解析预热尺寸
+        
+        Args:
+            value: 逗号分隔的 宽x高 字符串或 (宽, 高) 序列
+            
+        Returns:
+            (宽, 高) 列表
+            
+        Raises:
+            ModelLoadError: 当尺寸格式无效时
+        """
+        try:
+            if isinstance(value, str):
+                sizes = [tuple(int(n) for n in item.lower().split('x'))
+                         for item in value.split(',') if item.strip()]
+            else:
+                sizes = [(int(width), int(height)) for width, height in value]
+            if any(len(size) != 2 or min(size) <= 0 for size in sizes):
+                raise ValueError("宽高必须为正整数")
+            return sizes
+        except ValueError as e:
+            raise ModelLoadError(f"预热尺寸无效: {value}（{str(e)}）") from e
     
     def initialize(self, **kwargs) -> None:
         """
@@ -64,43 +204,45 @@ class OCREngine(BaseEngine):
             if self.use_import_onnx:
                 # 加载自定义模型
                 self.session, charset_info = self.model_loader.load_custom_model(
-                    self.import_onnx_path, self.charsets_path
+                    self.model_path or self.model_loader.resolve_model_path(self.import_onnx_path, self.quantized),
+                    self.charsets_path
                 )
                 
-                # 设置模型配置
+                # 设置模型配置（设置字符集时同步重建索引表）
                 self.charset_manager.charset = charset_info['charset']
 
-                # 初始化有效字符索引（使用完整字符集）
-                self.charset_manager._update_valid_indices()
-
                 self.word = charset_info['word']
                 self.resize = charset_info['image']
                 self.channel = charset_info['channel']
             else:
                 # 加载默认模型
-                self.session = self.model_loader.load_ocr_model(self.old, self.beta)
+                if self.model_path:
+                    self.session = self.model_loader.load_model(self.model_path)
+                else:
+                    self.session = self.model_loader.load_ocr_model(self.old, self.beta, quantized=self.quantized)
                 
                 # 加载默认字符集
                 self.charset_manager.load_default_charset(self.old, self.beta)
 
-                # 初始化有效字符索引（使用完整字符集）
-                self.charset_manager._update_valid_indices()
-
                 # 设置默认配置
                 self.word = False
                 self.resize = [64, 64]  # 默认尺寸
                 self.channel = 1
             
+            self.output_batch_axis = self._detect_output_batch_axis()
             self.is_initialized = True
             
         except Exception as e:
             raise ModelLoadError(f"OCR引擎初始化失败: {str(e)}") from e
     
-    def predict(self, image: Union[bytes, str, Image.Image], 
+    def predict(self, image: Union[bytes, str, Image.Image, np.ndarray], 
                 png_fix: bool = False, probability: bool = False,
                 color_filter_colors: Optional[List[str]] = None,
                 color_filter_custom_ranges: Optional[List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]] = None,
-                charset_range: Optional[Union[int, str, List[str]]] = None) -> Union[str, Dict[str, Any]]:
+                charset_range: Optional[Union[int, str, List[str]]] = None,
+                confidence: bool = False,
+                expected_length: Optional[Union[int, Tuple[int, int]]] = None,
+                timings: Optional[Dict[str, float]] = None) -> Union[str, Dict[str, Any]]:
         """
         执行OCR识别
         
@@ -110,12 +252,17 @@ class OCREngine(BaseEngine):
             probability: 是否返回概率信息
             color_filter_colors: 颜色过滤预设颜色列表
             color_filter_custom_ranges: 自定义HSV颜色范围列表
-            charset_range: 字符集范围限制
+            charset_range: 本次调用的字符集范围限制（不修改默认范围）
+            confidence: 是否返回逐字符置信度（不含完整概率矩阵，开销远小于probability）
+            expected_length: 期望字符数（如 4 或 (4, 5)），解码时在满足长度的CTC路径中取概率最高者
+            timings: 传入字典时记录各阶段耗时（秒）：preprocess（加载、颜色过滤、缩放与标准化）、
+                inference（ONNX推理）、ctc（CTC解码与置信度计算），供基准测试使用
             
         Returns:
             识别结果文本或包含概率信息的字典
             
         Raises:
+            DDDDOCRError: 当期望字符数无效时
             ImageProcessError: 当图像处理失败时
             ModelLoadError: 当模型未初始化时
         """
@@ -124,42 +271,538 @@ class OCREngine(BaseEngine):
         
         # 验证输入
         validate_image_input(image)
+        length = self._normalize_expected_length(expected_length)
         
         try:
-            # 加载图像
-            pil_image = load_image_from_input(image)
+            start = time.perf_counter()
             
-            # 应用颜色过滤
-            if color_filter_colors or color_filter_custom_ranges:
-                try:
-                    color_filter = ColorFilter(colors=color_filter_colors, 
-                                             custom_ranges=color_filter_custom_ranges)
-                    pil_image = color_filter.filter_image(pil_image)
-                except Exception as e:
-                    print(f"颜色过滤警告: {str(e)}，将跳过颜色过滤步骤")
-            
-            # 设置字符集范围
-            if charset_range is not None:
-                self.charset_manager.set_ranges(charset_range)
-            else:
-                # 确保在没有设置字符集范围时，有效索引被正确初始化
-                self.charset_manager._update_valid_indices()
+            # 加载图像并应用颜色过滤
+            pil_image = self._load_image(image, color_filter_colors, color_filter_custom_ranges)
+            
+            # 本次调用的字符集范围掩码（不修改引擎的默认范围）
+            range_mask = self._get_range_mask(charset_range)
             
             # 预处理图像
             processed_image = self._preprocess_image(pil_image, png_fix)
+            if timings is not None:
+                timings['preprocess'] = time.perf_counter() - start
             
             # 执行推理
-            result = self._inference(processed_image, probability)
+            result = self._inference(processed_image, probability, range_mask, confidence, length, timings)
             
             return result
             
         except Exception as e:
             raise ImageProcessError(f"OCR识别失败: {str(e)}") from e
     
+    def predict_batch(self, images: List[Union[bytes, str, Image.Image, np.ndarray]],
+                      png_fix: bool = False, probability: bool = False,
+                      color_filter_colors: Optional[List[str]] = None,
+                      color_filter_custom_ranges: Optional[List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]] = None,
+                      charset_range: Optional[Union[int, str, List[str]]] = None,
+                      pad_to_common_width: bool = False,
+                      confidence: bool = False,
+                      expected_length: Optional[Union[int, Tuple[int, int]]] = None) -> List[Union[str, Dict[str, Any]]]:
+        """
+        批量执行OCR识别
+        
+        宽度相同的图像合并为一次推理；pad_to_common_width为True时，所有图像
+        右侧以边缘像素填充到同一宽度后只推理一次，并按原始宽度截断时间步。
+        对含双向RNN的模型，填充可能轻微影响结果，按宽度分组则与逐张识别完全一致。
+        
+        Args:
+            images: 输入图像列表
+            png_fix: 是否修复PNG透明背景
+            probability: 是否返回概率信息
+            color_filter_colors: 颜色过滤预设颜色列表
+            color_filter_custom_ranges: 自定义HSV颜色范围列表
+            charset_range: 本次调用的字符集范围限制（不修改默认范围）
+            pad_to_common_width: 是否填充到统一宽度后一次推理
+            confidence: 是否返回逐字符置信度
+            expected_length: 期望字符数（如 4 或 (4, 5)）
+            
+        Returns:
+            与输入顺序一致的识别结果列表
+            
+        Raises:
+            DDDDOCRError: 当期望字符数无效时
+            ImageProcessError: 当图像处理失败时
+            ModelLoadError: 当模型未初始化时
+        """
+        if not self.is_ready():
+            raise ModelLoadError("OCR引擎未初始化")
+        
+        for image in images:
+            validate_image_input(image)
+        length = self._normalize_expected_length(expected_length)
+        
+        if not images:
+            return []
+        
+        try:
+            range_mask = self._get_range_mask(charset_range)
+            
+            arrays = []
+            for image in images:
+                pil_image = self._load_image(image, color_filter_colors, color_filter_custom_ranges)
+                arrays.append(self._image_to_array(pil_image, png_fix))
+            
+            # 模型batch维度固定时只能逐张推理
+            if not self.supports_batching():
+                return [self._inference(np.expand_dims(array, axis=0), probability, range_mask, confidence, length)
+                        for array in arrays]
+            
+            # 按输入形状分组（填充模式下全部合为一组）
+            groups: Dict[Any, List[int]] = {}
+            for index, array in enumerate(arrays):
+                key = array.shape[:-1] if pad_to_common_width else array.shape
+                groups.setdefault(key, []).append(index)
+            
+            results: List[Union[str, Dict[str, Any]]] = [None] * len(arrays)
+            for indices in groups.values():
+                widths = [arrays[i].shape[-1] for i in indices]
+                batch = self._stack_batch([arrays[i] for i in indices], max(widths))
+                outputs = self._run_session(batch)
+                
+                for index, width, output in zip(indices, widths,
+                                                self._split_batch_output(outputs[0], len(indices))):
+                    output = self._trim_timesteps(output, width, batch.shape[-1])
+                    results[index] = self._process_output(output, probability, range_mask, confidence, length)
+            
+            return results
+            
+        except Exception as e:
+            raise ImageProcessError(f"批量OCR识别失败: {str(e)}") from e
+    
+    @staticmethod
+    def parse_width_buckets(value: Union[str, Sequence[int]]) -> List[int]:
+        """
+        解析宽度桶
+        
+        Args:
+            value: 逗号分隔的宽度字符串或宽度序列
+            
+        Returns:
+            升序去重的宽度列表
+            
+        Raises:
+            ModelLoadError: 当宽度无效时
+        """
+        try:
+            if isinstance(value, str):
+                widths = [int(item) for item in value.split(',') if item.strip()]
+            else:
+                widths = [int(width) for width in value]
+            if any(width <= 0 for width in widths):
+                raise ValueError("宽度必须为正整数")
+            return sorted(set(widths))
+        except ValueError as e:
+            raise ModelLoadError(f"宽度桶无效: {value}（{str(e)}）") from e
+    
+    @classmethod
+    def suggest_width_buckets(cls, widths: Sequence[int], max_buckets: int = 4) -> List[int]:
+        """
+        根据样本的模型输入宽度分布推荐宽度桶
+        
+        取宽度分布的等分位点并向上对齐到 BUCKET_ALIGNMENT，最大的桶覆盖全部样本。
+        
+        Args:
+            widths: 样本的模型输入宽度（可用 input_width 计算）
+            max_buckets: 最多的桶数
+            
+        Returns:
+            升序的宽度桶列表
+        """
+        if not widths:
+            return []
+        
+        def align(width: float) -> int:
+            return int(math.ceil(width / cls.BUCKET_ALIGNMENT) * cls.BUCKET_ALIGNMENT)
+        
+        aligned = sorted(set(align(width) for width in widths))
+        if len(aligned) <= max_buckets:
+            return aligned
+        
+        quantiles = [100.0 * (i + 1) / max_buckets for i in range(max_buckets)]
+        return sorted(set(align(width) for width in np.percentile(widths, quantiles)))
+    
+    def bucket_agreement(self, images: Sequence[Union[bytes, str, Image.Image, np.ndarray]],
+                         buckets: Optional[Union[str, Sequence[int]]] = None) -> Dict[int, Dict[str, int]]:
+        """
+        测量宽度分桶对识别结果的影响
+        
+        分桶后右侧的边缘填充列会进入感受野跨越多列的卷积/RNN模型对保留时间步的计算，
+        按宽度比例截去的时间步也只是近似，因此分桶结果不保证与不分桶一致。
+        每个样本分别按不分桶与分桶推理，统计每个桶中识别文本一致的样本数。
+        
+        Args:
+            images: 样本图像
+            buckets: 待校验的宽度桶，默认使用 width_buckets
+            
+        Returns:
+            {桶宽度: {'samples': 落入该桶的样本数, 'agreed': 识别文本一致的样本数}}
+            
+        Raises:
+            ModelLoadError: 当模型未初始化或宽度桶无效时
+        """
+        if not self.is_ready():
+            raise ModelLoadError("OCR引擎未初始化")
+        
+        buckets = self.parse_width_buckets(buckets) if buckets is not None else list(self.width_buckets)
+        report = {bucket: {'samples': 0, 'agreed': 0} for bucket in buckets}
+        for image in images:
+            array = self._preprocess_image(self._load_image(image), False)
+            width = array.shape[-1]
+            bucket = next((bucket for bucket in buckets if bucket >= width), None)
+            if bucket is None:
+                continue
+            expected = self._process_output(self._run_session(array)[0], False, None, False, None)
+            output = self._trim_timesteps(self._run_session(self._stack_batch([array[0]], bucket))[0],
+                                          width, bucket)
+            report[bucket]['samples'] += 1
+            report[bucket]['agreed'] += int(self._process_output(output, False, None, False, None) == expected)
+        return report
+    
+    def verify_width_buckets(self, images: Sequence[Union[bytes, str, Image.Image, np.ndarray]],
+                             buckets: Union[str, Sequence[int]],
+                             min_agreement: float = 1.0) -> Tuple[List[int], Dict[int, Dict[str, int]]]:
+        """
+        在样本上校验宽度桶，去掉改变识别结果的桶
+        
+        去掉一个桶后其样本落入更大的桶，因此反复校验直到剩余的桶都达到一致率要求。
+        
+        Args:
+            images: 样本图像
+            buckets: 待校验的宽度桶
+            min_agreement: 每个桶要求的最低一致率（默认1.0，即结果完全一致）
+            
+        Returns:
+            (保留的宽度桶, 最后一轮的一致率统计)
+        """
+        accepted = self.parse_width_buckets(buckets)
+        while True:
+            report = self.bucket_agreement(images, accepted)
+            rejected = [bucket for bucket, stats in report.items()
+                        if stats['samples'] and stats['agreed'] / stats['samples'] < min_agreement]
+            if not rejected:
+                return accepted, report
+            accepted = [bucket for bucket in accepted if bucket not in rejected]
+    
+    def input_width(self, image: Union[bytes, str, Image.Image, np.ndarray]) -> int:
+        """
+        计算图像预处理后的模型输入宽度
+        
+        Args:
+            image: 输入图像
+            
+        Returns:
+            模型输入宽度
+        """
+        return self._image_to_array(self._load_image(image), False).shape[-1]
+    
+    def _select_bucket(self, width: int) -> Optional[int]:
+        """
+        选择不小于输入宽度的最小宽度桶
+        
+        Args:
+            width: 模型输入宽度
+            
+        Returns:
+            宽度桶，未分桶或超出最大桶时返回None
+        """
+        for bucket in self.width_buckets:
+            if bucket >= width:
+                return bucket
+        return None
+    
+    def _get_bucket_buffers(self, shape: Tuple[int, ...]) -> Dict[str, Any]:
+        """
+        获取宽度桶的预分配输入输出缓冲区与IOBinding（首次使用时创建）
+        
+        Args:
+            shape: 分桶后的模型输入形状 (1, C, H, bucket)
+            
+        Returns:
+            包含 input、outputs、binding、lock 的字典
+        """
+        with self._bucket_lock:
+            buffers = self._bucket_buffers.get(shape)
+            if buffers is not None:
+                return buffers
+            
+            input_buffer = np.zeros(shape, dtype=np.float32)
+            # 先推理一次以确定输出形状
+            output_names = [output.name for output in self.session.get_outputs()]
+            output_buffers = [np.empty_like(output) for output in self._run_session(input_buffer)]
+            
+            binding = self.session.io_binding()
+            binding.bind_cpu_input(self.session.get_inputs()[0].name, input_buffer)
+            for name, buffer in zip(output_names, output_buffers):
+                binding.bind_output(name, 'cpu', 0, buffer.dtype, list(buffer.shape), buffer.ctypes.data)
+            
+            buffers = {'input': input_buffer, 'outputs': output_buffers,
+                       'binding': binding, 'lock': threading.Lock()}
+            self._bucket_buffers[shape] = buffers
+            return buffers
+    
+    @contextmanager
+    def _session_output(self, image_array: np.ndarray) -> Iterator[np.ndarray]:
+        """
+        推理单张图像，按宽度桶填充并截去填充对应的时间步（结果近似，见 bucket_agreement）
+        
+        启用IOBinding时，产出的输出是该宽度桶的共享缓冲区，只在with块内有效，
+        同一宽度桶的并发推理在with块内串行执行。
+        
+        Args:
+            image_array: 带batch维度的输入数组 (1, C, H, W)
+            
+        Yields:
+            单张图像的模型输出
+        """
+        width = image_array.shape[-1]
+        bucket = self._select_bucket(width)
+        
+        if bucket is None:
+            yield self._run_session(image_array)[0]
+            return
+        
+        if not self.io_binding:
+            padded = self._stack_batch([image_array[0]], bucket)
+            yield self._trim_timesteps(self._run_session(padded)[0], width, bucket)
+            return
+        
+        buffers = self._get_bucket_buffers(image_array.shape[:-1] + (bucket,))
+        with buffers['lock']:
+            input_buffer = buffers['input']
+            # 右侧以边缘像素填充，与 _stack_batch 一致
+            input_buffer[0, ..., :width] = image_array[0]
+            input_buffer[0, ..., width:] = image_array[0, ..., -1:]
+            self.session.run_with_iobinding(buffers['binding'])
+            yield self._trim_timesteps(buffers['outputs'][0], width, bucket)
+    
+    def warm_up(self, sizes: Optional[Sequence[Tuple[int, int]]] = None, background: bool = False,
+                runs: int = 2) -> Optional[threading.Thread]:
+        """
+        以空白图像在预期尺寸上执行推理，使内存分配与算子选择在真实验证码到来之前完成
+        
+        映射到相同模型输入形状的尺寸只预热一次。预热期间引擎可以正常识别。
+        
+        Args:
+            sizes: 验证码原图尺寸 (宽, 高) 列表或 "宽x高,宽x高" 字符串，默认使用 warmup_sizes
+            background: 是否在后台线程中预热
+            runs: 每个输入形状的推理次数
+            
+        Returns:
+            后台预热线程，同步预热时返回None
+            
+        Raises:
+            ModelLoadError: 当模型未初始化或尺寸格式无效时
+        """
+        if not self.is_ready():
+            raise ModelLoadError("OCR引擎未初始化")
+        
+        sizes = self.parse_warmup_sizes(sizes) if sizes is not None else list(self.warmup_sizes)
+        if not background:
+            self._run_warm_up(sizes, runs)
+            return None
+        
+        with self._warmup_lock:
+            if self._warmup_thread is None or not self._warmup_thread.is_alive():
+                self._warmed_up.clear()
+                self._warmup_finished.clear()
+                self._warmup_thread = threading.Thread(target=self._run_warm_up, args=(sizes, runs),
+                                                       name="ddddocr-warm-up", daemon=True)
+                self._warmup_thread.start()
+            return self._warmup_thread
+    
+    def _run_warm_up(self, sizes: List[Tuple[int, int]], runs: int) -> None:
+        """
+        执行预热推理并记录耗时；至少一个输入形状推理成功才标记为已预热，否则记录失败原因
+        
+        Args:
+            sizes: 验证码原图尺寸列表
+            runs: 每个输入形状的推理次数
+        """
+        started = time.perf_counter()
+        seen_shapes = set()
+        self.warmup_error = None
+        try:
+            batches = [(f"{width}x{height}", self._preprocess_image(Image.new('L', (width, height), 255), False))
+                       for width, height in sizes]
+            # 启用宽度分桶时，每个桶都预热一次（IOBinding缓冲区也在此时分配）
+            if batches:
+                base_shape = batches[0][1].shape[:-1]
+                batches += [(f"bucket{bucket}", np.ones(base_shape + (bucket,), dtype=np.float32))
+                            for bucket in self.width_buckets]
+            
+            for name, batch in batches:
+                # 按分桶后的实际输入形状去重
+                width = batch.shape[-1]
+                shape = batch.shape[:-1] + (self._select_bucket(width) or width,)
+                if shape in seen_shapes:
+                    continue
+                seen_shapes.add(shape)
+                
+                timings = []
+                for _ in range(max(1, runs)):
+                    start = time.perf_counter()
+                    self._inference(batch, False)
+                    timings.append((time.perf_counter() - start) * 1000.0)
+                self.warmup_timings[name] = {
+                    'input_shape': list(shape),
+                    'first_ms': timings[0],
+                    'last_ms': timings[-1],
+                }
+            if not seen_shapes:
+                raise ValueError("没有可预热的尺寸")
+            self._warmed_up.set()
+        except Exception as e:
+            # 预热失败不影响正常识别
+            self.warmup_error = str(e)
+            print(f"OCR引擎预热失败: {str(e)}")
+        finally:
+            self.warmup_total_ms = (time.perf_counter() - started) * 1000.0
+            self._warmup_finished.set()
+    
+    def is_warmed_up(self) -> bool:
+        """
+        检查预热是否已完成
+        
+        Returns:
+            是否已完成预热
+        """
+        return self._warmed_up.is_set()
+    
+    def wait_until_warm(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待预热结束
+        
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+            
+        Returns:
+            是否已成功完成预热（预热失败时立即返回False）
+        """
+        self._warmup_finished.wait(timeout)
+        return self.is_warmed_up()
+    
+    def get_warmup_stats(self) -> Dict[str, Any]:
+        """
+        获取预热状态与耗时
+        
+        Returns:
+            预热状态（pending/warm/failed）、是否完成、失败原因、总耗时
+            以及每个尺寸首次与最后一次推理的耗时（毫秒）
+        """
+        if self.is_warmed_up():
+            status = 'warm'
+        elif self.warmup_error is not None:
+            status = 'failed'
+        else:
+            status = 'pending'
+        return {
+            'status': status,
+            'warmed_up': self.is_warmed_up(),
+            'error': self.warmup_error,
+            'total_ms': self.warmup_total_ms,
+            'shapes': dict(self.warmup_timings),
+        }
+    
+    def _detect_output_batch_axis(self) -> int:
+        """
+        确定三维序列输出中batch所在的维度
+        
+        优先根据会话的输入输出元数据判断（输出中与输入batch维度同名或固定为1的维度）；
+        元数据无法确定时，用同一张空白图像分别以batch=1和batch=2推理一次，尺寸变化的维度即为batch维度。
+        不能在每次推理时按形状猜测：sequence_length 恰好等于batch大小时会拆错维度。
+        
+        Returns:
+            batch维度（0或1）
+        """
+        output_shape = list(self.session.get_outputs()[0].shape)
+        if len(output_shape) != 3:
+            return 0
+        
+        input_shape = list(self.session.get_inputs()[0].shape)
+        batch_dim = input_shape[0]
+        if isinstance(batch_dim, str) and output_shape[:2].count(batch_dim) == 1:
+            return output_shape.index(batch_dim)
+        fixed_ones = [axis for axis in (0, 1) if output_shape[axis] == 1]
+        if len(fixed_ones) == 1:
+            return fixed_ones[0]
+        if not self.supports_batching():
+            return 1
+        
+        height = input_shape[2] if isinstance(input_shape[2], int) else (self.resize[1] if self.use_import_onnx else 64)
+        width = input_shape[3] if isinstance(input_shape[3], int) else height * 2
+        channels = input_shape[1] if isinstance(input_shape[1], int) else self.channel
+        probe = np.zeros((2, channels, height, width), dtype=np.float32)
+        single = self._run_session(probe[:1])[0].shape
+        double = self._run_session(probe)[0].shape
+        changed = [axis for axis in (0, 1) if single[axis] != double[axis]]
+        return changed[0] if len(changed) == 1 else 1
+    
+    def supports_batching(self) -> bool:
+        """
+        检查模型输入是否支持batch维度大于1
+        
+        Returns:
+            是否支持批量推理
+        """
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        return not (isinstance(batch_dim, int) and batch_dim == 1)
+    
+    def _load_image(self, image: Union[bytes, str, Image.Image, np.ndarray],
+                    color_filter_colors: Optional[List[str]] = None,
+                    color_filter_custom_ranges: Optional[List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]] = None) -> Image.Image:
+        """
+        加载图像并按需应用颜色过滤
+        
+        Args:
+            image: 输入图像
+            color_filter_colors: 颜色过滤预设颜色列表
+            color_filter_custom_ranges: 自定义HSV颜色范围列表
+            
+        Returns:
+            PIL图像
+        """
+        if isinstance(image, Image.Image):
+            # 后续预处理均生成新图像，不会修改输入，无需复制
+            pil_image = image
+        elif isinstance(image, np.ndarray) and image.dtype == np.uint8 and image.ndim == 2:
+            # 灰度数组直接包装为图像，避免编码再解码
+            pil_image = Image.fromarray(image, mode='L')
+        else:
+            pil_image = load_image_from_input(image)
+        
+        if color_filter_colors or color_filter_custom_ranges:
+            try:
+                # 相同范围的过滤器只编译一次，跨调用、跨线程共享
+                color_filter = ColorFilter.compiled(colors=color_filter_colors,
+                                                    custom_ranges=color_filter_custom_ranges)
+                pil_image = color_filter.filter_image(pil_image)
+            except Exception as e:
+                print(f"颜色过滤警告: {str(e)}，将跳过颜色过滤步骤")
+        
+        return pil_image
+    
     def _preprocess_image(self, image: Image.Image, png_fix: bool) -> np.ndarray:
         """
         预处理图像
         
+        Args:
+            image: 输入图像
+            png_fix: 是否修复PNG透明背景
+            
+        Returns:
+            预处理后的numpy数组
+        """
+        return np.expand_dims(self._image_to_array(image, png_fix), axis=0)  # 添加batch维度
+    
+    def _image_to_array(self, image: Image.Image, png_fix: bool) -> np.ndarray:
+        """
+        将图像转换为不含batch维度的模型输入数组 (C, H, W)
+        
         Args:
             image: 输入图像
             png_fix: 是否修复PNG透明背景
@@ -178,7 +821,8 @@ class OCREngine(BaseEngine):
                 target_height = 64
                 target_width = int(image.size[0] * (target_height / image.size[1]))
                 image = ImageProcessor.resize_image(image, (target_width, target_height))
-                image = ImageProcessor.convert_to_grayscale(image)
+                if image.mode != 'L':
+                    image = ImageProcessor.convert_to_grayscale(image)
             else:
                 # 自定义模型的预处理
                 if self.resize[0] == -1:
@@ -192,14 +836,12 @@ class OCREngine(BaseEngine):
                     image = ImageProcessor.resize_image(image, (self.resize[0], self.resize[1]))
                 
                 # 根据通道数转换
-                if self.channel == 1:
+                if self.channel == 1 and image.mode != 'L':
                     image = ImageProcessor.convert_to_grayscale(image)
             
-            # 转换为numpy数组并标准化
-            img_array = np.array(image).astype(np.float32)
-            
-            # 标准化到[0,1]
-            img_array = img_array / 255.0
+            # 直接转换为float32数组，并原地标准化到[0,1]
+            img_array = np.asarray(image, dtype=np.float32)
+            img_array /= 255.0
             
             # 调整维度
             if len(img_array.shape) == 2:
@@ -207,97 +849,207 @@ class OCREngine(BaseEngine):
             elif len(img_array.shape) == 3:
                 img_array = img_array.transpose(2, 0, 1)  # HWC -> CHW
             
-            img_array = np.expand_dims(img_array, axis=0)  # 添加batch维度
-            
             return img_array
             
         except Exception as e:
             raise ImageProcessError(f"图像预处理失败: {str(e)}") from e
     
-    def _inference(self, image_array: np.ndarray, probability: bool) -> Union[str, Dict[str, Any]]:
+    def _inference(self, image_array: np.ndarray, probability: bool,
+                   range_mask: Optional[np.ndarray] = None,
+                   confidence: bool = False,
+                   expected_length: Optional[Tuple[int, int]] = None,
+                   timings: Optional[Dict[str, float]] = None) -> Union[str, Dict[str, Any]]:
         """
         执行模型推理
         
         Args:
             image_array: 预处理后的图像数组
             probability: 是否返回概率信息
+            range_mask: 字符集范围掩码
+            confidence: 是否返回逐字符置信度
+            expected_length: 期望字符数范围 (最少, 最多)
+            timings: 传入字典时记录 inference 与 ctc 阶段耗时（秒）
             
         Returns:
             识别结果
         """
         try:
-            # 获取输入名称
-            input_name = self.session.get_inputs()[0].name
-            
-            # 执行推理
-            outputs = self.session.run(None, {input_name: image_array})
-            
-            # 处理输出
-            if probability:
-                return self._process_probability_output(outputs[0])
-            else:
-                return self._process_text_output(outputs[0])
+            # 执行推理（按宽度桶填充），并在输出缓冲区有效期内处理输出
+            start = time.perf_counter()
+            with self._session_output(image_array) as output:
+                decode_start = time.perf_counter()
+                result = self._process_output(output, probability, range_mask, confidence, expected_length)
+                if timings is not None:
+                    timings['inference'] = decode_start - start
+                    timings['ctc'] = time.perf_counter() - decode_start
+                return result
                 
         except Exception as e:
             raise ModelLoadError(f"模型推理失败: {str(e)}") from e
     
-    def _process_text_output(self, output: np.ndarray) -> str:
+    def _run_session(self, image_array: np.ndarray) -> List[np.ndarray]:
+        """
+        执行一次ONNX推理
+        
+        Args:
+            image_array: 带batch维度的输入数组
+            
+        Returns:
+            模型输出列表
+        """
+        input_name = self.session.get_inputs()[0].name
+        return self.session.run(None, {input_name: image_array})
+    
+    def _process_output(self, output: np.ndarray, probability: bool,
+                        range_mask: Optional[np.ndarray] = None,
+                        confidence: bool = False,
+                        expected_length: Optional[Tuple[int, int]] = None) -> Union[str, Dict[str, Any]]:
+        """
+        将单张图像的模型输出转换为识别结果
+        
+        Args:
+            output: 单张图像的模型输出
+            probability: 是否返回概率信息
+            range_mask: 字符集范围掩码，在argmax之前屏蔽范围外字符的logits
+            confidence: 是否返回逐字符置信度
+            expected_length: 期望字符数范围 (最少, 最多)
+            
+        Returns:
+            识别结果
+        """
+        if range_mask is not None:
+            output = self._apply_range_mask(output, range_mask)
+        if probability:
+            return self._process_probability_output(output, expected_length)
+        if confidence:
+            return self._process_confidence_output(output, expected_length)
+        return self._process_text_output(output, expected_length)
+    
+    def _get_range_mask(self, charset_range: Optional[Union[int, str, List[str]]]) -> Optional[np.ndarray]:
+        """
+        获取本次识别使用的字符集范围掩码
+        
+        Args:
+            charset_range: 本次调用的字符集范围，为None时使用 set_charset_range 设置的默认范围
+            
+        Returns:
+            布尔掩码，无范围限制时返回None
+        """
+        if charset_range is not None:
+            return self.charset_manager.get_range_mask(charset_range)
+        return self.charset_manager.get_valid_index_mask()
+    
+    @staticmethod
+    def _apply_range_mask(output: np.ndarray, range_mask: np.ndarray) -> np.ndarray:
+        """
+        将范围外字符的logits置为最小值，使argmax在允许的字符中取最优
+        
+        Args:
+            output: 模型输出，最后一维为类别
+            range_mask: 字符集范围掩码
+            
+        Returns:
+            屏蔽后的模型输出
+        """
+        num_classes = output.shape[-1]
+        if range_mask.shape[0] != num_classes:
+            # 字符集与模型类别数不一致时，超出字符集的类别视为不允许
+            fitted = np.zeros(num_classes, dtype=bool)
+            size = min(num_classes, range_mask.shape[0])
+            fitted[:size] = range_mask[:size]
+            range_mask = fitted
+        if not range_mask.any():
+            return output
+        return np.where(range_mask, output, np.finfo(output.dtype).min)
+    
+    @staticmethod
+    def _stack_batch(arrays: List[np.ndarray], width: int) -> np.ndarray:
+        """
+        将多张 (C, H, W) 数组右侧以边缘像素填充到同一宽度并堆叠为batch
+        
+        Args:
+            arrays: 输入数组列表
+            width: 目标宽度
+            
+        Returns:
+            形状为 (N, C, H, width) 的数组
+        """
+        batch = np.empty((len(arrays),) + arrays[0].shape[:-1] + (width,), dtype=np.float32)
+        for i, array in enumerate(arrays):
+            array_width = array.shape[-1]
+            batch[i, ..., :array_width] = array
+            if array_width < width:
+                batch[i, ..., array_width:] = array[..., -1:]
+        return batch
+    
+    def _split_batch_output(self, output: np.ndarray, batch_size: int) -> List[np.ndarray]:
+        """
+        按加载时确定的batch维度，将批量输出拆分为与单张推理形状一致的输出
+        
+        Args:
+            output: 批量模型输出
+            batch_size: batch大小
+            
+        Returns:
+            每张图像的输出列表
+        """
+        if len(output.shape) == 3 and self.output_batch_axis == 1:
+            # 形状为 (sequence_length, batch_size, num_classes)
+            return [output[:, i:i + 1, :] for i in range(batch_size)]
+        # 形状为 (batch_size, ...)
+        return [output[i:i + 1] for i in range(batch_size)]
+    
+    def _trim_timesteps(self, output: np.ndarray, width: int, padded_width: int) -> np.ndarray:
+        """
+        截去填充区域对应的时间步
+        
+        Args:
+            output: 单张图像的模型输出
+            width: 原始输入宽度
+            padded_width: 填充后的输入宽度
+            
+        Returns:
+            截断后的输出
+        """
+        if width >= padded_width or len(output.shape) != 3:
+            return output
+        time_axis = 1 - self.output_batch_axis
+        steps = output.shape[time_axis]
+        keep = max(1, min(steps, int(steps * width / padded_width)))
+        return output[:keep] if time_axis == 0 else output[:, :keep]
+    
+    def _process_text_output(self, output: np.ndarray,
+                             expected_length: Optional[Tuple[int, int]] = None) -> str:
         """
         处理文本输出
         
         Args:
             output: 模型输出
+            expected_length: 期望字符数范围 (最少, 最多)
             
         Returns:
             识别的文本
         """
         try:
-            # 获取预测结果
-            if len(output.shape) == 3:
-                # 序列输出 (sequence_length, batch_size, num_classes) 或 (batch_size, sequence_length, num_classes)
-                # 需要判断哪个维度是batch_size=1
-                if output.shape[1] == 1:
-                    # 形状为 (sequence_length, 1, num_classes)
-                    predicted_indices = np.argmax(output[:, 0, :], axis=1)
-                elif output.shape[0] == 1:
-                    # 形状为 (1, sequence_length, num_classes)
-                    predicted_indices = np.argmax(output[0, :, :], axis=1)
-                else:
-                    # 默认取第一个batch
-                    predicted_indices = np.argmax(output[0, :, :], axis=1)
-            else:
-                # 单字符输出或2D序列输出
-                predicted_indices = np.argmax(output, axis=-1)
-                # 确保结果是数组形式，即使是单个值
-                if predicted_indices.ndim == 0:
-                    predicted_indices = np.array([predicted_indices])
+            # 获取预测结果（逐时间步的类别索引）
+            predicted_indices = self._best_path(self._sequence_logits(output), expected_length)
             
-            # 正确的CTC解码：在索引级别进行去重
-            charset = self.charset_manager.get_charset()
-            valid_indices = self.charset_manager.get_valid_indices()
+            charset = self.charset_manager.charset
 
-            # 步骤1：CTC解码 - 在索引级别去除连续重复
+            # 步骤1：CTC解码 - 在索引级别去除连续重复和blank
             decoded_indices = self._ctc_decode_indices(predicted_indices)
 
-            # 步骤2：转换为字符并应用字符集范围限制
-            result_chars = []
-            for idx in decoded_indices:
-                # 检查字符集范围限制
-                if valid_indices and idx not in valid_indices:
-                    continue
-
-                # 检查索引有效性并转换为字符
-                if 0 <= idx < len(charset):
-                    char = charset[idx]
-                    # 注意：这里不跳过空字符，因为CTC解码已经处理了blank
-                    result_chars.append(char)
+            # 步骤2：丢弃超出字符集的索引（字符集范围已在argmax之前通过掩码限制）
+            decoded_indices = decoded_indices[decoded_indices < len(charset)]
 
-            return ''.join(result_chars)
+            # 步骤3：转换为字符（不跳过空字符，CTC解码已经处理了blank）
+            return ''.join([charset[idx] for idx in decoded_indices.tolist()])
             
         except Exception as e:
             raise ModelLoadError(f"文本输出处理失败: {str(e)}") from e
 
-    def _ctc_decode_indices(self, predicted_indices: np.ndarray) -> List[int]:
+    @staticmethod
+    def _ctc_decode_indices(predicted_indices: np.ndarray) -> np.ndarray:
         """
         CTC解码：在索引级别去除连续重复和blank字符
 
@@ -305,35 +1057,238 @@ class OCREngine(BaseEngine):
             predicted_indices: 预测的索引数组
 
         Returns:
-            解码后的索引列表
+            解码后的索引数组
         """
-        if len(predicted_indices) == 0:
-            return []
-
-        decoded_indices = []
-        prev_idx = None
+        indices = np.asarray(predicted_indices).ravel()
+        if indices.size == 0:
+            return indices
 
-        for idx in predicted_indices:
-            # 转换为Python int类型以确保一致性
-            idx = int(idx)
+        # CTC解码规则：
+        # 1. 跳过连续重复的索引（与前一时间步相同）
+        # 2. 跳过blank字符（索引0，对应空字符）
+        keep = np.empty(indices.shape, dtype=bool)
+        keep[0] = True
+        np.not_equal(indices[1:], indices[:-1], out=keep[1:])
+        keep &= indices != 0
 
-            # CTC解码规则：
-            # 1. 跳过连续重复的索引
-            # 2. 跳过blank字符（索引0，对应空字符）
-            if idx != prev_idx:  # 不是连续重复
-                if idx != 0:  # 不是blank字符（假设索引0是blank）
-                    decoded_indices.append(idx)
+        return indices[keep]
 
-            prev_idx = idx
-
-        return decoded_indices
-
-    def _process_probability_output(self, output: np.ndarray) -> Dict[str, Any]:
+    @staticmethod
+    def _normalize_expected_length(expected_length: Optional[Union[int, Tuple[int, int]]]) -> Optional[Tuple[int, int]]:
+        """
+        将期望字符数统一为 (最少, 最多)
+        
+        Args:
+            expected_length: 期望字符数（如 4 或 (4, 5)），为None时不限制
+            
+        Returns:
+            字符数范围，不限制时返回None
+            
+        Raises:
+            DDDDOCRError: 当期望字符数无效时
+        """
+        if expected_length is None:
+            return None
+        if isinstance(expected_length, int):
+            low = high = expected_length
+        else:
+            low, high = expected_length
+        if not 1 <= low <= high:
+            raise DDDDOCRError(f"无效的期望字符数: {expected_length}")
+        return int(low), int(high)
+    
+    def _best_path(self, logits: np.ndarray, expected_length: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        求逐时间步的最优类别索引
+        
+        不限制长度时为各时间步的argmax；限制长度且argmax路径的字符数不符时，
+        在字符数满足范围的CTC路径中搜索概率最高者（不存在这样的路径时退回argmax）。
+        
+        Args:
+            logits: (sequence_length, num_classes) 的logits（已应用字符集范围掩码）
+            expected_length: 期望字符数范围 (最少, 最多)
+            
+        Returns:
+            长度为 sequence_length 的类别索引数组
+        """
+        indices = np.argmax(logits, axis=-1)
+        if expected_length is None or logits.shape[0] == 0:
+            return indices
+        
+        num_chars = len(self.charset_manager.charset)
+        decoded = self._ctc_decode_indices(indices)
+        low, high = expected_length
+        if low <= int(np.count_nonzero(decoded < num_chars)) <= high:
+            return indices
+        
+        # 只在允许的类别（未被范围掩码屏蔽、在字符集内）中搜索，blank固定为第0列
+        allowed = np.flatnonzero(logits.max(axis=0) > np.finfo(logits.dtype).min)
+        allowed = allowed[(allowed > 0) & (allowed < num_chars)]
+        columns = np.concatenate(([0], allowed))
+        log_probs = logits.astype(np.float64)
+        log_probs -= log_probs.max(axis=-1, keepdims=True)
+        log_probs -= np.log(np.exp(log_probs).sum(axis=-1, keepdims=True))
+        
+        path = self._length_constrained_path(log_probs[:, columns], low, high)
+        return indices if path is None else columns[path]
+    
+    @staticmethod
+    def _length_constrained_path(log_probs: np.ndarray, low: int, high: int) -> Optional[np.ndarray]:
+        """
+        在CTC解码后字符数位于 [low, high] 的路径中求概率最高的路径（Viterbi）
+        
+        状态为 (已输出字符数, 当前类别)：停留在同一类别不输出新字符，
+        经过blank或换成其他类别时输出一个字符（相同字符连续输出必须以blank隔开）。
+        
+        Args:
+            log_probs: (sequence_length, num_classes) 的对数概率，第0列为blank
+            low: 最少字符数
+            high: 最多字符数
+            
+        Returns:
+            路径上各时间步的列索引，不存在满足条件的路径时返回None
+        """
+        steps, classes = log_probs.shape
+        if classes < 2:
+            return None
+        
+        rows = np.arange(high + 1)
+        chars = np.arange(1, classes)
+        scores = np.full((high + 1, classes), -np.inf)
+        scores[0, 0] = log_probs[0, 0]
+        if high > 0:
+            scores[1, 1:] = log_probs[0, 1:]
+        # back[t, k, c]: 时间步t处于状态(k, c)时上一时间步的类别
+        back = np.zeros((steps, high + 1, classes), dtype=np.int32)
+        
+        for t in range(1, steps):
+            prev = scores
+            scores = np.empty_like(prev)
+            
+            # 进入blank：字符数不变，来自同一字符数下得分最高的任意状态
+            best_prev = np.argmax(prev, axis=1)
+            scores[:, 0] = prev[rows, best_prev] + log_probs[t, 0]
+            back[t, :, 0] = best_prev
+            
+            # 进入字符c：停留在c（字符数不变），或来自字符数少1的blank/其他字符
+            previous_chars = prev[:-1, 1:]
+            first = np.argmax(previous_chars, axis=1)
+            first_score = previous_chars[rows[:-1], first]
+            masked = previous_chars.copy()
+            masked[rows[:-1], first] = -np.inf
+            second = np.argmax(masked, axis=1)
+            second_score = masked[rows[:-1], second]
+            
+            is_first = chars[None, :] == (first[:, None] + 1)
+            other = np.where(is_first, second[:, None], first[:, None]) + 1
+            other_score = np.where(is_first, second_score[:, None], first_score[:, None])
+            from_blank = prev[:-1, :1] >= other_score
+            enter_score = np.where(from_blank, prev[:-1, :1], other_score)
+            enter_col = np.where(from_blank, 0, other)
+            
+            stay = prev[1:, 1:]
+            use_stay = stay >= enter_score
+            scores[1:, 1:] = np.where(use_stay, stay, enter_score) + log_probs[t, 1:]
+            back[t, 1:, 1:] = np.where(use_stay, chars[None, :], enter_col)
+            scores[0, 1:] = -np.inf
+        
+        # 在允许的字符数中取终点得分最高的状态
+        final = scores[low:high + 1]
+        k, col = np.unravel_index(np.argmax(final), final.shape)
+        if not np.isfinite(final[k, col]):
+            return None
+        k += low
+        
+        path = np.empty(steps, dtype=np.int64)
+        for t in range(steps - 1, -1, -1):
+            path[t] = col
+            if t == 0:
+                break
+            prev_col = back[t, k, col]
+            if col != 0 and prev_col != col:
+                k -= 1
+            col = prev_col
+        return path
+    
+    def _sequence_logits(self, output: np.ndarray) -> np.ndarray:
+        """
+        从单张图像的模型输出中取出 (sequence_length, num_classes) 的logits
+        
+        Args:
+            output: 单张图像的模型输出
+            
+        Returns:
+            二维logits数组
+        """
+        if len(output.shape) == 3:
+            # 序列输出 (sequence_length, 1, num_classes) 或 (1, sequence_length, num_classes)，按加载时确定的batch维度取出
+            return output[:, 0, :] if self.output_batch_axis == 1 else output[0, :, :]
+        # 单字符输出或2D序列输出
+        return np.atleast_2d(output)
+    
+    def _char_probabilities(self, output: np.ndarray,
+                            expected_length: Optional[Tuple[int, int]] = None) -> Tuple[str, List[float], float]:
+        """
+        计算识别文本及每个输出字符的概率
+        
+        每个字符的概率取其在CTC路径上连续时间步中softmax的最高值。
+        
+        Args:
+            output: 单张图像的模型输出
+            expected_length: 期望字符数范围 (最少, 最多)
+            
+        Returns:
+            (识别文本, 逐字符概率列表, 路径上各时间步概率的均值)
+        """
+        charset = self.charset_manager.charset
+        logits = self._sequence_logits(output)
+        probabilities = self._softmax(logits, axis=-1)
+        if probabilities.shape[0] == 0:
+            return '', [], 0.0
+        
+        indices = self._best_path(logits, expected_length)
+        step_probs = np.take_along_axis(probabilities, indices[:, None], axis=-1)[:, 0]
+        
+        # 连续相同索引构成一段，与CTC解码的去重规则一致
+        starts = np.flatnonzero(np.concatenate(([True], indices[1:] != indices[:-1])))
+        run_indices = indices[starts]
+        run_probs = np.maximum.reduceat(step_probs, starts)
+        
+        keep = (run_indices != 0) & (run_indices < len(charset))
+        text = ''.join([charset[idx] for idx in run_indices[keep].tolist()])
+        return text, run_probs[keep].astype(float).tolist(), float(np.mean(step_probs))
+    
+    def _process_confidence_output(self, output: np.ndarray,
+                                   expected_length: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """
+        处理置信度输出
+        
+        Args:
+            output: 模型输出
+            expected_length: 期望字符数范围 (最少, 最多)
+            
+        Returns:
+            包含文本、平均置信度与逐字符概率的字典
+        """
+        try:
+            text, char_probabilities, mean_confidence = self._char_probabilities(output, expected_length)
+            return {
+                'text': text,
+                'confidence': mean_confidence,
+                'char_probabilities': char_probabilities,
+                'min_char_probability': min(char_probabilities) if char_probabilities else 0.0
+            }
+        except Exception as e:
+            raise ModelLoadError(f"置信度输出处理失败: {str(e)}") from e
+    
+    def _process_probability_output(self, output: np.ndarray,
+                                    expected_length: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
         """
         处理概率输出
         
         Args:
             output: 模型输出
+            expected_length: 期望字符数范围 (最少, 最多)
             
         Returns:
             包含概率信息的字典
@@ -345,8 +1300,8 @@ class OCREngine(BaseEngine):
             else:
                 probabilities = self._softmax(output, axis=1)
             
-            # 获取文本结果
-            text_result = self._process_text_output(output)
+            # 获取文本结果与逐字符概率
+            text_result, char_probabilities, _ = self._char_probabilities(output, expected_length)
             
             # 构建概率信息
             charset = self.charset_manager.get_charset()
@@ -354,7 +1309,9 @@ class OCREngine(BaseEngine):
                 'text': text_result,
                 'probabilities': probabilities.tolist(),
                 'charset': charset,
-                'confidence': float(np.mean(np.max(probabilities, axis=-1)))
+                'confidence': float(np.mean(np.max(probabilities, axis=-1))),
+                'char_probabilities': char_probabilities,
+                'min_char_probability': min(char_probabilities) if char_probabilities else 0.0
             }
             
             return prob_info
@@ -378,7 +1335,9 @@ class OCREngine(BaseEngine):
     
     def set_charset_range(self, charset_range: Union[int, str, List[str]]) -> None:
         """
-        设置字符集范围
+        设置默认字符集范围（未按次传入charset_range时使用）
+        
+        多线程共享引擎时，建议按次传入charset_range而不是修改默认范围。
         
         Args:
             charset_range: 字符集范围参数
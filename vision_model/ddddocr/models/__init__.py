@@ -6,8 +6,12 @@
 
 from .model_loader import ModelLoader
 from .charset_manager import CharsetManager
+from .model_registry import ModelRegistry, SharedSession, get_model_registry
 
 __all__ = [
     'ModelLoader',
-    'CharsetManager'
+    'CharsetManager',
+    'ModelRegistry',
+    'SharedSession',
+    'get_model_registry'
 ]
@@ -4,9 +4,10 @@
 负责字符集的加载、管理和范围限制
 """
 
-from typing import List, Union, Optional, Set
+from typing import List, Union, Optional, Set, Dict, Hashable
 import json
 import os
+import numpy as np
 
 from ..utils.exceptions import ModelLoadError
 from ..utils.validators import validate_charset_range
@@ -15,6 +16,9 @@ from ..utils.validators import validate_charset_range
 class CharsetManager:
     """字符集管理器"""
     
+    # 范围掩码缓存上限
+    RANGE_MASK_CACHE_SIZE = 128
+    
     def __init__(self, charset: Optional[List[str]] = None):
         """
         初始化字符集管理器
@@ -22,9 +26,34 @@ class CharsetManager:
         Args:
             charset: 字符集列表
         """
-        self.charset = charset or []
         self.charset_range = []
         self.valid_charset_range_index = []
+        self.valid_index_mask: Optional[np.ndarray] = None
+        self._char_to_index: Dict[str, int] = {}
+        self._range_mask_cache: Dict[Hashable, np.ndarray] = {}
+        self.charset = charset or []
+    
+    @property
+    def charset(self) -> List[str]:
+        """完整字符集"""
+        return self._charset
+    
+    @charset.setter
+    def charset(self, charset: List[str]) -> None:
+        """
+        设置字符集并重建字符索引表与有效索引
+        
+        Args:
+            charset: 字符集列表
+        """
+        self._charset = charset
+        # 重复字符以首次出现的位置为准，与list.index一致
+        self._char_to_index = {}
+        for index, char in enumerate(charset):
+            self._char_to_index.setdefault(char, index)
+        # 换用新字符集后，已编译的范围掩码全部失效
+        self._range_mask_cache = {}
+        self._update_valid_indices()
     
     def load_default_charset(self, old: bool = False, beta: bool = False) -> None:
         """
@@ -40,9 +69,6 @@ class CharsetManager:
             self.charset = self._get_beta_charset()
         else:
             self.charset = self._get_old_charset()  # 默认使用旧版
-
-        # 加载字符集后，初始化有效索引（使用完整字符集）
-        self._update_valid_indices()
     
     def load_custom_charset(self, charset_path: str) -> dict:
         """
@@ -72,9 +98,6 @@ class CharsetManager:
             
             self.charset = charset_info['charset']
 
-            # 加载字符集后，初始化有效索引（使用完整字符集）
-            self._update_valid_indices()
-
             return charset_info
             
         except Exception as e:
@@ -87,41 +110,93 @@ class CharsetManager:
         Args:
             charset_range: 字符集范围参数
         """
-        validate_charset_range(charset_range)
+        self.charset_range = self._resolve_range(charset_range)
         
-        self.charset_range.clear()
+        # 计算有效索引
+        self._update_valid_indices()
+    
+    def get_range_mask(self, charset_range: Union[int, str, List[str]]) -> np.ndarray:
+        """
+        获取字符集范围对应的布尔掩码（按范围参数缓存，不修改默认范围）
+        
+        同一范围参数只编译一次，可在多个线程中按次调用传入不同范围。
+        
+        Args:
+            charset_range: 字符集范围参数
+            
+        Returns:
+            长度为字符集大小的布尔数组（调用方不应修改）
+        """
+        key = (type(charset_range).__name__,
+               tuple(charset_range) if isinstance(charset_range, list) else charset_range)
+        mask = self._range_mask_cache.get(key)
+        if mask is None:
+            mask = self._build_mask(self._resolve_range(charset_range))
+            mask.setflags(write=False)
+            if len(self._range_mask_cache) >= self.RANGE_MASK_CACHE_SIZE:
+                # 范围参数可能来自外部请求，超出上限时整体清空
+                self._range_mask_cache = {}
+            self._range_mask_cache[key] = mask
+        return mask
+    
+    def _resolve_range(self, charset_range: Union[int, str, List[str]]) -> List[str]:
+        """
+        将范围参数解析为字符列表
         
+        Args:
+            charset_range: 字符集范围参数
+            
+        Returns:
+            去重后的字符列表（包含空字符）
+        """
+        validate_charset_range(charset_range)
+        
+        chars: List[str] = []
         if isinstance(charset_range, int):
             # 按索引范围限制
             if 0 <= charset_range < len(self.charset):
-                self.charset_range = self.charset[:charset_range + 1]
-        elif isinstance(charset_range, str):
-            # 按字符串限制
-            for char in charset_range:
-                if char not in self.charset_range:
-                    self.charset_range.append(char)
-        elif isinstance(charset_range, list):
-            # 按字符列表限制
-            self.charset_range = charset_range.copy()
+                chars = self.charset[:charset_range + 1]
+        elif isinstance(charset_range, (str, list)):
+            # 按字符串或字符列表限制
+            chars = list(charset_range)
         
         # 去重并添加空字符
-        self.charset_range = list(set(self.charset_range)) + [""]
+        return list(dict.fromkeys(chars)) + ([""] if "" not in chars else [])
+    
+    def _build_mask(self, chars: List[str]) -> np.ndarray:
+        """
+        根据字符列表构建有效索引掩码
         
-        # 计算有效索引
-        self._update_valid_indices()
+        Args:
+            chars: 字符列表
+            
+        Returns:
+            长度为字符集大小的布尔数组
+        """
+        mask = np.zeros(len(self.charset), dtype=bool)
+        # 未知字符没有索引，直接忽略
+        indices = [self._char_to_index[char] for char in chars if char in self._char_to_index]
+        mask[indices] = True
+        return mask
     
     def _update_valid_indices(self) -> None:
-        """更新有效字符索引"""
-        self.valid_charset_range_index.clear()
-
+        """更新有效字符索引及对应的布尔掩码（字符集或范围变化时调用）"""
         if len(self.charset_range) > 0:
-            for item in self.charset_range:
-                if item in self.charset:
-                    self.valid_charset_range_index.append(self.charset.index(item))
-                # 未知字符没有索引，直接忽略
+            self.valid_index_mask = self._build_mask(self.charset_range)
+            self.valid_charset_range_index = np.flatnonzero(self.valid_index_mask).tolist()
         else:
             # 当没有设置字符集范围时，使用完整字符集的所有索引
             self.valid_charset_range_index = list(range(len(self.charset)))
+            self.valid_index_mask = None
+    
+    def get_valid_index_mask(self) -> Optional[np.ndarray]:
+        """
+        获取有效字符索引的布尔掩码
+        
+        Returns:
+            长度为字符集大小的布尔数组，未限制范围时返回None（调用方不应修改）
+        """
+        return self.valid_index_mask
     
     def get_valid_indices(self) -> List[int]:
         """
@@ -160,10 +235,7 @@ class CharsetManager:
         Returns:
             字符索引，如果不存在返回-1
         """
-        try:
-            return self.charset.index(char)
-        except ValueError:
-            return -1
+        return self._char_to_index.get(char, -1)
     
     def index_to_char(self, index: int) -> str:
         """
@@ -189,7 +261,7 @@ class CharsetManager:
         Returns:
             是否有效
         """
-        return char in self.charset
+        return char in self._char_to_index
     
     def filter_text(self, text: str) -> str:
         """
@@ -232,7 +304,7 @@ class CharsetManager:
     def clear_ranges(self) -> None:
         """清空字符集范围限制"""
         self.charset_range.clear()
-        self.valid_charset_range_index.clear()
+        self._update_valid_indices()
     
     def _get_old_charset(self) -> List[str]:
         """获取旧版字符集"""
@@ -6,28 +6,201 @@
 
 import os
 import json
-from typing import List, Optional, Dict, Any
+import hashlib
+from typing import List, Optional, Dict, Any, Tuple
 import onnxruntime
 
+from .model_registry import get_model_registry
 from ..utils.exceptions import ModelLoadError
-from ..utils.validators import validate_model_config
+from ..utils.validators import validate_model_config, validate_session_options
 
 
 class ModelLoader:
     """ONNX模型加载器"""
     
-    def __init__(self, use_gpu: bool = False, device_id: int = 0):
+    # 默认会话选项（None表示使用onnxruntime默认值）
+    DEFAULT_SESSION_OPTIONS = {
+        'intra_op_num_threads': None,
+        'inter_op_num_threads': None,
+        'execution_mode': None,
+        'graph_optimization_level': None,
+        'enable_cpu_mem_arena': None,
+        'enable_mem_pattern': None,
+        'optimized_model_dir': None,
+    }
+    
+    # 会话选项对应的环境变量
+    SESSION_OPTIONS_ENV = {
+        'intra_op_num_threads': 'DDDDOCR_INTRA_OP_THREADS',
+        'inter_op_num_threads': 'DDDDOCR_INTER_OP_THREADS',
+        'execution_mode': 'DDDDOCR_EXECUTION_MODE',
+        'graph_optimization_level': 'DDDDOCR_GRAPH_OPT_LEVEL',
+        'enable_cpu_mem_arena': 'DDDDOCR_CPU_MEM_ARENA',
+        'enable_mem_pattern': 'DDDDOCR_MEM_PATTERN',
+        'optimized_model_dir': 'DDDDOCR_OPTIMIZED_MODEL_DIR',
+    }
+    
+    EXECUTION_MODES = {
+        'sequential': onnxruntime.ExecutionMode.ORT_SEQUENTIAL,
+        'parallel': onnxruntime.ExecutionMode.ORT_PARALLEL,
+    }
+    
+    # INT8量化模型文件名后缀（与原模型位于同一目录）
+    QUANTIZED_SUFFIX = '.int8.onnx'
+    
+    GRAPH_OPTIMIZATION_LEVELS = {
+        'disable': onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        'basic': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        'extended': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        'all': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    
+    def __init__(self, use_gpu: bool = False, device_id: int = 0,
+                 session_options: Optional[Dict[str, Any]] = None, shared: bool = True):
         """
         初始化模型加载器
         
         Args:
             use_gpu: 是否使用GPU
             device_id: GPU设备ID
+            session_options: 会话选项配置，未指定的项从环境变量读取
+            shared: 是否通过进程级模型注册表共享已加载的模型
         """
         self.use_gpu = use_gpu
         self.device_id = device_id
+        self.shared = shared
+        self.session_options = self.resolve_session_options(session_options)
         self._setup_providers()
     
+    @classmethod
+    def resolve_session_options(cls, session_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        合并会话选项：显式配置 > 环境变量 > 默认值
+        
+        Args:
+            session_options: 显式配置的会话选项
+            
+        Returns:
+            完整的会话选项字典
+            
+        Raises:
+            ModelLoadError: 当选项无效时
+        """
+        options = dict(cls.DEFAULT_SESSION_OPTIONS)
+        
+        try:
+            for key, env_name in cls.SESSION_OPTIONS_ENV.items():
+                value = os.getenv(env_name)
+                if value is None or value == '':
+                    continue
+                options[key] = cls.parse_session_option(key, value)
+            
+            if session_options:
+                unknown = set(session_options) - set(cls.DEFAULT_SESSION_OPTIONS)
+                if unknown:
+                    raise ModelLoadError(f"未知的会话选项: {', '.join(sorted(unknown))}")
+                options.update({k: cls.parse_session_option(k, v) for k, v in session_options.items() if v is not None})
+            
+            validate_session_options(options, cls.EXECUTION_MODES, cls.GRAPH_OPTIMIZATION_LEVELS)
+        except Exception as e:
+            raise ModelLoadError(f"会话选项无效: {str(e)}") from e
+        
+        return options
+    
+    @staticmethod
+    def parse_session_option(key: str, value: Any) -> Any:
+        """
+        规范化单个会话选项的值（环境变量与显式配置使用同一规则）
+        
+        线程数转换为整数，开关项接受布尔值或 1/true/yes/on，执行模式与图优化级别不区分大小写，
+        优化模型目录保持原样。
+        
+        Args:
+            key: 选项名称
+            value: 选项值
+            
+        Returns:
+            规范化后的值
+            
+        Raises:
+            ValueError: 当线程数不是整数时
+        """
+        if key.endswith('_threads'):
+            return int(value)
+        if key.startswith('enable_'):
+            if isinstance(value, str):
+                return value.strip().lower() in ('1', 'true', 'yes', 'on')
+            return bool(value)
+        if key == 'optimized_model_dir':
+            return value
+        return str(value).strip().lower()
+    
+    def _build_session_options(self, model_path: str) -> Tuple[onnxruntime.SessionOptions, str, Optional[str]]:
+        """
+        根据会话选项构建SessionOptions
+        
+        启用优化模型缓存时，若缓存已存在则直接加载优化后的模型并关闭图优化；
+        否则将本次优化结果写入临时文件，会话创建成功后再原子替换为缓存文件。
+        
+        Args:
+            model_path: 原始模型路径
+            
+        Returns:
+            (SessionOptions, 实际加载的模型路径, 待写入的临时缓存路径)
+        """
+        options = self.session_options
+        sess_options = onnxruntime.SessionOptions()
+        
+        if options['intra_op_num_threads']:
+            sess_options.intra_op_num_threads = options['intra_op_num_threads']
+        if options['inter_op_num_threads']:
+            sess_options.inter_op_num_threads = options['inter_op_num_threads']
+        if options['execution_mode']:
+            sess_options.execution_mode = self.EXECUTION_MODES[options['execution_mode']]
+        if options['graph_optimization_level']:
+            sess_options.graph_optimization_level = self.GRAPH_OPTIMIZATION_LEVELS[options['graph_optimization_level']]
+        if options['enable_cpu_mem_arena'] is not None:
+            sess_options.enable_cpu_mem_arena = options['enable_cpu_mem_arena']
+        if options['enable_mem_pattern'] is not None:
+            sess_options.enable_mem_pattern = options['enable_mem_pattern']
+        
+        if not options['optimized_model_dir']:
+            return sess_options, model_path, None
+        
+        cache_path = self.get_optimized_model_path(model_path)
+        if os.path.exists(cache_path):
+            # 缓存模型已经过优化，无需再次执行图优化
+            sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+            return sess_options, cache_path, None
+        
+        os.makedirs(options['optimized_model_dir'], exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        sess_options.optimized_model_filepath = temp_path
+        return sess_options, model_path, temp_path
+    
+    def get_optimized_model_path(self, model_path: str) -> str:
+        """
+        计算优化模型的缓存路径
+        
+        缓存键包含模型文件状态、优化级别、执行提供者和onnxruntime版本，
+        任何一项变化都会生成新的缓存文件。
+        
+        Args:
+            model_path: 原始模型路径
+            
+        Returns:
+            缓存文件路径
+        """
+        stat = os.stat(model_path)
+        level = self.session_options['graph_optimization_level'] or 'all'
+        fingerprint = json.dumps([
+            os.path.abspath(model_path), stat.st_size, int(stat.st_mtime),
+            level, str(self.providers), onnxruntime.__version__
+        ])
+        digest = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        return os.path.join(self.session_options['optimized_model_dir'], f"{stem}.{level}.{digest}.onnx")
+    
     def _setup_providers(self) -> None:
         """设置ONNX运行时提供者"""
         try:
@@ -56,6 +229,44 @@ class ModelLoader:
         """
         加载ONNX模型
         
+        共享模式下，相同模型路径、执行提供者和会话选项在进程内只加载一次，
+        返回带引用计数的共享句柄（用法与InferenceSession相同，用完调用release()）。
+        
+        Args:
+            model_path: 模型文件路径
+            
+        Returns:
+            ONNX推理会话对象
+            
+        Raises:
+            ModelLoadError: 当模型加载失败时
+        """
+        if not self.shared:
+            return self._create_session(model_path)
+        
+        return get_model_registry().acquire(self.get_registry_key(model_path),
+                                            lambda: self._create_session(model_path))
+    
+    def get_registry_key(self, model_path: str) -> tuple:
+        """
+        计算模型在注册表中的键
+        
+        Args:
+            model_path: 模型文件路径
+            
+        Returns:
+            (模型绝对路径, 执行提供者, 会话选项) 元组
+        """
+        return (
+            os.path.abspath(model_path),
+            repr(self.providers),
+            tuple(sorted(self.session_options.items()))
+        )
+    
+    def _create_session(self, model_path: str) -> onnxruntime.InferenceSession:
+        """
+        创建新的ONNX推理会话
+        
         Args:
             model_path: 模型文件路径
             
@@ -73,7 +284,16 @@ class ModelLoader:
             onnxruntime.set_default_logger_severity(3)
             
             # 创建推理会话
-            session = onnxruntime.InferenceSession(model_path, providers=self.providers)
+            sess_options, load_path, temp_cache_path = self._build_session_options(model_path)
+            session = onnxruntime.InferenceSession(load_path, sess_options=sess_options,
+                                                   providers=self.providers)
+            
+            # 保存优化后的模型供下次启动复用
+            if temp_cache_path and os.path.exists(temp_cache_path):
+                try:
+                    os.replace(temp_cache_path, self.get_optimized_model_path(model_path))
+                except OSError as e:
+                    print(f"优化模型缓存写入失败: {str(e)}")
             
             return session
             
@@ -110,14 +330,70 @@ class ModelLoader:
             return {
                 'inputs': input_info,
                 'outputs': output_info,
-                'providers': session.get_providers()
+                'providers': session.get_providers(),
+                'session_options': dict(self.session_options)
             }
             
         except Exception as e:
             return {'error': str(e)}
     
+    @staticmethod
+    def get_ocr_model_path(old: bool = False, beta: bool = False, import_onnx_path: str = "") -> str:
+        """
+        获取OCR模型文件路径
+        
+        Args:
+            old: 是否使用旧版模型
+            beta: 是否使用beta版模型
+            import_onnx_path: 自定义模型路径
+            
+        Returns:
+            模型文件路径
+        """
+        if import_onnx_path:
+            return import_onnx_path
+        base_dir = os.path.dirname(os.path.dirname(__file__))
+        if beta and not old:
+            return os.path.join(base_dir, 'common.onnx')
+        return os.path.join(base_dir, 'common_old.onnx')
+    
+    @classmethod
+    def get_quantized_model_path(cls, model_path: str) -> str:
+        """
+        获取模型对应的INT8量化模型路径
+        
+        Args:
+            model_path: 原始模型路径
+            
+        Returns:
+            量化模型路径
+        """
+        return os.path.splitext(model_path)[0] + cls.QUANTIZED_SUFFIX
+    
+    def resolve_model_path(self, model_path: str, quantized: bool = False) -> str:
+        """
+        解析实际加载的模型路径
+        
+        Args:
+            model_path: 原始模型路径
+            quantized: 是否加载INT8量化模型
+            
+        Returns:
+            模型路径
+            
+        Raises:
+            ModelLoadError: 当量化模型尚未生成时
+        """
+        if not quantized:
+            return model_path
+        quantized_path = self.get_quantized_model_path(model_path)
+        if not os.path.exists(quantized_path):
+            raise ModelLoadError(f"量化模型不存在: {quantized_path}，"
+                                 f"请先运行 python -m ddddocr quantize <样本目录> 生成并通过正确率校验")
+        return quantized_path
+    
     def load_ocr_model(self, old: bool = False, beta: bool = False, 
-                      import_onnx_path: str = "") -> onnxruntime.InferenceSession:
+                      import_onnx_path: str = "", quantized: bool = False) -> onnxruntime.InferenceSession:
         """
         加载OCR模型
         
@@ -125,6 +401,7 @@ class ModelLoader:
             old: 是否使用旧版模型
             beta: 是否使用beta版模型
             import_onnx_path: 自定义模型路径
+            quantized: 是否加载INT8量化模型
             
         Returns:
             ONNX推理会话对象
@@ -133,18 +410,8 @@ class ModelLoader:
             ModelLoadError: 当模型加载失败时
         """
         try:
-            if import_onnx_path:
-                model_path = import_onnx_path
-            else:
-                base_dir = os.path.dirname(os.path.dirname(__file__))
-                if old:
-                    model_path = os.path.join(base_dir, 'common_old.onnx')
-                elif beta:
-                    model_path = os.path.join(base_dir, 'common.onnx')
-                else:
-                    model_path = os.path.join(base_dir, 'common_old.onnx')
-            
-            return self.load_model(model_path)
+            model_path = self.get_ocr_model_path(old, beta, import_onnx_path)
+            return self.load_model(self.resolve_model_path(model_path, quantized))
             
         except Exception as e:
             raise ModelLoadError(f"OCR模型加载失败: {str(e)}") from e
@@ -257,4 +524,5 @@ class ModelLoader:
         self._setup_providers()
     
     def __repr__(self) -> str:
-        return f"ModelLoader(use_gpu={self.use_gpu}, device_id={self.device_id})"
+        return (f"ModelLoader(use_gpu={self.use_gpu}, device_id={self.device_id}, "
+                f"shared={self.shared}, session_options={self.session_options})")
@@ -0,0 +1,164 @@
+# coding=utf-8
+"""
+模型注册表模块
+在进程内共享已加载的ONNX推理会话，避免每个引擎实例重复加载同一模型
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import onnxruntime
+
+
+class SharedSession:
+    """
+    共享推理会话句柄
+
+    代理底层InferenceSession的全部属性（run、get_inputs等）。
+    onnxruntime的InferenceSession.run本身是线程安全的，多个引擎可并发调用同一句柄。
+    """
+
+    def __init__(self, registry: 'ModelRegistry', key: Hashable, entry: Dict[str, Any]):
+        """
+        初始化共享会话句柄
+
+        Args:
+            registry: 所属注册表
+            key: 注册表键
+            entry: 句柄所属的注册表条目（包含底层推理会话与引用计数）
+        """
+        self._registry = registry
+        self._key = key
+        self._entry = entry
+        self._session = entry['session']
+        self._released = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    @property
+    def key(self) -> Hashable:
+        """注册表键"""
+        return self._key
+
+    def release(self) -> None:
+        """释放句柄（重复调用无副作用）"""
+        if not self._released:
+            self._released = True
+            self._registry.release(self._key, self._entry)
+
+    def __repr__(self) -> str:
+        return f"SharedSession(key={self._key!r}, released={self._released})"
+
+
+class ModelRegistry:
+    """进程级模型注册表，按 (模型路径, 执行提供者, 会话选项) 缓存推理会话并进行引用计数"""
+
+    def __init__(self):
+        """初始化模型注册表"""
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Dict[str, Any]] = {}
+        self._load_locks: Dict[Hashable, threading.Lock] = {}
+
+    def acquire(self, key: Hashable, factory: Callable[[], onnxruntime.InferenceSession]) -> SharedSession:
+        """
+        获取共享会话句柄，首次获取时调用factory加载模型
+
+        同一键的并发加载只会执行一次；不同键的加载互不阻塞。
+        每次加载生成独立的条目，句柄只对自己所属的条目计数，clear() 之后释放旧句柄不影响新加载的模型。
+
+        Args:
+            key: 注册表键
+            factory: 模型加载函数
+
+        Returns:
+            共享会话句柄
+        """
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry['refcount'] += 1
+                    return SharedSession(self, key, entry)
+
+            session = factory()
+
+            with self._lock:
+                # 加载锁在 clear() 或条目删除后可能被重新创建，其他线程已加载同一模型时使用已有条目
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = {'session': session, 'refcount': 0}
+                    self._entries[key] = entry
+                entry['refcount'] += 1
+            return SharedSession(self, key, entry)
+
+    def release(self, key: Hashable, entry: Optional[Dict[str, Any]] = None) -> None:
+        """
+        释放一次引用，引用计数归零时卸载模型
+
+        Args:
+            key: 注册表键
+            entry: 句柄所属的条目；为None时使用该键的当前条目。
+                条目已不在注册表中（如 clear() 之后）时只减少其自身的计数，不影响同一键的新条目
+        """
+        with self._lock:
+            current = self._entries.get(key)
+            if entry is None:
+                entry = current
+            if entry is None:
+                return
+            entry['refcount'] -= 1
+            if entry['refcount'] <= 0 and current is entry:
+                del self._entries[key]
+                self._drop_load_lock(key)
+
+    def _drop_load_lock(self, key: Hashable) -> None:
+        """
+        删除空闲的加载锁，避免加载锁字典随键无限增长（调用方需持有 self._lock）
+
+        Args:
+            key: 注册表键
+        """
+        load_lock = self._load_locks.get(key)
+        if load_lock is not None and not load_lock.locked():
+            del self._load_locks[key]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        获取已加载模型的统计信息
+
+        Returns:
+            每个模型的键与引用计数
+        """
+        with self._lock:
+            return [{'key': key, 'refcount': entry['refcount']} for key, entry in self._entries.items()]
+
+    def clear(self) -> None:
+        """清空注册表（已发出的句柄仍可继续使用底层会话，释放时不影响之后加载的模型）"""
+        with self._lock:
+            self._entries.clear()
+            for key in list(self._load_locks):
+                self._drop_load_lock(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"ModelRegistry(models={len(self)})"
+
+
+# 进程级默认注册表
+_default_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    获取进程级默认模型注册表
+
+    Returns:
+        模型注册表
+    """
+    return _default_registry
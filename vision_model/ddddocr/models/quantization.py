@@ -0,0 +1,181 @@
+# coding=utf-8
+"""
+模型量化模块
+使用ONNX Runtime量化工具生成INT8模型，并在标注样本上校验正确率后再发布
+
+量化模型保存在原模型同目录下（如 common_old.onnx -> common_old.int8.onnx），
+旁边的同名JSON文件记录校验报告。只有正确率下降不超过容差的量化模型才会被发布，
+之后即可通过 OCREngine(quantized=True) / DdddOcr(quantized=True) 加载。
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .model_loader import ModelLoader
+from ..utils.benchmark import benchmark_engine, get_environment, make_config
+from ..utils.exceptions import ModelLoadError
+
+# 支持的量化方式
+QUANTIZATION_METHODS = ('dynamic', 'static')
+
+# 默认容差：量化模型的完全正确率最多比原模型低1个百分点
+DEFAULT_ACCURACY_TOLERANCE = 0.01
+
+
+def quantize_model(model_path: str, output_path: str, method: str = 'dynamic',
+                   calibration_inputs: Optional[Iterable[Dict[str, np.ndarray]]] = None,
+                   per_channel: bool = False) -> str:
+    """
+    将FP32模型量化为INT8模型
+
+    Args:
+        model_path: 原始模型路径
+        output_path: 量化模型输出路径
+        method: 量化方式，dynamic（动态量化，只量化权重）或 static（静态量化，需要校准数据）
+        calibration_inputs: 静态量化的校准输入（模型输入名到数组的映射）
+        per_channel: 是否按通道量化权重
+
+    Returns:
+        量化模型路径
+
+    Raises:
+        ModelLoadError: 当量化失败时
+    """
+    if method not in QUANTIZATION_METHODS:
+        raise ModelLoadError(f"不支持的量化方式: {method}，可选 {', '.join(QUANTIZATION_METHODS)}")
+
+    try:
+        # 量化工具依赖onnx，只在量化时导入
+        from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                              quantize_dynamic, quantize_static)
+
+        if method == 'dynamic':
+            quantize_dynamic(model_path, output_path, per_channel=per_channel,
+                             weight_type=QuantType.QUInt8)
+            return output_path
+
+        if calibration_inputs is None:
+            raise ModelLoadError("静态量化需要校准数据")
+
+        class _CalibrationReader(CalibrationDataReader):
+            def __init__(self, inputs: Iterable[Dict[str, np.ndarray]]):
+                self._inputs = iter(inputs)
+
+            def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+                return next(self._inputs, None)
+
+        quantize_static(model_path, output_path, _CalibrationReader(calibration_inputs),
+                        quant_format=QuantFormat.QDQ, per_channel=per_channel,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+        return output_path
+
+    except ModelLoadError:
+        raise
+    except Exception as e:
+        raise ModelLoadError(f"模型量化失败: {str(e)}") from e
+
+
+def build_calibration_inputs(engine, samples: Sequence[Tuple[str, bytes]],
+                             limit: int = 32) -> List[Dict[str, np.ndarray]]:
+    """
+    按引擎的预处理流程生成静态量化的校准输入
+
+    Args:
+        engine: OCR引擎
+        samples: (标注文本, 图片数据) 列表
+        limit: 最多使用的样本数
+
+    Returns:
+        校准输入列表
+    """
+    input_name = engine.session.get_inputs()[0].name
+    return [{input_name: engine._preprocess_image(engine._load_image(image_data), False)}
+            for _, image_data in samples[:limit]]
+
+
+def quantize_ocr_engine(engine, samples: Sequence[Tuple[str, bytes]], method: str = 'dynamic',
+                        tolerance: float = DEFAULT_ACCURACY_TOLERANCE, per_channel: bool = False,
+                        calibration_size: int = 32, case_sensitive: bool = False) -> Dict[str, Any]:
+    """
+    量化OCR引擎当前使用的模型，在样本上对比正确率与耗时，通过校验后发布
+
+    Args:
+        engine: 已加载FP32模型的OCR引擎
+        samples: (标注文本, 图片数据) 列表
+        method: 量化方式
+        tolerance: 允许的完全正确率下降（绝对值）
+        per_channel: 是否按通道量化权重
+        calibration_size: 静态量化使用的校准样本数
+        case_sensitive: 比较标注与识别文本时是否区分大小写
+
+    Returns:
+        校验报告，accepted 表示量化模型是否已发布
+
+    Raises:
+        ModelLoadError: 当引擎已在使用量化模型或量化失败时
+    """
+    if getattr(engine, 'quantized', False):
+        raise ModelLoadError("引擎已在使用量化模型，请传入加载FP32模型的引擎")
+
+    model_path = ModelLoader.get_ocr_model_path(engine.old, engine.beta, engine.import_onnx_path)
+    output_path = ModelLoader.get_quantized_model_path(model_path)
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+
+    calibration_inputs = None
+    if method == 'static':
+        calibration_inputs = build_calibration_inputs(engine, samples, calibration_size)
+    quantize_model(model_path, temp_path, method, calibration_inputs, per_channel)
+
+    try:
+        # 候选引擎以原引擎的字符集与预处理配置重新构造，只换用临时量化模型（不写入优化模型缓存）
+        session_options = dict(engine.model_loader.session_options, optimized_model_dir='')
+        candidate = engine.with_model_file(temp_path, session_options)
+
+        config = make_config('raw')
+        baseline = benchmark_engine(engine, samples, config, case_sensitive=case_sensitive)
+        try:
+            quantized = benchmark_engine(candidate, samples, config, case_sensitive=case_sensitive)
+        finally:
+            candidate.cleanup()
+        accuracy_drop = baseline['exact_accuracy'] - quantized['exact_accuracy']
+
+        report = {
+            'model': os.path.basename(model_path),
+            'quantized_model': os.path.basename(output_path),
+            'method': method,
+            'per_channel': per_channel,
+            'tolerance': tolerance,
+            'samples': len(samples),
+            'accuracy_drop': accuracy_drop,
+            'accepted': accuracy_drop <= tolerance,
+            'size_bytes': {'fp32': os.path.getsize(model_path), 'int8': os.path.getsize(temp_path)},
+            'baseline': baseline,
+            'quantized': quantized,
+            'environment': get_environment(),
+        }
+
+        if report['accepted']:
+            os.replace(temp_path, output_path)
+            with open(get_quantization_report_path(output_path), 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def get_quantization_report_path(quantized_path: str) -> str:
+    """
+    获取量化模型校验报告路径
+
+    Args:
+        quantized_path: 量化模型路径
+
+    Returns:
+        报告路径
+    """
+    return os.path.splitext(quantized_path)[0] + '.json'
@@ -2,9 +2,13 @@
 """
 颜色过滤模块
 提供基于HSV颜色空间的图像颜色过滤功能
+
+颜色范围在首次使用时编译为逐通道查找表：第i个范围在H、S、V三张表中各占一位，
+像素三个通道查表结果按位与后非零即命中任一范围，一次遍历得到所有范围的合并掩码。
 """
 
-from typing import List, Tuple, Optional, Union
+import threading
+from typing import Any, Dict, List, Tuple, Optional, Union
 import numpy as np
 from PIL import Image
 
@@ -15,6 +19,41 @@ from ..utils.image_io import image_to_numpy, numpy_to_image
 # 安全导入OpenCV
 cv2 = safe_import_opencv()
 
+# 共享（已编译）过滤器缓存的最大数量
+COMPILED_CACHE_SIZE = 64
+
+# 查找表元素类型（按范围数量选择能容纳所有位的最小类型）
+_LUT_DTYPES = ((8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64))
+
+HSVRange = Tuple[Tuple[int, int, int], Tuple[int, int, int]]
+
+
+def compile_hsv_luts(hsv_ranges: List[HSVRange]) -> List[np.ndarray]:
+    """
+    将HSV范围编译为逐通道位查找表
+
+    Args:
+        hsv_ranges: HSV范围列表（闭区间，与 cv2.inRange 一致）
+
+    Returns:
+        查找表列表，每张表形状为 (256, 1, 3)（即 cv2.LUT 的三通道表），
+        最多容纳64个范围，超出时分为多张
+    """
+    luts = []
+    for start in range(0, len(hsv_ranges), 64):
+        chunk = hsv_ranges[start:start + 64]
+        dtype = next(dtype for bits, dtype in _LUT_DTYPES if len(chunk) <= bits)
+        lut = np.zeros((256, 1, 3), dtype=dtype)
+        for bit, (lower, upper) in enumerate(chunk):
+            flag = dtype(1) << dtype(bit)
+            for channel in range(3):
+                low = max(0, int(lower[channel]))
+                high = min(255, int(upper[channel]))
+                lut[low:high + 1, 0, channel] |= flag
+        lut.setflags(write=False)
+        luts.append(lut)
+    return luts
+
 
 class ColorFilter:
     """图片颜色过滤器类，支持HSV颜色空间的颜色范围过滤"""
@@ -33,10 +72,14 @@ class ColorFilter:
         'gray': [((0, 0, 50), (180, 30, 200))]
     }
     
+    # 共享过滤器缓存（按范围规格）
+    _compiled_cache: Dict[Tuple[Any, ...], 'ColorFilter'] = {}
+    _compiled_lock = threading.Lock()
+    
     def __init__(self, colors: Optional[List[str]] = None, 
                  custom_ranges: Optional[List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]] = None):
         """
-        初始化颜色过滤器
+        初始化颜色过滤器（查找表在首次过滤时编译）
         
         Args:
             colors: 预设颜色名称列表，如 ['red', 'blue']
@@ -64,6 +107,104 @@ class ColorFilter:
         
         if not self.hsv_ranges:
             raise ValueError("必须指定colors或custom_ranges参数")
+        
+        self._luts: Optional[List[np.ndarray]] = None
+        self._lut_lock = threading.Lock()
+        self._frozen = False
+    
+    @classmethod
+    def compiled(cls, colors: Optional[List[str]] = None,
+                 custom_ranges: Optional[List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]] = None) -> 'ColorFilter':
+        """
+        获取按范围规格缓存的共享过滤器（查找表只编译一次，可跨调用、跨线程复用）
+        
+        Args:
+            colors: 预设颜色名称列表
+            custom_ranges: 自定义HSV范围列表
+            
+        Returns:
+            已编译且不可修改的颜色过滤器
+            
+        Raises:
+            ValueError: 当参数无效时
+        """
+        key = (tuple(color.lower() for color in colors or ()),
+               tuple((tuple(int(v) for v in lower), tuple(int(v) for v in upper))
+                     for lower, upper in custom_ranges or ()))
+        color_filter = cls._compiled_cache.get(key)
+        if color_filter is not None:
+            return color_filter
+        
+        color_filter = cls(colors=colors, custom_ranges=custom_ranges)
+        color_filter._get_luts()
+        color_filter._frozen = True
+        with cls._compiled_lock:
+            color_filter = cls._compiled_cache.setdefault(key, color_filter)
+            while len(cls._compiled_cache) > COMPILED_CACHE_SIZE:
+                cls._compiled_cache.pop(next(iter(cls._compiled_cache)))
+        return color_filter
+    
+    def _get_luts(self) -> List[np.ndarray]:
+        """
+        获取（必要时编译）当前范围的查找表
+        
+        Returns:
+            查找表列表
+        """
+        luts = self._luts
+        if luts is None:
+            with self._lut_lock:
+                if self._luts is None:
+                    # 去除重复范围，保持顺序
+                    self._luts = compile_hsv_luts(list(dict.fromkeys(
+                        (tuple(lower), tuple(upper)) for lower, upper in self.hsv_ranges)))
+                luts = self._luts
+        return luts
+    
+    def _check_mutable(self) -> None:
+        """共享过滤器被多个调用方复用，禁止修改"""
+        if self._frozen:
+            raise ValueError("共享的颜色过滤器不可修改，请创建新的ColorFilter")
+    
+    def _to_hsv(self, image: Union[Image.Image, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """
+        转换到HSV颜色空间（PIL图像直接从RGB转换，不经过BGR）
+        
+        Args:
+            image: 输入图片（PIL.Image，或BGR顺序的numpy.ndarray）
+            
+        Returns:
+            (原始像素数组, HSV数组, 像素数组是否为RGB顺序)
+        """
+        if isinstance(image, Image.Image):
+            img_array = image_to_numpy(image, 'RGB')
+            return img_array, cv2.cvtColor(img_array, cv2.COLOR_RGB2HSV), True
+        return image, cv2.cvtColor(image, cv2.COLOR_BGR2HSV), False
+    
+    def _match(self, hsv: np.ndarray) -> np.ndarray:
+        """
+        查表得到命中任一颜色范围的掩码
+        
+        Args:
+            hsv: HSV数组
+            
+        Returns:
+            uint8掩码 (H, W)，命中为255，否则为0（与 cv2.inRange 相同）
+        """
+        mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+        for lut in self._get_luts():
+            if lut.dtype == np.uint8:
+                # 不超过8个范围（常见情况）：OpenCV一次查完三个通道
+                h, s, v = cv2.split(cv2.LUT(hsv, lut))
+                bits = cv2.bitwise_and(cv2.bitwise_and(h, s), v)
+                matched = cv2.compare(bits, 0, cv2.CMP_NE)
+            else:
+                bits = lut[:, 0, 0].take(hsv[..., 0])
+                bits &= lut[:, 0, 1].take(hsv[..., 1])
+                bits &= lut[:, 0, 2].take(hsv[..., 2])
+                matched = (bits != 0).astype(np.uint8) * np.uint8(255)
+            mask = cv2.bitwise_or(mask, matched)
+        return mask
     
     def filter_image(self, image: Union[Image.Image, np.ndarray]) -> Image.Image:
         """
@@ -79,33 +220,15 @@ class ColorFilter:
             ImageProcessError: 当图片处理失败时
         """
         try:
-            # 转换为numpy数组
-            if isinstance(image, Image.Image):
-                img_array = cv2.cvtColor(image_to_numpy(image, 'RGB'), cv2.COLOR_RGB2BGR)
-            else:
-                img_array = image.copy()
-            
-            # 转换到HSV颜色空间
-            hsv = cv2.cvtColor(img_array, cv2.COLOR_BGR2HSV)
-            
-            # 创建掩码
-            mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+            img_array, hsv, is_rgb = self._to_hsv(image)
             
-            for lower, upper in self.hsv_ranges:
-                # 创建当前颜色范围的掩码
-                range_mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
-                # 合并到总掩码
-                mask = cv2.bitwise_or(mask, range_mask)
+            # 保留命中的像素，其余设为白色背景（生成新数组，不修改输入）
+            result = np.full_like(img_array, 255)
+            cv2.copyTo(img_array, self._match(hsv), result)
             
-            # 应用掩码
-            result = cv2.bitwise_and(img_array, img_array, mask=mask)
-            
-            # 将背景设为白色
-            result[mask == 0] = [255, 255, 255]
-            
-            # 转换回PIL Image
-            result_rgb = cv2.cvtColor(result, cv2.COLOR_BGR2RGB)
-            return numpy_to_image(result_rgb, 'RGB')
+            if not is_rgb:
+                result = cv2.cvtColor(result, cv2.COLOR_BGR2RGB)
+            return numpy_to_image(result, 'RGB')
             
         except Exception as e:
             raise ImageProcessError(f"颜色过滤处理失败: {str(e)}") from e
@@ -124,25 +247,8 @@ class ColorFilter:
             ImageProcessError: 当处理失败时
         """
         try:
-            # 转换为numpy数组
-            if isinstance(image, Image.Image):
-                img_array = cv2.cvtColor(image_to_numpy(image, 'RGB'), cv2.COLOR_RGB2BGR)
-            else:
-                img_array = image.copy()
-            
-            # 转换到HSV颜色空间
-            hsv = cv2.cvtColor(img_array, cv2.COLOR_BGR2HSV)
-            
-            # 创建掩码
-            mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
-            
-            for lower, upper in self.hsv_ranges:
-                # 创建当前颜色范围的掩码
-                range_mask = cv2.inRange(hsv, np.array(lower), np.array(upper))
-                # 合并到总掩码
-                mask = cv2.bitwise_or(mask, range_mask)
-            
-            return mask
+            _, hsv, _ = self._to_hsv(image)
+            return self._match(hsv)
             
         except Exception as e:
             raise ImageProcessError(f"掩码生成失败: {str(e)}") from e
@@ -154,9 +260,14 @@ class ColorFilter:
         Args:
             lower: HSV下界
             upper: HSV上界
+            
+        Raises:
+            ValueError: 当过滤器为共享实例时
         """
         validate_color_filter_params(None, [(lower, upper)])
+        self._check_mutable()
         self.hsv_ranges.append((lower, upper))
+        self._luts = None
     
     def add_preset_color(self, color: str) -> None:
         """
@@ -166,18 +277,22 @@ class ColorFilter:
             color: 预设颜色名称
             
         Raises:
-            ValueError: 当颜色名称不存在时
+            ValueError: 当颜色名称不存在或过滤器为共享实例时
         """
         color_lower = color.lower()
         if color_lower in self.COLOR_PRESETS:
+            self._check_mutable()
             self.hsv_ranges.extend(self.COLOR_PRESETS[color_lower])
+            self._luts = None
         else:
             available_colors = ', '.join(self.COLOR_PRESETS.keys())
             raise ValueError(f"不支持的颜色预设: {color}。可用颜色: {available_colors}")
     
     def clear_ranges(self) -> None:
         """清空所有颜色范围"""
+        self._check_mutable()
         self.hsv_ranges.clear()
+        self._luts = None
     
     def get_ranges(self) -> List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]:
         """
@@ -240,7 +240,9 @@ class ImageProcessor:
     @staticmethod
     def preprocess_for_ocr(image: Image.Image, target_height: int = 64, 
                           enhance_contrast: bool = True, 
-                          remove_noise: bool = True) -> Image.Image:
+                          remove_noise: bool = True,
+                          contrast_factor: float = 1.2,
+                          noise_kernel_size: int = 3) -> Image.Image:
         """
         OCR预处理流水线
         
@@ -249,6 +251,8 @@ class ImageProcessor:
             target_height: 目标高度
             enhance_contrast: 是否增强对比度
             remove_noise: 是否去噪
+            contrast_factor: 对比度增强因子
+            noise_kernel_size: 去噪中值滤波核大小
             
         Returns:
             预处理后的图像
@@ -272,11 +276,11 @@ class ImageProcessor:
             
             # 增强对比度
             if enhance_contrast:
-                processed_image = ImageProcessor.enhance_contrast(processed_image, factor=1.2)
+                processed_image = ImageProcessor.enhance_contrast(processed_image, factor=contrast_factor)
             
             # 去噪
             if remove_noise:
-                processed_image = ImageProcessor.remove_noise(processed_image, kernel_size=3)
+                processed_image = ImageProcessor.remove_noise(processed_image, kernel_size=noise_kernel_size)
             
             # 转换为灰度图
             processed_image = ImageProcessor.convert_to_grayscale(processed_image)
@@ -0,0 +1,366 @@
+# coding=utf-8
+"""
+OCR基准测试模块
+在已标注的验证码样本上评估各模型与预处理配置的识别正确率和分阶段耗时
+
+样本目录格式见 corpus 模块（文件名第一个下划线之前的部分为标注文本）
+
+分阶段耗时：
+    decode      图片解码
+    preprocess  预处理（颜色过滤、自定义预处理、缩放、灰度化、标准化）
+    inference   ONNX推理
+    ctc         CTC解码与置信度计算
+"""
+
+import json
+import os
+import platform
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from .corpus import load_corpus
+from .image_io import load_image_from_input
+
+# 计时阶段
+STAGES = ('decode', 'preprocess', 'inference', 'ctc')
+
+# 预处理函数：接收解码后的图像，返回OCREngine可接受的图像（PIL图像或灰度uint8数组）
+Preprocessor = Callable[[Image.Image], Union[Image.Image, np.ndarray]]
+
+
+def make_config(name: str, preprocess: Optional[Preprocessor] = None, png_fix: bool = False,
+                color_filter_colors: Optional[List[str]] = None,
+                charset_range: Optional[Union[int, str, List[str]]] = None) -> Dict[str, Any]:
+    """
+    创建一个流水线配置
+
+    Args:
+        name: 配置名称
+        preprocess: 自定义预处理函数
+        png_fix: 是否修复PNG透明背景
+        color_filter_colors: 颜色过滤预设颜色列表
+        charset_range: 字符集范围限制
+
+    Returns:
+        配置字典
+    """
+    return {
+        'name': name,
+        'preprocess': preprocess,
+        'png_fix': png_fix,
+        'color_filter_colors': color_filter_colors,
+        'charset_range': charset_range,
+    }
+
+
+def edit_distance(a: str, b: str) -> int:
+    """
+    计算两个字符串的编辑距离
+
+    Args:
+        a: 字符串a
+        b: 字符串b
+
+    Returns:
+        编辑距离
+    """
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def summarize_timings(values: Sequence[float]) -> Dict[str, float]:
+    """
+    统计耗时分布
+
+    Args:
+        values: 耗时列表（秒）
+
+    Returns:
+        p50、p95与均值（毫秒）
+    """
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'mean': 0.0}
+    milliseconds = np.asarray(values, dtype=np.float64) * 1000.0
+    return {
+        'p50': float(np.percentile(milliseconds, 50)),
+        'p95': float(np.percentile(milliseconds, 95)),
+        'mean': float(milliseconds.mean()),
+    }
+
+
+def _run_sample(engine, image_data: bytes, config: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    分阶段识别单个样本
+
+    Args:
+        engine: OCR引擎
+        image_data: 图片数据
+        config: 流水线配置
+
+    Returns:
+        (置信度识别结果, 各阶段耗时)
+    """
+    start = time.perf_counter()
+    image = load_image_from_input(image_data)
+    image.load()
+    decode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if config['preprocess'] is not None:
+        image = config['preprocess'](image)
+    custom_preprocess = time.perf_counter() - start
+
+    timings: Dict[str, float] = {}
+    result = engine.predict(image, png_fix=config['png_fix'], color_filter_colors=config['color_filter_colors'],
+                            charset_range=config['charset_range'], confidence=True, timings=timings)
+    timings['decode'] = decode
+    timings['preprocess'] += custom_preprocess
+    return result, timings
+
+
+def benchmark_engine(engine, samples: Sequence[Tuple[str, bytes]], config: Dict[str, Any],
+                     repeat: int = 1, warmup: int = 1, case_sensitive: bool = False) -> Dict[str, Any]:
+    """
+    评估单个引擎在一个流水线配置下的正确率与耗时
+
+    Args:
+        engine: OCR引擎
+        samples: (标注文本, 图片数据) 列表
+        config: 流水线配置
+        repeat: 每个样本的重复次数（只有第一次计入正确率）
+        warmup: 正式计时前的预热样本数
+        case_sensitive: 比较标注与识别文本时是否区分大小写
+
+    Returns:
+        评估结果
+    """
+    for _, image_data in samples[:warmup]:
+        _run_sample(engine, image_data, config)
+
+    stage_timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    totals: List[float] = []
+    exact = 0
+    char_errors = 0
+    char_total = 0
+    confidences: List[float] = []
+    failures: List[Dict[str, str]] = []
+
+    for label, image_data in samples:
+        for iteration in range(max(1, repeat)):
+            result, timings = _run_sample(engine, image_data, config)
+            for stage in STAGES:
+                stage_timings[stage].append(timings[stage])
+            totals.append(sum(timings.values()))
+            if iteration:
+                continue
+
+            text = result['text']
+            expected, actual = (label, text) if case_sensitive else (label.lower(), text.lower())
+            exact += expected == actual
+            char_errors += edit_distance(expected, actual)
+            char_total += len(expected)
+            confidences.append(result['min_char_probability'])
+            if expected != actual:
+                failures.append({'label': label, 'predicted': text})
+
+    count = len(samples)
+    return {
+        'config': config['name'],
+        'samples': count,
+        'exact_accuracy': exact / count if count else 0.0,
+        # 字符正确率 = 1 - 编辑距离之和 / 标注字符总数
+        'char_accuracy': max(0.0, 1.0 - char_errors / char_total) if char_total else 0.0,
+        'mean_confidence': float(np.mean(confidences)) if confidences else 0.0,
+        'timings_ms': {stage: summarize_timings(values) for stage, values in stage_timings.items()},
+        'total_ms': summarize_timings(totals),
+        'failures': failures,
+    }
+
+
+def run_benchmark(samples: Sequence[Tuple[str, bytes]], engines: Dict[str, Any],
+                  configs: Optional[Sequence[Dict[str, Any]]] = None, repeat: int = 1,
+                  warmup: int = 1, case_sensitive: bool = False) -> Dict[str, Any]:
+    """
+    在样本上评估所有模型与流水线配置的组合
+
+    Args:
+        samples: (标注文本, 图片数据) 列表
+        engines: 模型名称到OCR引擎的映射
+        configs: 流水线配置列表，默认只评估不做额外预处理的 raw 配置
+        repeat: 每个样本的重复次数
+        warmup: 正式计时前的预热样本数
+        case_sensitive: 比较标注与识别文本时是否区分大小写
+
+    Returns:
+        基准测试报告（可直接序列化为JSON）
+    """
+    configs = list(configs) if configs else [make_config('raw')]
+
+    results = []
+    for model_name, engine in engines.items():
+        for config in configs:
+            result = benchmark_engine(engine, samples, config, repeat, warmup, case_sensitive)
+            result['model'] = model_name
+            results.append(result)
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'samples': len(samples),
+        'repeat': repeat,
+        'case_sensitive': case_sensitive,
+        'environment': get_environment(),
+        'results': results,
+    }
+
+
+def get_environment() -> Dict[str, Any]:
+    """
+    获取运行环境信息，便于对比不同机器或提交的结果
+
+    Returns:
+        环境信息
+    """
+    environment = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+    }
+    try:
+        import onnxruntime
+        environment['onnxruntime'] = onnxruntime.__version__
+    except ImportError:
+        pass
+    return environment
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    """
+    将报告写入JSON文件
+
+    Args:
+        report: 基准测试报告
+        path: 输出路径
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    将报告格式化为文本表格
+
+    Args:
+        report: 基准测试报告
+
+    Returns:
+        文本表格
+    """
+    header = (f"{'模型':<10}{'配置':<16}{'完全正确率':>10}{'字符正确率':>10}"
+              + ''.join(f"{stage + ' p50/p95':>22}" for stage in STAGES)
+              + f"{'total p50/p95':>22}")
+    lines = [f"样本数: {report['samples']}", header, '-' * len(header)]
+    for result in report['results']:
+        timings = [result['timings_ms'][stage] for stage in STAGES] + [result['total_ms']]
+        lines.append(f"{result['model']:<10}{result['config']:<16}"
+                     f"{result['exact_accuracy']:>10.1%}{result['char_accuracy']:>10.1%}"
+                     + ''.join(f"{t['p50']:>12.2f}/{t['p95']:<9.2f}" for t in timings))
+    return '\n'.join(lines)
+
+
+def synthetic_boxes(count: int, seed: int = 0, image_size: int = 416) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    生成成簇重叠的候选框（模拟点选验证码中每个字符周围的大量候选框）
+
+    Args:
+        count: 候选框数量
+        seed: 随机种子
+        image_size: 图像边长
+
+    Returns:
+        (边界框 (N, 4) 格式为 [x1, y1, x2, y2], 得分 (N,))，均为float32
+    """
+    rng = np.random.default_rng(seed)
+    clusters = max(1, count // 20)
+    centers = rng.uniform(20, image_size - 20, (clusters, 2))
+    sizes = rng.uniform(16, 48, (clusters, 2))
+    assignment = rng.integers(0, clusters, count)
+    jitter = rng.normal(0, 4, (count, 4))
+    center = centers[assignment] + jitter[:, :2]
+    half = np.maximum(sizes[assignment] / 2 + jitter[:, 2:], 1.0)
+    boxes = np.concatenate((center - half, center + half), axis=1).astype(np.float32)
+    scores = rng.uniform(0.1, 1.0, count).astype(np.float32)
+    return boxes, scores
+
+
+def benchmark_nms(box_counts: Sequence[int] = (50, 200, 1000, 3000), nms_thr: float = 0.45,
+                  repeat: int = 20, seed: int = 0) -> Dict[str, Any]:
+    """
+    对比各NMS后端在不同候选框数量下的耗时与结果
+
+    Args:
+        box_counts: 候选框数量列表
+        nms_thr: IoU阈值
+        repeat: 每种数量重复计时的次数
+        seed: 随机种子
+
+    Returns:
+        报告字典：environment 与 results（每种数量的保留框数、各后端耗时、加速比、结果是否一致）
+    """
+    from ..core.detection_engine import nms_numpy, nms_opencv
+
+    backends = {'numpy': nms_numpy, 'opencv': nms_opencv}
+    results = []
+    for count in box_counts:
+        boxes, scores = synthetic_boxes(count, seed=seed)
+        keeps = {name: nms(boxes, scores, nms_thr) for name, nms in backends.items()}
+        timings = {}
+        for name, nms in backends.items():
+            values = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                nms(boxes, scores, nms_thr)
+                values.append(time.perf_counter() - start)
+            timings[name] = summarize_timings(values)
+        results.append({
+            'boxes': count,
+            'kept': int(len(keeps['numpy'])),
+            'identical': bool(np.array_equal(np.sort(keeps['numpy']), np.sort(keeps['opencv']))),
+            'timings_ms': timings,
+            'speedup': timings['numpy']['p50'] / max(timings['opencv']['p50'], 1e-9),
+        })
+    return {'environment': get_environment(), 'repeat': repeat, 'results': results}
+
+
+def format_nms_report(report: Dict[str, Any]) -> str:
+    """
+    将NMS基准测试报告格式化为文本表格
+
+    Args:
+        report: benchmark_nms 返回的报告
+
+    Returns:
+        文本表格
+    """
+    header = f"{'候选框':>8}{'保留':>8}{'numpy p50/p95':>22}{'opencv p50/p95':>22}{'加速比':>10}{'一致':>6}"
+    lines = [header, '-' * len(header)]
+    for result in report['results']:
+        numpy_ms, opencv_ms = result['timings_ms']['numpy'], result['timings_ms']['opencv']
+        lines.append(f"{result['boxes']:>8}{result['kept']:>8}"
+                     f"{numpy_ms['p50']:>12.3f}/{numpy_ms['p95']:<9.3f}"
+                     f"{opencv_ms['p50']:>12.3f}/{opencv_ms['p95']:<9.3f}"
+                     f"{result['speedup']:>9.1f}x{'是' if result['identical'] else '否':>5}")
+    return '\n'.join(lines)
@@ -0,0 +1,48 @@
+# coding=utf-8
+"""
+已标注验证码样本加载模块
+基准测试与置信度校准共用的样本目录格式
+
+样本目录中每个图片文件名的第一个下划线之前的部分为标注文本，例如：
+    a7kd_0001.png  ->  a7kd
+    3fx9.jpg       ->  3fx9
+"""
+
+import os
+from typing import List, Tuple
+
+# 支持的图片扩展名
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+
+def label_from_filename(filename: str) -> str:
+    """
+    从文件名解析标注文本
+
+    Args:
+        filename: 图片文件名
+
+    Returns:
+        标注文本
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return stem.split('_', 1)[0]
+
+
+def load_corpus(directory: str) -> List[Tuple[str, bytes]]:
+    """
+    加载已标注的验证码样本
+
+    Args:
+        directory: 样本目录
+
+    Returns:
+        (标注文本, 图片数据) 列表，按文件名排序
+    """
+    samples = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with open(os.path.join(directory, filename), 'rb') as f:
+            samples.append((label_from_filename(filename), f.read()))
+    return samples
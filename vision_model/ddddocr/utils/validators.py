@@ -169,3 +169,43 @@ def validate_charset_range(charset_range: Union[int, str, List[str]]) -> bool:
         raise DDDDOCRError(f"不支持的字符集范围类型: {type(charset_range)}")
     
     return True
+
+
+def validate_session_options(options: dict, execution_modes: Any, optimization_levels: Any) -> bool:
+    """
+    验证ONNX运行时会话选项
+    
+    Args:
+        options: 会话选项字典
+        execution_modes: 支持的执行模式名称
+        optimization_levels: 支持的图优化级别名称
+        
+    Returns:
+        bool: 选项是否有效
+        
+    Raises:
+        DDDDOCRError: 当选项无效时
+    """
+    for key in ('intra_op_num_threads', 'inter_op_num_threads'):
+        value = options.get(key)
+        if value is not None and (not isinstance(value, int) or value < 0):
+            raise DDDDOCRError(f"{key}必须为非负整数")
+    
+    execution_mode = options.get('execution_mode')
+    if execution_mode is not None and execution_mode not in execution_modes:
+        raise DDDDOCRError(f"不支持的执行模式: {execution_mode}。可用: {', '.join(execution_modes)}")
+    
+    level = options.get('graph_optimization_level')
+    if level is not None and level not in optimization_levels:
+        raise DDDDOCRError(f"不支持的图优化级别: {level}。可用: {', '.join(optimization_levels)}")
+    
+    for key in ('enable_cpu_mem_arena', 'enable_mem_pattern'):
+        value = options.get(key)
+        if value is not None and not isinstance(value, bool):
+            raise DDDDOCRError(f"{key}必须为布尔值")
+    
+    optimized_model_dir = options.get('optimized_model_dir')
+    if optimized_model_dir is not None and not isinstance(optimized_model_dir, str):
+        raise DDDDOCRError("optimized_model_dir必须为字符串路径")
+    
+    return True